@@ -0,0 +1,36 @@
+from asgiref.sync import sync_to_async
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import (
+    JWTStatelessUserAuthentication,
+)
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from .tokens import is_token_current
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    JWT authentication that trusts the signed claims of the token
+    instead of loading the user row on every request.
+
+    `request.user` is a `TokenUser` built from the claims added by
+    `auth_app.tokens.issue_token()` (id, username, is_staff,
+    is_superuser). Revocation is enforced by comparing the token's
+    version with the user's current one, which is cached, so an
+    authenticated request normally costs no query at all.
+    """
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if not is_token_current(validated_token):
+            raise AuthenticationFailed(
+                _('Token has been revoked'), code='token_revoked')
+        return user
+
+    async def aauthenticate(self, request):
+        """
+        Variant of `authenticate()` for async views, so both kinds of
+        view identify (and throttle) a request the same way.
+        """
+        # the version check uses the sync cache API
+        return await sync_to_async(self.authenticate)(request)
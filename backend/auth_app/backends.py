@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import verify_password
+
+from .rehash import rehash_queue
+
+UserModel = get_user_model()
+
+
+class DeferredRehashModelBackend(ModelBackend):
+    """
+    `ModelBackend` that upgrades outdated password hashes in the
+    background instead of during the login request.
+
+    Django's `check_password()` rehashes with the preferred hasher and
+    saves the user synchronously when the stored hash uses another
+    algorithm or older cost parameters, doubling the hashing cost of
+    that login and adding a write. Callers passing `defer_rehash=True`
+    only have the password verified; the upgrade is handed to
+    `rehash_queue`.
+
+    Only stateless token logins may defer: a session stores a hash of
+    the password hash, so a session login (e.g. the admin) whose hash
+    is rewritten later would be logged out on its next request. Those
+    are upgraded synchronously, before the session is created.
+    """
+
+    def authenticate(self, request, username=None, password=None,
+                     defer_rehash=False, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Run the default password hasher once to reduce the timing
+            # difference between an existing and a nonexistent user.
+            UserModel().set_password(password)
+            return
+
+        is_correct, must_update = verify_password(password, user.password)
+        if not (is_correct and self.user_can_authenticate(user)):
+            return
+        if must_update:
+            if defer_rehash:
+                rehash_queue.enqueue(user, password)
+            else:
+                user.set_password(password)
+                user.save(update_fields=['password'])
+        return user
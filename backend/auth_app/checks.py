@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+from blog.checks import PER_PROCESS_CACHES
+
+
+@register(Tags.caches, Tags.security)
+def check_login_failure_cache_is_shared(app_configs, **kwargs):
+    """
+    axes counts failed logins in `AXES_CACHE`; with a per-process cache
+    every worker keeps its own counters, so an attacker gets the
+    failure limit once per worker before being locked out.
+    """
+    workers = getattr(settings, 'WEB_CONCURRENCY', 1)
+    alias = getattr(settings, 'AXES_CACHE', 'default')
+    backend = settings.CACHES.get(alias, {}).get('BACKEND')
+    if workers > 1 and backend in PER_PROCESS_CACHES:
+        return [Error(
+            f'AXES_CACHE uses a per-process cache ({backend}) with '
+            f'{workers} workers.',
+            hint=('Point it at a cache shared by all workers (Redis, '
+                  'Memcached or the database cache) or run one worker.'),
+            id='auth_app.E001',
+        )]
+    return []
@@ -0,0 +1,148 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+DEFAULTS = {
+    # Argon2 cost parameters (see the profile_password_hashing command)
+    'TIME_COST': Argon2PasswordHasher.time_cost,
+    'MEMORY_COST': Argon2PasswordHasher.memory_cost,
+    'PARALLELISM': Argon2PasswordHasher.parallelism,
+    # hashes computed at the same time, per process
+    'MAX_WORKERS': 4,
+    # hashes allowed to wait for a worker before requests are turned away
+    'MAX_PENDING': 32,
+    # seconds clients are asked to wait when the queue is full
+    'RETRY_AFTER': 1,
+}
+
+
+def get_setting(name):
+    options = getattr(settings, 'PASSWORD_HASHING', {}) or {}
+    return options.get(name, DEFAULTS[name])
+
+
+class HashingUnavailable(APIException):
+    """
+    Raised when the hashing pool is full. DRF views answer it with a
+    503; `HashingUnavailableMiddleware` does the same for other views
+    (e.g. the admin login), which would otherwise turn it into a 500.
+    """
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many sign-in requests, please try again shortly.'
+    default_code = 'hashing_unavailable'
+
+    def __init__(self, wait, detail=None, code=None):
+        super().__init__(detail, code)
+        # DRF's exception handler turns this into a Retry-After header
+        self.wait = wait
+
+
+class HashingUnavailableMiddleware:
+    """
+    Answers `HashingUnavailable` escaping non-DRF views with a 503 and
+    a `Retry-After` header. `authenticate()` lets it through from the
+    hasher, so it never counts as a failed login.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if not isinstance(exception, HashingUnavailable):
+            return None
+        response = HttpResponse(
+            str(exception.detail), status=exception.status_code,
+            content_type='text/plain; charset=utf-8')
+        response['Retry-After'] = str(exception.wait)
+        return response
+
+
+class HashingPool:
+    """
+    Bounded pool running password hashes on a fixed set of threads.
+
+    Argon2 releases the GIL, so hashes run in parallel on the worker
+    threads. The calling request thread still blocks until its hash is
+    done, so this doesn't free request workers; what it bounds is the
+    CPU and memory spent hashing at once. At most
+    `max_workers + max_pending` hashes are admitted at a time; beyond
+    that `run()` fails fast with `HashingUnavailable` instead of letting
+    a burst of logins queue up and starve every other endpoint.
+    """
+
+    def __init__(self, max_workers, max_pending, retry_after):
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='password-hashing')
+        self.slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self.retry_after = retry_after
+
+    def run(self, func, *args):
+        if not self.slots.acquire(blocking=False):
+            raise HashingUnavailable(wait=self.retry_after)
+        try:
+            future = self.executor.submit(func, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        return future.result()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Returns the process-wide pool for the current settings.
+    """
+    key = (get_setting('MAX_WORKERS'), get_setting('MAX_PENDING'),
+           get_setting('RETRY_AFTER'))
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = HashingPool(*key)
+    return pool
+
+
+class OffloadedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2 hasher that runs on the bounded `HashingPool` and reads its
+    cost parameters from `settings.PASSWORD_HASHING`.
+
+    It keeps the `argon2` algorithm name, so existing hashes verify as
+    before, and hashes made with other parameters are upgraded on the
+    user's next login through `must_update()`.
+    """
+
+    @property
+    def time_cost(self):
+        return get_setting('TIME_COST')
+
+    @property
+    def memory_cost(self):
+        return get_setting('MEMORY_COST')
+
+    @property
+    def parallelism(self):
+        return get_setting('PARALLELISM')
+
+    def encode(self, password, salt):
+        return get_pool().run(super().encode, password, salt)
+
+    def verify(self, password, encoded):
+        return get_pool().run(super().verify, password, encoded)
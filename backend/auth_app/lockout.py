@@ -0,0 +1,19 @@
+from axes.helpers import get_cache_timeout
+from django.conf import settings
+from django.http import JsonResponse
+
+
+def lockout_response(request, credentials, *args, **kwargs):
+    """
+    Lockout response for django-axes, in the API's error format.
+
+    Each failure restarts the cool-off (a sliding window), so
+    Retry-After is the full cool-off period.
+    """
+    response = JsonResponse(
+        {'detail': 'Too many failed login attempts. Please try again later.'},
+        status=settings.AXES_HTTP_RESPONSE_CODE)
+    cool_off = get_cache_timeout(request)
+    if cool_off:
+        response['Retry-After'] = str(cool_off)
+    return response
@@ -0,0 +1,52 @@
+from collections import Counter
+
+from django.contrib.auth.hashers import (
+    UNUSABLE_PASSWORD_PREFIX,
+    get_hasher,
+    identify_hasher,
+)
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = ('Reports how user passwords are hashed, to track the migration '
+            'to the preferred hasher.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Number of users read from the database at a time.')
+
+    def handle(self, *args, **options):
+        preferred = get_hasher()
+        counts = Counter()
+        passwords = User.objects.values_list('password', flat=True).iterator(
+            chunk_size=options['chunk_size'])
+        for encoded in passwords:
+            counts[self.classify(encoded, preferred)] += 1
+
+        total = sum(counts.values())
+        for (algorithm, state), count in sorted(counts.items()):
+            share = count / total * 100
+            self.stdout.write(f'{algorithm:<20} {state:<12} {count:>8} {share:6.2f}%')
+
+        current = counts[(preferred.algorithm, 'current')]
+        share = current / total * 100 if total else 100
+        self.stdout.write(self.style.SUCCESS(
+            f'{current} of {total} users ({share:.2f}%) use the preferred '
+            f'hasher ({preferred.algorithm}) with its current parameters.'))
+
+    @staticmethod
+    def classify(encoded, preferred):
+        if not encoded or encoded.startswith(UNUSABLE_PASSWORD_PREFIX):
+            return ('unusable', '-')
+        try:
+            hasher = identify_hasher(encoded)
+        except ValueError:
+            return ('unknown', '-')
+        if hasher.algorithm != preferred.algorithm:
+            return (hasher.algorithm, 'outdated')
+        if hasher.must_update(encoded):
+            return (hasher.algorithm, 'old params')
+        return (hasher.algorithm, 'current')
@@ -0,0 +1,102 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import argon2
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management.base import BaseCommand
+
+from auth_app.hashers import HashingUnavailable, get_setting
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1)
+
+
+class Command(BaseCommand):
+    help = ('Profiles Argon2 cost parameters against a login latency target '
+            'and optionally simulates a burst of concurrent logins.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target-ms', type=float, default=250,
+            help='Latency target for a single hash, in milliseconds.')
+        parser.add_argument(
+            '--samples', type=int, default=5,
+            help='Hashes timed per parameter set.')
+        parser.add_argument(
+            '--time-cost', type=int, nargs='+', default=[1, 2, 3, 4],
+            help='Argon2 time costs (iterations) to try.')
+        parser.add_argument(
+            '--memory-cost', type=int, nargs='+',
+            default=[19456, 47104, 65536, 102400],
+            help='Argon2 memory costs to try, in KiB.')
+        parser.add_argument(
+            '--parallelism', type=int, default=get_setting('PARALLELISM'),
+            help='Argon2 lanes.')
+        parser.add_argument(
+            '--storm', type=int, default=0,
+            help='Number of concurrent logins to simulate with the '
+                 'configured hasher and pool (0 to skip).')
+
+    def handle(self, *args, **options):
+        self.profile_costs(options)
+        if options['storm']:
+            self.login_storm(options['storm'])
+
+    def profile_costs(self, options):
+        target = options['target_ms']
+        best = None
+        for memory_cost in options['memory_cost']:
+            for time_cost in options['time_cost']:
+                hasher = argon2.PasswordHasher(
+                    time_cost=time_cost, memory_cost=memory_cost,
+                    parallelism=options['parallelism'])
+                timings = []
+                for _ in range(options['samples']):
+                    start = time.perf_counter()
+                    hasher.hash('profile-password')
+                    timings.append(time.perf_counter() - start)
+                slowest = _ms(max(timings))
+                within = slowest <= target
+                self.stdout.write(
+                    f'time_cost={time_cost} memory_cost={memory_cost}KiB: '
+                    f'median {_ms(statistics.median(timings))}ms, '
+                    f'max {slowest}ms {"ok" if within else "over target"}')
+                if within and (best is None or memory_cost * time_cost
+                               > best[0] * best[1]):
+                    best = (memory_cost, time_cost)
+
+        if best is None:
+            self.stdout.write(self.style.WARNING(
+                f'No parameter set hashes within {target}ms.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'Strongest within {target}ms: TIME_COST={best[1]}, '
+                f'MEMORY_COST={best[0]}, PARALLELISM={options["parallelism"]}'))
+
+    def login_storm(self, logins):
+        encoded = make_password('storm-password')
+
+        def login(_):
+            start = time.perf_counter()
+            try:
+                check_password('storm-password', encoded)
+            except HashingUnavailable:
+                return None
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=logins) as clients:
+            results = list(clients.map(login, range(logins)))
+        elapsed = time.perf_counter() - start
+
+        served = sorted(r for r in results if r is not None)
+        rejected = len(results) - len(served)
+        summary = f'{len(served)} served, {rejected} turned away with 503'
+        if served:
+            p95 = served[min(len(served) - 1, int(len(served) * 0.95))]
+            summary += (f', median {_ms(statistics.median(served))}ms, '
+                        f'p95 {_ms(p95)}ms')
+        self.stdout.write(self.style.SUCCESS(
+            f'Login storm of {logins} in {_ms(elapsed)}ms: {summary}.'))
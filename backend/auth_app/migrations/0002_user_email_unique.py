@@ -0,0 +1,42 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:14
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def check_duplicate_emails(apps, schema_editor):
+    """
+    Refuses to build the index over duplicate emails, which users have
+    to be contacted about (or merged) by hand.
+    """
+    User = apps.get_model('auth', 'User')
+    duplicates = list(
+        User.objects.using(schema_editor.connection.alias).exclude(email='')
+        .values('email').annotate(users=Count('id')).filter(users__gt=1)
+        .order_by('email').values_list('email', flat=True)[:20])
+    if duplicates:
+        raise RuntimeError(
+            'Cannot make auth_user.email unique, these emails are used by '
+            'more than one user: ' + ', '.join(duplicates) + '. Give the '
+            'users distinct emails (or blank them) and migrate again.')
+
+
+class Migration(migrations.Migration):
+    """
+    Enforces unique emails in the database so registration doesn't
+    have to look them up first. Blank emails (users created without
+    one, e.g. by createsuperuser) are left out of the index.
+    """
+
+    dependencies = [
+        ('auth_app', '0001_token_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_emails, migrations.RunPython.noop),
+        migrations.RunSQL(
+            "CREATE UNIQUE INDEX auth_user_email_unique "
+            "ON auth_user (email) WHERE email <> ''",
+            reverse_sql='DROP INDEX auth_user_email_unique',
+        ),
+    ]
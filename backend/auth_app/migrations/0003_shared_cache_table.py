@@ -0,0 +1,26 @@
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_tables(apps, schema_editor):
+    """
+    Creates the tables of the database caches in `CACHES` (the shared
+    cache counting login failures by default); existing ones are kept.
+    """
+    call_command('createcachetable', database=schema_editor.connection.alias,
+                 verbosity=0)
+
+
+class Migration(migrations.Migration):
+    """
+    Lets a plain `migrate` set up the database cache `AXES_CACHE` points
+    at, instead of a separate `createcachetable` step.
+    """
+
+    dependencies = [
+        ('auth_app', '0002_user_email_unique'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_tables, migrations.RunPython.noop),
+    ]
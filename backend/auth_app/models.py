@@ -1,3 +1,17 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class TokenVersion(models.Model):
+    """
+    Per-user counter embedded in every issued token; bumping it
+    revokes all of the user's outstanding tokens at once.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+        primary_key=True, related_name='token_version')
+    version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.user_id}: v{self.version}'
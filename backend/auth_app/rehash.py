@@ -0,0 +1,105 @@
+import logging
+import threading
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Case, F, Q, Value, When
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    # users rehashed per UPDATE statement
+    'BATCH_SIZE': 200,
+    # seconds between background flushes; None disables the worker
+    # thread so the queue is only drained by `flush()`
+    'FLUSH_INTERVAL': 2.0,
+}
+
+
+def get_setting(name):
+    options = getattr(settings, 'PASSWORD_REHASH', {}) or {}
+    return options.get(name, DEFAULTS[name])
+
+
+class RehashQueue:
+    """
+    Queue of password hashes to upgrade to the preferred hasher,
+    drained off the login path.
+
+    Logins only record the user, the verified password and the hash it
+    was verified against. A background thread computes the new hashes
+    and writes them in batches with one conditional `UPDATE` per batch.
+    A row is only rewritten if its hash is still the one that was
+    verified, so a password changed in the meantime is never clobbered.
+
+    Raw passwords stay in memory only until the next flush.
+    """
+
+    def __init__(self):
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.worker = None
+
+    def enqueue(self, user, password):
+        with self.lock:
+            self.pending[user.pk] = (password, user.password)
+            if len(self.pending) >= get_setting('BATCH_SIZE'):
+                self.wakeup.set()
+        self._ensure_worker()
+
+    def flush(self):
+        """
+        Rehashes every queued password now; returns the number of
+        users updated.
+        """
+        with self.lock:
+            pending, self.pending = self.pending, {}
+
+        updated = 0
+        batch_size = get_setting('BATCH_SIZE')
+        items = list(pending.items())
+        for start in range(0, len(items), batch_size):
+            updated += self._rehash(items[start:start + batch_size])
+        return updated
+
+    def _rehash(self, batch):
+        whens = []
+        matches = Q()
+        for pk, (password, old_hash) in batch:
+            # same preferred hasher (and pool) as a synchronous rehash
+            new_hash = make_password(password)
+            whens.append(When(pk=pk, then=Value(new_hash)))
+            matches |= Q(pk=pk, password=old_hash)
+        return User.objects.filter(matches).update(
+            password=Case(*whens, default=F('password')))
+
+    def _ensure_worker(self):
+        interval = get_setting('FLUSH_INTERVAL')
+        if interval is None or (self.worker and self.worker.is_alive()):
+            return
+        with self.lock:
+            if self.worker and self.worker.is_alive():
+                return
+            self.worker = threading.Thread(
+                target=self._run, args=(interval,),
+                name='password-rehash', daemon=True)
+            self.worker.start()
+
+    def _run(self, interval):
+        while True:
+            self.wakeup.wait(interval)
+            self.wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                # the users are queued again on their next login
+                logger.exception('Deferred password rehash failed')
+            finally:
+                # the worker outlives requests; don't keep a connection
+                connection.close()
+
+
+rehash_queue = RehashQueue()
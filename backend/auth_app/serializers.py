@@ -1,27 +1,52 @@
 from rest_framework import serializers
-from rest_framework.validators import UniqueValidator
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+    TokenError,
+)
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth import authenticate
+from django.db import IntegrityError, transaction
+
+from config.db_routers import use_primary
+
+from .tokens import (
+    LEGACY_TOKEN_VERSION,
+    TOKEN_VERSION_CLAIM,
+    is_blacklisted,
+    is_token_current,
+)
 
 
 class RegisterSerializer(serializers.ModelSerializer):
     """
-    Serializer class for user registration
+    Serializer class for user registration.
+    Uniqueness of the username and email is enforced by the
+    database rather than checked beforehand, so registering is a
+    single INSERT; violations are reported as field errors.
     """
 
-    email = serializers.EmailField(required=True, validators=[
-                                   UniqueValidator(queryset=User.objects.all())])
+    email = serializers.EmailField(required=True)
     password = serializers.CharField(
         write_only=True, required=True, validators=[validate_password])
     password2 = serializers.CharField(write_only=True, required=True)
 
+    # error reported for each unique column of `auth_user` already
+    # holding the submitted value
+    unique_error_messages = {
+        'username': User._meta.get_field('username').error_messages['unique'],
+        'email': 'This field must be unique.',
+    }
+
     class Meta:
         model = User
         fields = ('username', 'email', 'password', 'password2')
         extra_kwargs = {
-            'username': {'required': True},
+            # keep the format check but leave uniqueness to the database
+            'username': {'required': True,
+                         'validators': [User.username_validator]},
             'email': {'required': True}
         }
 
@@ -33,14 +58,38 @@ class RegisterSerializer(serializers.ModelSerializer):
         return attrs
 
     def create(self, validated_data):
-        user = User.objects.create(
+        user = User(
             username=validated_data['username'],
             email=validated_data['email']
         )
         user.set_password(validated_data['password'])
-        user.save()
+        try:
+            # savepoint, so a violation doesn't break an outer transaction
+            with transaction.atomic():
+                user.save(force_insert=True)
+        except IntegrityError as exc:
+            errors = self.unique_errors(user)
+            if not errors:
+                raise
+            raise serializers.ValidationError(errors) from exc
         return user
 
+    def unique_errors(self, user):
+        """
+        Returns the field errors of the unique columns `user` collides
+        on. Only called once the INSERT failed, and looked up instead of
+        parsed from the database's message, whose wording (and constraint
+        names) differ between backends.
+        """
+        # the conflicting row may not have reached a replica yet
+        with use_primary():
+            return {
+                field: [message]
+                for field, message in self.unique_error_messages.items()
+                if User.objects.filter(
+                    **{field: getattr(user, field)}).exists()
+            }
+
 
 class UserSerializer(serializers.ModelSerializer):
     """
@@ -72,8 +121,14 @@ class TokenSerializer(serializers.Serializer):
         password = attrs.get('password')
 
         if username and password:
-            user = authenticate(request=self.context.get(
-                'request'), username=username, password=password)
+            # axes flags lockouts on the Django request, which its
+            # middleware checks, not on DRF's wrapper
+            request = self.context.get('request')
+            # tokens don't depend on the password hash, so outdated
+            # hashes can be upgraded after the response
+            user = authenticate(request=getattr(request, '_request', request),
+                                username=username, password=password,
+                                defer_rehash=True)
 
             if not user:
                 raise serializers.ValidationError(
@@ -85,3 +140,32 @@ class TokenSerializer(serializers.Serializer):
 
         attrs['user'] = user
         return attrs
+
+
+class TokenRefreshSerializer(serializers.Serializer):
+    """
+    Serializer for renewing tokens with a refresh token instead
+    of a password
+    """
+
+    refresh = serializers.CharField(required=True, write_only=True)
+
+    def validate(self, attrs):
+        try:
+            refresh = RefreshToken(attrs['refresh'])
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+
+        # same revocation check as every authenticated request
+        if not is_token_current(refresh):
+            raise AuthenticationFailed(
+                'Token has been revoked', code='token_revoked')
+        if is_blacklisted(refresh):
+            raise InvalidToken('Token is blacklisted')
+        # issued before versions existed: the tokens derived from it
+        # carry the version
+        if refresh.get(TOKEN_VERSION_CLAIM) is None:
+            refresh[TOKEN_VERSION_CLAIM] = LEGACY_TOKEN_VERSION
+
+        attrs['refresh'] = refresh
+        return attrs
@@ -0,0 +1,40 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .tokens import forget_token_version, revoke_tokens
+
+# user fields copied into tokens, or checked instead of the user row
+TRUSTED_FIELDS = ('is_staff', 'is_superuser', 'is_active')
+
+
+@receiver(post_init, sender=User)
+def remember_trusted_fields(sender, instance, **kwargs):
+    # remembered so changes can be detected on save; deferred fields
+    # are skipped rather than loaded
+    instance._loaded_trusted_fields = {
+        field: instance.__dict__[field]
+        for field in TRUSTED_FIELDS if field in instance.__dict__
+    }
+
+
+@receiver(post_save, sender=User)
+def revoke_tokens_on_privilege_change(sender, instance, created, **kwargs):
+    # tokens carry the admin flags and are trusted without loading the
+    # user, so they must not outlive a change made anywhere (the admin,
+    # the shell, a data migration)
+    if created:
+        return
+    loaded = getattr(instance, '_loaded_trusted_fields', {})
+    if any(getattr(instance, field) != value
+           for field, value in loaded.items()):
+        revoke_tokens(instance)
+    remember_trusted_fields(sender, instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_token_version(sender, instance, **kwargs):
+    # deactivated or deleted users must stop authenticating even though
+    # their tokens are never checked against the user row
+    forget_token_version(instance.pk)
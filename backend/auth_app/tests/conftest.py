@@ -9,3 +9,4 @@ def create_user(db):
             username=username, email=email, password=password)
         return user
     return _create_user
+
@@ -0,0 +1,121 @@
+import threading
+from io import StringIO
+
+import pytest
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+from auth_app.hashers import HashingPool, HashingUnavailable, get_pool
+
+CHEAP_HASHING = {
+    'TIME_COST': 1,
+    'MEMORY_COST': 64,
+    'PARALLELISM': 1,
+    'MAX_WORKERS': 1,
+    'MAX_PENDING': 0,
+    'RETRY_AFTER': 3,
+}
+
+
+@pytest.fixture
+def cheap_hashing(settings):
+    settings.PASSWORD_HASHING = CHEAP_HASHING
+
+
+@pytest.fixture
+def busy_pool(cheap_hashing):
+    """
+    Fixture occupying every slot of the pool configured by
+    `CHEAP_HASHING` until the test ends.
+    """
+    release = threading.Event()
+    started = threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    worker = threading.Thread(target=get_pool().run, args=(block,))
+    worker.start()
+    started.wait(5)
+    yield
+    release.set()
+    worker.join()
+
+
+class TestHashingPool:
+    """
+    Tests for the bounded password hashing pool
+    """
+
+    def test_runs_on_a_worker_thread(self):
+        pool = HashingPool(max_workers=1, max_pending=0, retry_after=1)
+
+        name = pool.run(lambda: threading.current_thread().name)
+
+        assert name.startswith('password-hashing')
+        pool.shutdown()
+
+    def test_rejects_when_full(self, busy_pool):
+        with pytest.raises(HashingUnavailable) as excinfo:
+            get_pool().run(lambda: None)
+
+        assert excinfo.value.wait == 3
+        assert excinfo.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+    def test_slots_are_released(self):
+        pool = HashingPool(max_workers=1, max_pending=0, retry_after=1)
+
+        for _ in range(3):
+            assert pool.run(lambda: 42) == 42
+        pool.shutdown()
+
+
+@pytest.mark.usefixtures('cheap_hashing')
+class TestOffloadedArgon2PasswordHasher:
+    """
+    Tests for the Argon2 hasher running on the hashing pool
+    """
+
+    def test_cost_comes_from_settings(self):
+        encoded = make_password('Password@123')
+
+        assert encoded.startswith('argon2$argon2id$v=19$m=64,t=1,p=1$')
+        assert check_password('Password@123', encoded)
+        assert not check_password('wrong', encoded)
+
+    @pytest.fixture
+    def token_user(self, create_user):
+        return create_user(username='tokenuser', email='token@example.com',
+                           password='Password@123')
+
+    def test_login_returns_503_when_pool_is_full(self, client, token_user,
+                                                 busy_pool):
+        response = client.post(reverse('token_obtain'), {
+            'username': 'tokenuser', 'password': 'Password@123'})
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response['Retry-After'] == '3'
+
+    def test_admin_login_returns_503_when_pool_is_full(self, client,
+                                                       token_user, busy_pool):
+        token_user.is_staff = True
+        token_user.save()
+
+        response = client.post(reverse('admin:login'), {
+            'username': 'tokenuser', 'password': 'Password@123'})
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response['Retry-After'] == '3'
+
+    def test_profile_command(self):
+        out = StringIO()
+
+        call_command('profile_password_hashing', time_cost=[1],
+                     memory_cost=[64], parallelism=1, samples=1, storm=3,
+                     stdout=out)
+
+        assert 'Strongest within' in out.getvalue()
+        assert 'Login storm of 3' in out.getvalue()
@@ -0,0 +1,95 @@
+import pytest
+from axes.models import AccessAttempt
+from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from auth_app.checks import check_login_failure_cache_is_shared
+
+
+@pytest.mark.django_db
+class TestLoginLockout:
+    """
+    Tests for cache-backed login failure tracking
+    """
+
+    @pytest.fixture(autouse=True)
+    def user(self, create_user):
+        return create_user('tokenuser', 'token@example.com', 'Password@123')
+
+    def login(self, client, password='wrong', username='tokenuser',
+              ip='10.0.0.1'):
+        return client.post(reverse('token_obtain'), {
+            'username': username, 'password': password},
+            REMOTE_ADDR=ip)
+
+    def test_failures_are_only_written_to_the_cache(self, client):
+        cache_table = settings.CACHES[settings.AXES_CACHE]['LOCATION']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.login(client)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not AccessAttempt.objects.exists()
+        # the shared database cache is the only table written to
+        assert not [
+            q for q in queries
+            if not q['sql'].startswith(('SELECT', 'SAVEPOINT', 'RELEASE'))
+            and cache_table not in q['sql']
+        ]
+
+    def test_lockout_after_failure_limit(self, client):
+        for _ in range(4):
+            assert self.login(client).status_code == status.HTTP_400_BAD_REQUEST
+
+        response = self.login(client)
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response['Retry-After'] == str(15 * 60)
+        # locked out clients are refused even with the right password
+        response = self.login(client, password='Password@123')
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_ip_counter_spans_usernames(self, client, create_user):
+        for i in range(5):
+            self.login(client, username=f'guess{i}')
+
+        response = self.login(client, password='Password@123')
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_username_counter_spans_ips(self, client):
+        for i in range(5):
+            self.login(client, ip=f'10.0.1.{i}')
+
+        response = self.login(client, password='Password@123', ip='10.0.2.1')
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_other_clients_are_not_affected(self, client, create_user):
+        create_user('bystander', 'bystander@example.com', 'Password@123')
+        for _ in range(5):
+            self.login(client)
+
+        response = self.login(client, username='bystander',
+                              password='Password@123', ip='10.0.0.2')
+
+        assert response.status_code == status.HTTP_200_OK
+
+
+class TestLoginFailureCacheCheck:
+    """
+    Tests for the system check on the cache holding login failures
+    """
+
+    @override_settings(WEB_CONCURRENCY=4, AXES_CACHE='default')
+    def test_per_process_cache_fails_with_several_workers(self):
+        errors = check_login_failure_cache_is_shared(None)
+
+        assert [error.id for error in errors] == ['auth_app.E001']
+
+    @override_settings(WEB_CONCURRENCY=4)
+    def test_default_cache_is_shared(self):
+        assert check_login_failure_cache_is_shared(None) == []
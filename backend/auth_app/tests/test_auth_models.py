@@ -1,6 +1,7 @@
 import pytest
 from django.contrib.auth.models import User
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
+from django.db.migrations.executor import MigrationExecutor
 
 
 @pytest.mark.django_db
@@ -63,3 +64,19 @@ class TestUserModel:
         )
 
         assert str(user) == 'stringuser'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_email_index_migration_reports_duplicates():
+    executor = MigrationExecutor(connection)
+    executor.migrate([('auth_app', '0001_token_version')])
+    for username in ('first', 'second'):
+        User.objects.create(username=username, email='shared@example.com')
+
+    executor = MigrationExecutor(connection)
+    with pytest.raises(RuntimeError, match='shared@example.com'):
+        executor.migrate([('auth_app', '0002_user_email_unique')])
+
+    User.objects.filter(username='second').update(email='')
+    executor = MigrationExecutor(connection)
+    executor.migrate(executor.loader.graph.leaf_nodes())
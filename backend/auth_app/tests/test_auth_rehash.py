@@ -0,0 +1,129 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+from auth_app.rehash import rehash_queue
+
+
+@pytest.fixture(autouse=True)
+def legacy_hashing(settings):
+    """
+    Fixture allowing cheap legacy hashes and draining the rehash
+    queue only when a test flushes it.
+    """
+    settings.PASSWORD_HASHERS = [
+        'auth_app.hashers.OffloadedArgon2PasswordHasher',
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ]
+    settings.PASSWORD_HASHING = {
+        'TIME_COST': 1, 'MEMORY_COST': 64, 'PARALLELISM': 1}
+    settings.PASSWORD_REHASH = {'BATCH_SIZE': 2, 'FLUSH_INTERVAL': None}
+    rehash_queue.pending.clear()
+    yield
+    rehash_queue.pending.clear()
+
+
+@pytest.fixture
+def legacy_user(db):
+    def make_user(username='legacy', password='Password@123'):
+        return User.objects.create(
+            username=username,
+            password=make_password(password, hasher='md5'))
+    return make_user
+
+
+@pytest.mark.django_db
+class TestDeferredRehash:
+    """
+    Tests for upgrading legacy password hashes off the login path
+    """
+
+    def login(self, client, username='legacy', password='Password@123'):
+        return client.post(reverse('token_obtain'), {
+            'username': username, 'password': password})
+
+    def test_login_defers_rehash(self, client, legacy_user):
+        user = legacy_user()
+
+        response = self.login(client)
+
+        assert response.status_code == status.HTTP_200_OK
+        user.refresh_from_db()
+        assert user.password.startswith('md5$')
+        assert user.pk in rehash_queue.pending
+
+    def test_flush_upgrades_hash(self, client, legacy_user):
+        user = legacy_user()
+        self.login(client)
+
+        assert rehash_queue.flush() == 1
+
+        user.refresh_from_db()
+        assert user.password.startswith('argon2$')
+        assert user.check_password('Password@123')
+        assert not rehash_queue.pending
+
+    def test_failed_login_is_not_queued(self, client, legacy_user):
+        legacy_user()
+
+        self.login(client, password='wrong')
+
+        assert not rehash_queue.pending
+
+    def test_changed_password_is_not_clobbered(self, client, legacy_user):
+        user = legacy_user()
+        self.login(client)
+        User.objects.filter(pk=user.pk).update(
+            password=make_password('Changed@456', hasher='md5'))
+
+        assert rehash_queue.flush() == 0
+
+        user.refresh_from_db()
+        assert user.check_password('Changed@456')
+
+    def test_updates_are_batched(self, client, legacy_user,
+                                 django_assert_num_queries):
+        for i in range(3):
+            legacy_user(username=f'legacy{i}')
+            self.login(client, username=f'legacy{i}')
+
+        # BATCH_SIZE is 2: one UPDATE for two users, one for the last
+        with django_assert_num_queries(2):
+            assert rehash_queue.flush() == 3
+
+        assert not User.objects.filter(password__startswith='md5$').exists()
+
+    def test_admin_login_rehashes_before_the_session(self, client,
+                                                     legacy_user):
+        user = legacy_user()
+        user.is_staff = True
+        user.save()
+
+        response = client.post(reverse('admin:login'), {
+            'username': 'legacy', 'password': 'Password@123',
+            'next': reverse('admin:index')})
+
+        assert response.status_code == status.HTTP_302_FOUND
+        user.refresh_from_db()
+        assert user.password.startswith('argon2$')
+        assert not rehash_queue.pending
+        # the session matches the upgraded hash, so it stays valid
+        assert client.get(reverse('admin:index')).status_code == \
+            status.HTTP_200_OK
+
+    def test_report_command(self, legacy_user, create_user):
+        legacy_user()
+        create_user('current', 'current@example.com', 'Password@123')
+        User.objects.create(username='unusable', password='!')
+        out = StringIO()
+
+        call_command('password_hash_report', stdout=out)
+
+        output = out.getvalue()
+        assert 'md5' in output and 'outdated' in output
+        assert '1 of 3 users (33.33%) use the preferred hasher' in output
@@ -2,6 +2,8 @@ from re import M
 import pytest
 from rest_framework.exceptions import ValidationError
 from django.contrib.auth.models import User
+from django.db import IntegrityError
+from django.test import RequestFactory
 
 from auth_app.serializers import RegisterSerializer, TokenSerializer
 
@@ -47,9 +49,12 @@ class TestRegisterSerializer:
         }
         serializer = RegisterSerializer(data=data)
 
-        assert serializer.is_valid() is False
-        assert 'username' in serializer.errors
-        assert serializer.errors['username'][0] == 'A user with that username already exists.'
+        # uniqueness is left to the database, so it surfaces on save
+        assert serializer.is_valid() is True
+        with pytest.raises(ValidationError) as excinfo:
+            serializer.save()
+        assert excinfo.value.detail['username'][0] == 'A user with that username already exists.'
+        assert User.objects.filter(username='existinguser').count() == 1
 
     def test_registration_duplicate_email(self, create_user):
         create_user(username='user1', email='unique@example.com',
@@ -62,9 +67,59 @@ class TestRegisterSerializer:
         }
         serializer = RegisterSerializer(data=data)
 
+        assert serializer.is_valid() is True
+        with pytest.raises(ValidationError) as excinfo:
+            serializer.save()
+        assert excinfo.value.detail['email'][0] == 'This field must be unique.'
+        assert not User.objects.filter(username='user2').exists()
+
+    def test_registration_invalid_username(self):
+        data = {
+            'username': 'not valid!',
+            'email': 'invalid@example.com',
+            'password': 'Pass123!',
+            'password2': 'Pass123!'
+        }
+        serializer = RegisterSerializer(data=data)
+
         assert serializer.is_valid() is False
-        assert 'email' in serializer.errors
-        assert serializer.errors['email'][0] == 'This field must be unique.'
+        assert 'username' in serializer.errors
+
+    def test_unrelated_integrity_error_is_not_a_field_error(
+            self, monkeypatch):
+        def fail(*args, **kwargs):
+            raise IntegrityError(
+                'CHECK constraint failed: username_email_differ')
+        monkeypatch.setattr(User, 'save', fail)
+        serializer = RegisterSerializer(data={
+            'username': 'newuser',
+            'email': 'newuser@example.com',
+            'password': 'ValidPassword123!',
+            'password2': 'ValidPassword123!'
+        })
+
+        assert serializer.is_valid() is True
+        with pytest.raises(IntegrityError):
+            serializer.save()
+
+    def test_registration_is_a_single_insert(self, django_assert_num_queries):
+        data = {
+            'username': 'oneshot',
+            'email': 'oneshot@example.com',
+            'password': 'ValidPassword123!',
+            'password2': 'ValidPassword123!'
+        }
+        serializer = RegisterSerializer(data=data)
+
+        # previously two uniqueness SELECTs, an INSERT and an UPDATE;
+        # now the INSERT and the savepoint around it
+        with django_assert_num_queries(3) as captured:
+            assert serializer.is_valid() is True
+            serializer.save()
+        statements = [q['sql'].split()[0].upper()
+                      for q in captured.captured_queries]
+        assert statements.count('INSERT') == 1
+        assert 'SELECT' not in statements and 'UPDATE' not in statements
 
     def test_registration_weak_password(self):
         data = {
@@ -81,6 +136,11 @@ class TestRegisterSerializer:
 
 @pytest.mark.django_db
 class TestTokenSerializer:
+    @property
+    def context(self):
+        # login lockouts are tracked per request
+        return {'request': RequestFactory().post('/')}
+
     def test_valid_credentials(self, create_user):
         create_user(username='tokenuser', email='token@example.com',
                     password='TokenPass123!')
@@ -88,7 +148,7 @@ class TestTokenSerializer:
             'username': 'tokenuser',
             'password': 'TokenPass123!'
         }
-        serializer = TokenSerializer(data=data)
+        serializer = TokenSerializer(data=data, context=self.context)
 
         assert serializer.is_valid() is True
         assert 'user' in serializer.validated_data
@@ -101,7 +161,7 @@ class TestTokenSerializer:
             'username': 'invaliduser',
             'password': 'TokenPass123!'
         }
-        serializer = TokenSerializer(data=data)
+        serializer = TokenSerializer(data=data, context=self.context)
 
         assert serializer.is_valid() is False
         assert serializer.errors['non_field_errors'][0] == 'Invalid credentials. Please try again.'
@@ -113,7 +173,7 @@ class TestTokenSerializer:
             'username': 'tokenuser',
             'password': 'InvalidPass123!'
         }
-        serializer = TokenSerializer(data=data)
+        serializer = TokenSerializer(data=data, context=self.context)
 
         assert serializer.is_valid() is False
         assert serializer.errors['non_field_errors'][0] == 'Invalid credentials. Please try again.'
@@ -0,0 +1,255 @@
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from auth_app.authentication import StatelessJWTAuthentication
+from auth_app.hashers import OffloadedArgon2PasswordHasher
+from auth_app.tokens import TOKEN_VERSION_CLAIM, issue_token, revoke_tokens
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+def authenticate(token):
+    request = APIRequestFactory().get(
+        '/', HTTP_AUTHORIZATION=f'Bearer {token}')
+    return StatelessJWTAuthentication().authenticate(request)
+
+
+@pytest.mark.django_db
+class TestStatelessJWTAuthentication:
+    """
+    Tests for authentication from signed token claims
+    """
+
+    def test_user_is_built_from_claims(self, create_user):
+        user = create_user('tokenuser', 'token@example.com', 'Password@123')
+        user.is_staff = True
+        user.save()
+
+        token_user, _ = authenticate(issue_token(user).access_token)
+
+        assert token_user.pk == user.pk
+        assert token_user.username == 'tokenuser'
+        assert token_user.is_staff is True
+        assert token_user.is_superuser is False
+
+    def test_cached_check_costs_no_query(self, create_user,
+                                         django_assert_num_queries):
+        user = create_user('tokenuser', 'token@example.com', 'Password@123')
+        token = issue_token(user).access_token
+
+        with django_assert_num_queries(0):
+            authenticate(token)
+
+    def test_version_is_read_once_on_cache_miss(self, create_user,
+                                                django_assert_num_queries):
+        user = create_user('tokenuser', 'token@example.com', 'Password@123')
+        token = issue_token(user).access_token
+        cache.clear()
+
+        with django_assert_num_queries(1):
+            authenticate(token)
+        with django_assert_num_queries(0):
+            authenticate(token)
+
+    def test_revoked_token_is_rejected(self, create_user,
+                                       django_capture_on_commit_callbacks):
+        user = create_user('tokenuser', 'token@example.com', 'Password@123')
+        old = issue_token(user).access_token
+
+        with django_capture_on_commit_callbacks(execute=True):
+            revoke_tokens(user)
+
+        with pytest.raises(AuthenticationFailed):
+            authenticate(old)
+        assert authenticate(issue_token(user).access_token)[0].pk == user.pk
+
+    def test_deleted_user_is_rejected(self, create_user,
+                                      django_capture_on_commit_callbacks):
+        user = create_user('tokenuser', 'token@example.com', 'Password@123')
+        token = issue_token(user).access_token
+
+        with django_capture_on_commit_callbacks(execute=True):
+            user.delete()
+
+        with pytest.raises(AuthenticationFailed):
+            authenticate(token)
+
+    def test_inactive_user_is_rejected(self, create_user,
+                                       django_capture_on_commit_callbacks):
+        user = create_user('tokenuser', 'token@example.com', 'Password@123')
+        token = issue_token(user).access_token
+
+        with django_capture_on_commit_callbacks(execute=True):
+            user.is_active = False
+            user.save()
+
+        with pytest.raises(AuthenticationFailed):
+            authenticate(token)
+
+    def test_token_without_version_counts_as_legacy(
+            self, create_user, django_capture_on_commit_callbacks):
+        user = create_user('tokenuser', 'token@example.com', 'Password@123')
+        # issued before versions existed
+        token = AccessToken.for_user(user)
+        assert authenticate(token)[0].pk == user.pk
+
+        with django_capture_on_commit_callbacks(execute=True):
+            revoke_tokens(user)
+
+        with pytest.raises(AuthenticationFailed):
+            authenticate(token)
+
+    def test_password_change_revokes_tokens(self, api_client, create_user,
+                                            django_capture_on_commit_callbacks):
+        user = create_user('tokenuser', 'token@example.com', 'Password@123')
+        token = issue_token(user).access_token
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        url = reverse('user-update', kwargs={'pk': user.pk})
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = api_client.patch(url, {
+                'password': 'NewPassword@456',
+                'password2': 'NewPassword@456',
+            }, format='json')
+        assert response.status_code == status.HTTP_200_OK
+
+        response = api_client.get(reverse('user-detail', kwargs={'pk': user.pk}))
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_obtained_token_authenticates(self, api_client, create_user):
+        user = create_user('tokenuser', 'token@example.com', 'Password@123')
+        response = api_client.post(reverse('token_obtain'), {
+            'username': 'tokenuser', 'password': 'Password@123'},
+            format='json')
+        api_client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {response.json()['token']}")
+
+        response = api_client.get(reverse('user-detail', kwargs={'pk': user.pk}))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['username'] == 'tokenuser'
+
+
+@pytest.mark.django_db
+class TestRefreshTokenApi:
+    """
+    Tests for renewing tokens with a rotating refresh token
+    """
+
+    @pytest.fixture
+    def user(self, create_user):
+        return create_user('tokenuser', 'token@example.com', 'Password@123')
+
+    @pytest.fixture
+    def refresh(self, api_client, user):
+        response = api_client.post(reverse('token_obtain'), {
+            'username': 'tokenuser', 'password': 'Password@123'},
+            format='json')
+        return response.json()['refresh']
+
+    def renew(self, api_client, refresh):
+        return api_client.post(
+            reverse('token_refresh'), {'refresh': refresh}, format='json')
+
+    def test_access_tokens_are_short_lived(self, user):
+        access = issue_token(user).access_token
+
+        assert access['exp'] - access['iat'] == 15 * 60
+
+    def test_refresh_rotates_tokens(self, api_client, user, refresh):
+        response = self.renew(api_client, refresh)
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data['refresh'] != refresh
+        assert authenticate(data['token'])[0].pk == user.pk
+
+    def test_rotated_token_can_not_be_reused(self, api_client, refresh):
+        assert self.renew(api_client, refresh).status_code == status.HTTP_200_OK
+
+        response = self.renew(api_client, refresh)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_access_token_is_not_a_refresh_token(self, api_client, user):
+        access = str(issue_token(user).access_token)
+
+        response = self.renew(api_client, access)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_legacy_refresh_issues_versioned_tokens(self, api_client, user):
+        response = self.renew(api_client, str(RefreshToken.for_user(user)))
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert AccessToken(data['token'])[TOKEN_VERSION_CLAIM] == 0
+        assert RefreshToken(data['refresh'])[TOKEN_VERSION_CLAIM] == 0
+
+    def test_revoked_user_can_not_refresh(self, api_client, user, refresh,
+                                          django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            revoke_tokens(user)
+
+        response = self.renew(api_client, refresh)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_demoted_user_can_not_refresh(self, api_client, user, refresh,
+                                          django_capture_on_commit_callbacks):
+        user.is_staff = user.is_superuser = True
+        with django_capture_on_commit_callbacks(execute=True):
+            user.save()
+        response = self.renew(api_client, refresh)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+        # an admin token, then a demotion outside the API
+        admin_refresh = str(issue_token(user))
+        user.is_staff = user.is_superuser = False
+        with django_capture_on_commit_callbacks(execute=True):
+            user.save()
+
+        response = self.renew(api_client, admin_refresh)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_unrelated_save_keeps_tokens(self, api_client, user, refresh,
+                                         django_capture_on_commit_callbacks):
+        user.first_name = 'Token'
+        with django_capture_on_commit_callbacks(execute=True):
+            user.save()
+
+        response = self.renew(api_client, refresh)
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_refresh_skips_password_hashing(self, api_client, refresh,
+                                            monkeypatch,
+                                            django_assert_num_queries):
+        def fail(*args):
+            raise AssertionError('password hashed during refresh')
+        monkeypatch.setattr(OffloadedArgon2PasswordHasher, 'verify', fail)
+        monkeypatch.setattr(OffloadedArgon2PasswordHasher, 'encode', fail)
+
+        # a password login costs an Argon2 hash plus the user lookup; a
+        # refresh only checks the cached token version
+        with django_assert_num_queries(0):
+            response = self.renew(api_client, refresh)
+
+        assert response.status_code == status.HTTP_200_OK
+
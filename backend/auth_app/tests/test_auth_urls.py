@@ -2,7 +2,7 @@ import pytest
 from django.urls import reverse, resolve
 from rest_framework import status
 
-from auth_app.views import RegisterUserApi, ObtainTokenApi
+from auth_app.views import RegisterUserApi, ObtainTokenApi, RefreshTokenApi
 
 
 @pytest.mark.django_db
@@ -15,6 +15,10 @@ class TestAuthUrls:
         url = reverse('token_obtain')
         assert resolve(url).func.view_class == ObtainTokenApi
 
+    def test_token_refresh_url(self):
+        url = reverse('token_refresh')
+        assert resolve(url).func.view_class == RefreshTokenApi
+
     def test_register_url_accepts_post(self, client):
         url = reverse('register')
         response = client.post(url)
@@ -0,0 +1,150 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from config.db_routers import use_primary
+
+from .models import TokenVersion
+
+# claim holding the user's token version at issue time
+TOKEN_VERSION_CLAIM = 'token_version'
+
+# version of tokens issued before the claim existed
+LEGACY_TOKEN_VERSION = 0
+
+# user claims trusted by `StatelessJWTAuthentication` instead of
+# loading the user row
+USER_CLAIMS = ('username', 'is_staff', 'is_superuser')
+
+# cached version of users that no longer exist or are inactive; no
+# token carries it, so every token of theirs is rejected
+REVOKED = -1
+
+
+def _get_setting(name, default):
+    options = getattr(settings, 'TOKEN_VERSION_CACHE', {}) or {}
+    return options.get(name, default)
+
+
+def _cache():
+    return caches[_get_setting('CACHE', 'default')]
+
+
+def _cache_key(user_id):
+    return f'auth:token-version:{user_id}'
+
+
+def get_token_version(user_id):
+    """
+    Returns the current token version of a user, or `REVOKED`.
+
+    Versions are cached, so checking a token normally costs no query.
+    `cache.add` is used on a miss so a value read before a concurrent
+    `revoke_tokens()` can never overwrite the newer one.
+    """
+    key = _cache_key(user_id)
+    version = _cache().get(key)
+    if version is not None:
+        return version
+
+    # a lagging replica could bring back a revoked version
+    with use_primary():
+        version = User.objects.filter(
+            pk=user_id, is_active=True).values_list(
+            Coalesce('token_version__version', Value(0)), flat=True).first()
+    if version is None:
+        version = REVOKED
+    _cache().add(key, version, _get_setting('TIMEOUT', 3600))
+    return version
+
+
+def is_token_current(token):
+    """
+    Returns whether `token` carries its user's current version, i.e.
+    its user's tokens weren't revoked since it was issued.
+
+    Tokens issued before versions existed have no claim and count as
+    `LEGACY_TOKEN_VERSION`, so deploying versions doesn't log everyone
+    out: they keep working until they expire or are revoked, and
+    refreshing one stamps the version on the tokens it issues.
+    """
+    version = token.get(TOKEN_VERSION_CLAIM, LEGACY_TOKEN_VERSION)
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    return user_id is not None and version == get_token_version(user_id)
+
+
+def forget_token_version(user_id):
+    """
+    Drops the cached version of a user once the current transaction
+    commits, so the next check reads it from the database.
+    """
+    key = _cache_key(user_id)
+    transaction.on_commit(lambda: _cache().delete(key))
+
+
+def revoke_tokens(user):
+    """
+    Invalidates every token issued to `user` so far.
+    """
+    with transaction.atomic():
+        updated = TokenVersion.objects.filter(user=user).update(
+            version=F('version') + 1)
+        if not updated:
+            TokenVersion.objects.get_or_create(
+                user=user, defaults={'version': 1})
+    forget_token_version(user.pk)
+
+
+def issue_token(user, version=None):
+    """
+    Returns a refresh token for `user` carrying the claims needed to
+    authenticate without loading the user; `.access_token` inherits
+    them. Pass `version` when it is already known (0 for a user that
+    was just created) to skip looking it up.
+    """
+    refresh = RefreshToken.for_user(user)
+    for claim in USER_CLAIMS:
+        refresh[claim] = getattr(user, claim)
+    if version is None:
+        version = get_token_version(user.pk)
+    refresh[TOKEN_VERSION_CLAIM] = version
+    return refresh
+
+
+def _blacklist_key(token):
+    return f'auth:blacklist:{token[api_settings.JTI_CLAIM]}'
+
+
+def is_blacklisted(token):
+    return _cache().get(_blacklist_key(token)) is not None
+
+
+def blacklist_token(token):
+    """
+    Blacklists `token` until it expires, in the cache rather than in a
+    table. Returns False if it was already blacklisted, so two requests
+    racing with the same token can't both use it.
+    """
+    remaining = max(1, int(token['exp'] - time.time()))
+    return _cache().add(_blacklist_key(token), 1, remaining)
+
+
+def rotate_refresh_token(refresh):
+    """
+    Turns `refresh` into a new refresh token with the same claims,
+    blacklisting the old one when `BLACKLIST_AFTER_ROTATION` is set.
+    Returns None if the old token was used concurrently.
+    """
+    if api_settings.BLACKLIST_AFTER_ROTATION and not blacklist_token(refresh):
+        return None
+    refresh.set_jti()
+    refresh.set_exp()
+    refresh.set_iat()
+    return refresh
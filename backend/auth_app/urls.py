@@ -1,7 +1,8 @@
 from django.urls import path
-from .views import RegisterUserApi, ObtainTokenApi
+from .views import RegisterUserApi, ObtainTokenApi, RefreshTokenApi
 
 urlpatterns = [
     path('register/', RegisterUserApi.as_view(), name='register'),
     path('token/', ObtainTokenApi.as_view(), name='token_obtain'),
+    path('token/refresh/', RefreshTokenApi.as_view(), name='token_refresh'),
 ]
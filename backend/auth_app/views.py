@@ -1,11 +1,17 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.permissions import AllowAny
-from django.contrib.auth.models import User
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
 
-from .serializers import RegisterSerializer, UserSerializer, TokenSerializer
+from .serializers import (
+    RegisterSerializer,
+    TokenRefreshSerializer,
+    TokenSerializer,
+    UserSerializer,
+)
+from .tokens import issue_token, rotate_refresh_token
 
 
 class RegisterUserApi(APIView):
@@ -22,13 +28,15 @@ class RegisterUserApi(APIView):
             user = serializer.save()
             user_serializer = UserSerializer(user)
 
-            # Generate JWT token
-            refresh = RefreshToken.for_user(user)
+            # Generate JWT token; a new user has no revoked tokens, so
+            # its version is known without reading it back
+            refresh = issue_token(user, version=0)
             token = str(refresh.access_token)
 
             # Prep response data to include JWT token
             response_data = user_serializer.data
             response_data['token'] = token
+            response_data['refresh'] = str(refresh)
 
             return Response(response_data, status=status.HTTP_201_CREATED)
 
@@ -49,11 +57,45 @@ class ObtainTokenApi(APIView):
         if serializer.is_valid():
             user = serializer.validated_data['user']
 
-            # NOTE: JWT tokens are stateless; reusing them requires that they be stored
-            # For simplicity, we'll always issue a new token
-            refresh = RefreshToken.for_user(user)
+            # access tokens are short-lived; clients renew them with the
+            # refresh token instead of sending the password again
+            refresh = issue_token(user)
             token = str(refresh.access_token)
 
-            return Response({'token': token}, status=status.HTTP_200_OK)
+            return Response({'token': token, 'refresh': str(refresh)},
+                            status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class RefreshTokenApi(APIView):
+    """
+    API view to renew an access token with a refresh token,
+    without checking (and hashing) the password again.
+    When rotation is enabled a new refresh token is returned
+    and the old one can not be used again.
+    """
+
+    permission_classes = [AllowAny]
+    # the (possibly expired) access token must not be checked here
+    authentication_classes = []
+
+    def get_authenticate_header(self, request):
+        # answer invalid refresh tokens with 401 rather than 403
+        return f'{api_settings.AUTH_HEADER_TYPES[0]} realm="api"'
+
+    def post(self, request):
+        serializer = TokenRefreshSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        refresh = serializer.validated_data['refresh']
+        response_data = {'token': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            refresh = rotate_refresh_token(refresh)
+            if refresh is None:
+                raise InvalidToken('Token is blacklisted')
+            response_data['refresh'] = str(refresh)
+
+        return Response(response_data, status=status.HTTP_200_OK)
@@ -1,6 +1,19 @@
 from django.contrib import admin
 from .models import BlogPost, Comment
 
+
+class CommentAdmin(admin.ModelAdmin):
+    """
+    Admin for comments. `parent` is only chosen when adding a comment;
+    moving one would leave the thread paths of its replies stale.
+    """
+
+    def get_readonly_fields(self, request, obj=None):
+        if obj is not None:
+            return ('parent',)
+        return ()
+
+
 # Register your models here.
 admin.site.register(BlogPost)
-admin.site.register(Comment)
+admin.site.register(Comment, CommentAdmin)
@@ -0,0 +1,312 @@
+import asyncio
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+
+from config.db_routers import use_primary
+
+from .pagination import BlogPostCursorPagination
+
+
+class ResponseCache:
+    """
+    Versioned cache for rendered response data, backed by Django's
+    cache framework.
+
+    Entries are keyed by the request's path and the query parameters
+    that select the response (`get_key_params()`), so unrelated
+    parameters don't multiply the entries.
+
+    Entries carry tags naming what they were rendered from, and
+    `invalidate_tags()` records when a tag last changed: an entry
+    rendered before one of its tags changed is a miss. Every key also
+    embeds a generation number, so `invalidate()` drops everything with
+    a single atomic increment. Concurrent misses on the same key are
+    collapsed (single-flight): one request recomputes while the others
+    briefly wait for its result.
+
+    Invalidations must reach every process, so the cache has to be
+    shared (Redis, Memcached, database) when running several workers;
+    see `blog.checks`. Entries are rendered from the primary database:
+    a lagging replica read just after an invalidation would store the
+    old rows as fresh.
+
+    Settings are read from `settings.<setting_name>` on every use so
+    they can be overridden per environment and in tests.
+
+    Methods prefixed with `a` are the async counterparts used by async
+    views; they go through the cache's async API and never block the
+    event loop.
+    """
+
+    setting_name = None
+    key_prefix = None
+
+    defaults = {
+        # alias in settings.CACHES
+        'CACHE': 'default',
+        # seconds a cached response is served for
+        'TIMEOUT': 60,
+        # seconds a recomputation may hold the single-flight lock
+        'LOCK_TIMEOUT': 10,
+        # seconds a concurrent miss waits for the recomputation
+        'WAIT_TIMEOUT': 2,
+        'WAIT_INTERVAL': 0.05,
+    }
+
+    def get_setting(self, name):
+        options = getattr(settings, self.setting_name, {}) or {}
+        return options.get(name, self.defaults[name])
+
+    @property
+    def cache(self):
+        return caches[self.get_setting('CACHE')]
+
+    @property
+    def version_key(self):
+        return f'{self.key_prefix}:version'
+
+    def get_version(self):
+        version = self.cache.get(self.version_key)
+        if version is None:
+            self.cache.add(self.version_key, 1, timeout=None)
+            version = self.cache.get(self.version_key, 1)
+        return version
+
+    def get_key_params(self, request):
+        """
+        Returns the query parameters that select the response; all of
+        them by default.
+        """
+        return {name: request.GET.getlist(name) for name in request.GET}
+
+    def _digest(self, request):
+        params = urlencode(sorted(self.get_key_params(request).items()),
+                           doseq=True)
+        source = f'{request.build_absolute_uri(request.path)}?{params}'
+        return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+    def get_key(self, request):
+        return f'{self.key_prefix}:v{self.get_version()}:{self._digest(request)}'
+
+    def tag_key(self, tag):
+        return f'{self.key_prefix}:tag:{tag}'
+
+    def get(self, request):
+        """
+        Returns the cached data for the request, or None on a miss.
+        """
+        data = self._fresh(self.cache.get(self.get_key(request)))
+        self._record('misses' if data is None else 'hits')
+        return data
+
+    def compute(self, request, render, since=None):
+        """
+        Calls `render()` and caches its result, unless a concurrent
+        request is already doing so, in which case its result is used.
+
+        `render()` may return a dict with a `tags` list. `since` is
+        when the data it relies on started to be read (e.g. validators
+        computed before calling this); it defaults to now.
+        """
+        since = time.time() if since is None else since
+        key = self.get_key(request)
+        lock_key = f'{key}:lock'
+        if not self.cache.add(lock_key, 1, self.get_setting('LOCK_TIMEOUT')):
+            data = self._wait_for(key)
+            if data is not None:
+                return data
+            # the other request is slow or failed; don't wait any longer
+            return render()
+
+        try:
+            with use_primary():
+                data = render()
+            self.cache.set(key, self._wrap(data, since),
+                           self.get_setting('TIMEOUT'))
+        finally:
+            self.cache.delete(lock_key)
+        return data
+
+    def invalidate_tags(self, tags):
+        """
+        Turns the entries carrying any of `tags` into misses.
+
+        Each tag records when it was invalidated, for as long as an
+        entry rendered before that can live. Timestamps are compared
+        across processes, so their clocks must agree.
+        """
+        now = time.time()
+        self.cache.set_many({self.tag_key(tag): now for tag in tags},
+                            self.get_setting('TIMEOUT') + 1)
+
+    def invalidate(self):
+        """
+        Moves every key to a new generation.
+        """
+        try:
+            self.cache.incr(self.version_key)
+        except ValueError:
+            # no version yet (or it was evicted): start past the default
+            self.cache.add(self.version_key, 2, timeout=None)
+
+    def stats(self):
+        counts = self.cache.get_many(
+            [self._stat_key('hits'), self._stat_key('misses')])
+        hits = counts.get(self._stat_key('hits'), 0)
+        misses = counts.get(self._stat_key('misses'), 0)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else None,
+        }
+
+    async def aget_version(self):
+        version = await self.cache.aget(self.version_key)
+        if version is None:
+            await self.cache.aadd(self.version_key, 1, timeout=None)
+            version = await self.cache.aget(self.version_key, 1)
+        return version
+
+    async def aget_key(self, request):
+        return (f'{self.key_prefix}:v{await self.aget_version()}:'
+                f'{self._digest(request)}')
+
+    async def aget(self, request):
+        data = await self._afresh(
+            await self.cache.aget(await self.aget_key(request)))
+        await self._arecord('misses' if data is None else 'hits')
+        return data
+
+    async def acompute(self, request, render, since=None):
+        """
+        Async `compute()`; `render` is a coroutine function.
+        """
+        since = time.time() if since is None else since
+        key = await self.aget_key(request)
+        lock_key = f'{key}:lock'
+        if not await self.cache.aadd(
+                lock_key, 1, self.get_setting('LOCK_TIMEOUT')):
+            data = await self._await_for(key)
+            if data is not None:
+                return data
+            return await render()
+
+        try:
+            with use_primary():
+                data = await render()
+            await self.cache.aset(key, self._wrap(data, since),
+                                  self.get_setting('TIMEOUT'))
+        finally:
+            await self.cache.adelete(lock_key)
+        return data
+
+    def _wait_for(self, key):
+        deadline = time.monotonic() + self.get_setting('WAIT_TIMEOUT')
+        interval = self.get_setting('WAIT_INTERVAL')
+        while time.monotonic() < deadline:
+            time.sleep(interval)
+            data = self._fresh(self.cache.get(key))
+            if data is not None:
+                return data
+        return None
+
+    async def _await_for(self, key):
+        deadline = time.monotonic() + self.get_setting('WAIT_TIMEOUT')
+        interval = self.get_setting('WAIT_INTERVAL')
+        while time.monotonic() < deadline:
+            await asyncio.sleep(interval)
+            data = await self._afresh(await self.cache.aget(key))
+            if data is not None:
+                return data
+        return None
+
+    @staticmethod
+    def _wrap(data, since):
+        tags = data.get('tags', ()) if isinstance(data, dict) else ()
+        return {'since': since, 'tags': list(tags), 'data': data}
+
+    @staticmethod
+    def _is_fresh(entry, invalidated):
+        return all(at < entry['since'] for at in invalidated.values())
+
+    def _fresh(self, entry):
+        """
+        Returns the data of a stored entry, or None if it is missing or
+        one of its tags changed after it was rendered.
+        """
+        if entry is None:
+            return None
+        if entry['tags']:
+            invalidated = self.cache.get_many(
+                [self.tag_key(tag) for tag in entry['tags']])
+            if not self._is_fresh(entry, invalidated):
+                return None
+        return entry['data']
+
+    async def _afresh(self, entry):
+        if entry is None:
+            return None
+        if entry['tags']:
+            invalidated = await self.cache.aget_many(
+                [self.tag_key(tag) for tag in entry['tags']])
+            if not self._is_fresh(entry, invalidated):
+                return None
+        return entry['data']
+
+    def _stat_key(self, name):
+        return f'{self.key_prefix}:stats:{name}'
+
+    def _record(self, name):
+        key = self._stat_key(name)
+        self.cache.add(key, 0, timeout=None)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            # evicted between add() and incr(); losing one sample is fine
+            pass
+
+    async def _arecord(self, name):
+        key = self._stat_key(name)
+        await self.cache.aadd(key, 0, timeout=None)
+        try:
+            await self.cache.aincr(key)
+        except ValueError:
+            pass
+
+
+class FeedCache(ResponseCache):
+    """
+    Response cache for the public post feed.
+
+    Feed pages are keyset-paginated, so a page only changes when one of
+    its posts (or the look-ahead row deciding whether there is a next
+    page) changes, or, for first pages, when a post is created. Pages
+    are tagged accordingly (see `BlogpostFeedMixin.get_cache_tags()`).
+    """
+
+    setting_name = 'BLOG_FEED_CACHE'
+    key_prefix = 'blog:feed'
+    pagination_class = BlogPostCursorPagination
+
+    # new posts are the newest, so they only show up on first pages
+    first_page_tag = 'first-page'
+
+    @staticmethod
+    def post_tag(pk):
+        return f'post:{pk}'
+
+    def get_key_params(self, request):
+        paginator = self.pagination_class()
+        return {
+            paginator.cursor_query_param:
+                request.GET.get(paginator.cursor_query_param, ''),
+            paginator.page_size_query_param: paginator.get_page_size(request),
+        }
+
+
+feed_cache = FeedCache()
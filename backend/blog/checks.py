@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+from .cache import feed_cache
+
+# backends holding a separate copy of the cache in every process
+PER_PROCESS_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def _shared_cache_settings():
+    """
+    Yields the settings naming a cache that every worker must see the
+    same copy of, with the alias each one points to.
+    """
+    yield feed_cache.setting_name, feed_cache.get_setting('CACHE')
+    tokens = getattr(settings, 'TOKEN_VERSION_CACHE', {}) or {}
+    yield 'TOKEN_VERSION_CACHE', tokens.get('CACHE', 'default')
+
+
+@register(Tags.caches)
+def check_caches_are_shared(app_configs, **kwargs):
+    """
+    Feed invalidations, token revocations and the blacklist of rotated
+    refresh tokens are written to the cache, so with a per-process
+    cache they only reach the worker that wrote them: the other workers
+    keep serving stale pages, accepting revoked tokens and accepting a
+    replayed refresh token.
+    """
+    workers = getattr(settings, 'WEB_CONCURRENCY', 1)
+    errors = []
+    for setting_name, alias in _shared_cache_settings():
+        backend = settings.CACHES.get(alias, {}).get('BACKEND')
+        if workers > 1 and backend in PER_PROCESS_CACHES:
+            errors.append(Error(
+                f'{setting_name} uses a per-process cache ({backend}) '
+                f'with {workers} workers.',
+                hint=('Point it at a cache shared by all workers (Redis, '
+                      'Memcached or the database cache) or run one '
+                      'worker.'),
+                id='blog.E001',
+            ))
+    return errors
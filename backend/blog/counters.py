@@ -0,0 +1,90 @@
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Now
+from django.utils import timezone
+
+from .models import BlogPost, Comment
+
+
+def adjust_comment_counters(comment, delta):
+    """
+    Adds `delta` to the visible comment count of the comment's post and
+    to the reply count of its parent, as atomic `F()` updates.
+
+    The post's `changed_at` is bumped as well, since its rendered
+    representation (and so its HTTP validators) changed; `updated_at`
+    keeps meaning the post itself was edited.
+    """
+    _adjust(BlogPost.objects.filter(pk=comment.blog_post_id),
+            'comment_count', delta, changed_at=timezone.now())
+    if comment.parent_id:
+        _adjust(Comment.objects.filter(pk=comment.parent_id),
+                'reply_count', delta)
+
+
+def _adjust(queryset, field, delta, **changes):
+    if delta < 0:
+        # never drive a drifted counter below zero
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta}, **changes)
+
+
+def visible_comment_count():
+    """Correlated subquery counting a post's visible comments"""
+    return _count(Comment.objects.filter(
+        blog_post=OuterRef('pk'), is_moderated=False), 'blog_post')
+
+
+def visible_reply_count():
+    """Correlated subquery counting a comment's visible direct replies"""
+    return _count(Comment.objects.filter(
+        parent=OuterRef('pk'), is_moderated=False), 'parent')
+
+
+def _count(queryset, group_by):
+    counts = queryset.order_by().values(group_by).annotate(
+        total=Count('id')).values('total')
+    return Coalesce(Subquery(counts), Value(0))
+
+
+def reconcile_comment_counts(batch_size=1000):
+    """
+    Recomputes `BlogPost.comment_count` and `Comment.reply_count` in
+    primary key batches, only writing rows that drifted.
+
+    Repaired posts get their `changed_at` bumped and their feed pages
+    dropped, like any other counter change. Returns the number of posts
+    and comments repaired.
+    """
+    # signals import this module to keep the counters
+    from .signals import invalidate_feed
+
+    repaired_posts = _reconcile(
+        BlogPost.objects.all(), 'comment_count', visible_comment_count,
+        batch_size, changed_at=Now())
+    if repaired_posts:
+        invalidate_feed(*repaired_posts)
+    repaired_comments = _reconcile(
+        Comment.objects.all(), 'reply_count', visible_reply_count,
+        batch_size)
+    return len(repaired_posts), len(repaired_comments)
+
+
+def _reconcile(queryset, field, expected, batch_size, **changes):
+    """
+    Returns the ids of the rows repaired.
+    """
+    repaired = []
+    last_id = 0
+    while True:
+        ids = list(queryset.filter(id__gt=last_id).order_by(
+            'id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return repaired
+        drifted = list(queryset.filter(id__in=ids).annotate(
+            expected=expected()).exclude(**{field: F('expected')}
+                                         ).values_list('id', flat=True))
+        if drifted:
+            queryset.filter(id__in=drifted).update(
+                **{field: expected()}, **changes)
+            repaired.extend(drifted)
+        last_id = ids[-1]
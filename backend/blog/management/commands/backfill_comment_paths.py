@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.models import Comment
+
+
+class Command(BaseCommand):
+    help = 'Backfills the materialized thread path of existing comments in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of comments updated per transaction.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        updated = 0
+
+        while True:
+            batch = list(
+                Comment.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .only('id', 'parent_id', 'path')[:batch_size]
+            )
+            if not batch:
+                break
+
+            # replies are always created after their parent, so walking
+            # in id order means every parent is already backfilled
+            paths = dict(
+                Comment.objects.filter(
+                    id__in={c.parent_id for c in batch if c.parent_id}
+                ).values_list('id', 'path')
+            )
+            changed = []
+            for comment in batch:
+                if comment.parent_id:
+                    parent = Comment(
+                        id=comment.parent_id, path=paths[comment.parent_id])
+                    path = parent.subtree_path
+                else:
+                    path = ''
+                paths[comment.id] = path
+                if comment.path != path:
+                    comment.path = path
+                    changed.append(comment)
+
+            with transaction.atomic():
+                Comment.objects.bulk_update(changed, ['path'])
+
+            updated += len(changed)
+            last_id = batch[-1].id
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Backfilled thread paths for {updated} comments.'))
@@ -0,0 +1,48 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.export import export_records, gzip_stream, ndjson_stream, parse_since
+
+
+class Command(BaseCommand):
+    help = 'Streams every blog post and comment as NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', '-o',
+            help='File to write to. Defaults to standard output.')
+        parser.add_argument(
+            '--since',
+            help='Only export rows changed at or after this ISO 8601 datetime.')
+        parser.add_argument(
+            '--gzip', action='store_true',
+            help='Compress the output with gzip.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Number of rows fetched from the database at a time.')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = parse_since(options['since'])
+            except ValueError:
+                raise CommandError(f"Invalid --since datetime: {options['since']}")
+
+        stream = ndjson_stream(
+            export_records(since=since, chunk_size=options['chunk_size']))
+        if options['gzip']:
+            stream = gzip_stream(stream)
+
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                self._write(stream, output)
+        else:
+            self._write(stream, sys.stdout.buffer)
+
+    @staticmethod
+    def _write(stream, output):
+        for chunk in stream:
+            output.write(chunk)
+        output.flush()
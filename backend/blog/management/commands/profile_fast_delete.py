@@ -0,0 +1,66 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.fast_delete import fast_delete_posts
+from blog.models import BlogPost, Comment
+
+
+class Command(BaseCommand):
+    help = ('Times deleting one post with a large comment thread through '
+            'the ORM collector and through the fast path. Every run is '
+            'rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--comments', type=int, default=100000,
+            help='Comments on the post.')
+        parser.add_argument(
+            '--depth', type=int, default=10,
+            help='Levels of the thread; comments are spread evenly.')
+
+    def handle(self, *args, **options):
+        strategies = {
+            'ORM collector': lambda post: BlogPost.objects.filter(
+                pk=post.pk).delete(),
+            'fast path': lambda post: fast_delete_posts(
+                BlogPost.objects.filter(pk=post.pk)),
+        }
+        for name, delete in strategies.items():
+            with transaction.atomic():
+                post = self.build_thread(options['comments'], options['depth'])
+                start = time.perf_counter()
+                delete(post)
+                elapsed = time.perf_counter() - start
+                transaction.set_rollback(True)
+            self.stdout.write(
+                f'{name}: {elapsed * 1000:.0f}ms for '
+                f'{options["comments"]} comments')
+
+    def build_thread(self, comments, depth):
+        author, _ = User.objects.get_or_create(
+            username='profile-fast-delete', defaults={'password': '!'})
+        post = BlogPost.objects.create(
+            title='Profile', content='Profile', author=author,
+            comment_count=comments)
+
+        per_level = max(1, comments // depth)
+        parents = [None]
+        created = 0
+        while created < comments:
+            size = min(per_level, comments - created)
+            level = []
+            for i in range(size):
+                parent = parents[i % len(parents)]
+                level.append(Comment(
+                    blog_post=post, author=author, content='Profile',
+                    parent=parent,
+                    path=parent.subtree_path if parent else ''))
+            # returns primary keys, which the next level's paths need
+            level = Comment.objects.bulk_create(level, batch_size=2000)
+            parents = level
+            created += size
+
+        return post
@@ -0,0 +1,156 @@
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from config.sqlite import production_options
+
+
+class Profile:
+    """
+    How connections of a database profile are opened and used, as
+    Django does it.
+    """
+
+    def __init__(self, name, options, reuse_connections):
+        self.name = name
+        self.timeout = options.get('timeout', 5)
+        self.init_commands = [
+            command.strip()
+            for command in options.get('init_command', '').split(';')
+            if command.strip()
+        ]
+        self.begin = f'BEGIN {options.get("transaction_mode") or ""}'.strip()
+        # CONN_MAX_AGE > 0 keeps a connection per thread; 0 opens one
+        # per request
+        self.reuse_connections = reuse_connections
+
+    def connect(self, path):
+        connection = sqlite3.connect(
+            path, timeout=self.timeout, isolation_level=None,
+            check_same_thread=False)
+        for command in self.init_commands:
+            connection.execute(command)
+        return connection
+
+
+PROFILES = [
+    Profile('development', {}, reuse_connections=False),
+    Profile('production', production_options(), reuse_connections=True),
+]
+
+
+class Command(BaseCommand):
+    help = ('Runs concurrent feed reads and comment writes against scratch '
+            'SQLite databases with the development and production profiles, '
+            'reporting throughput and "database is locked" errors.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seconds', type=float, default=5,
+            help='Duration of the run for each profile.')
+        parser.add_argument(
+            '--readers', type=int, default=8,
+            help='Threads reading the feed.')
+        parser.add_argument(
+            '--writers', type=int, default=4,
+            help='Threads adding comments.')
+
+    def handle(self, *args, **options):
+        for profile in PROFILES:
+            with tempfile.TemporaryDirectory() as directory:
+                path = str(Path(directory) / f'{profile.name}.sqlite3')
+                self.create_schema(profile, path)
+                results = self.run(profile, path, options)
+            self.report(profile, results, options['seconds'])
+
+    def create_schema(self, profile, path):
+        connection = profile.connect(path)
+        connection.executescript("""
+            CREATE TABLE post (
+                id INTEGER PRIMARY KEY, title TEXT, comment_count INTEGER);
+            CREATE TABLE comment (
+                id INTEGER PRIMARY KEY, post_id INTEGER, content TEXT);
+        """)
+        connection.executemany(
+            'INSERT INTO post (title, comment_count) VALUES (?, 0)',
+            [(f'post {i}',) for i in range(1000)])
+        connection.close()
+
+    def run(self, profile, path, options):
+        results = {'read': [0, 0], 'write': [0, 0]}
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['seconds']
+
+        def read(connection, i):
+            connection.execute(
+                'SELECT id, title, comment_count FROM post '
+                'ORDER BY id DESC LIMIT 20').fetchall()
+
+        def write(connection, i):
+            # read-then-write, like a comment save updating counters
+            post_id = i % 1000 + 1
+            connection.execute(profile.begin)
+            try:
+                connection.execute(
+                    'SELECT comment_count FROM post WHERE id = ?',
+                    (post_id,)).fetchone()
+                connection.execute(
+                    'INSERT INTO comment (post_id, content) VALUES (?, ?)',
+                    (post_id, 'benchmark'))
+                connection.execute(
+                    'UPDATE post SET comment_count = comment_count + 1 '
+                    'WHERE id = ?', (post_id,))
+                connection.execute('COMMIT')
+            except sqlite3.OperationalError:
+                connection.execute('ROLLBACK')
+                raise
+
+        def worker(kind, operation):
+            done = failed = i = 0
+            connection = None
+            while time.monotonic() < deadline:
+                i += 1
+                try:
+                    if connection is None:
+                        connection = profile.connect(path)
+                    operation(connection, i)
+                    done += 1
+                except sqlite3.OperationalError as exc:
+                    if 'locked' not in str(exc) and 'busy' not in str(exc):
+                        raise
+                    failed += 1
+                finally:
+                    if connection is not None and not profile.reuse_connections:
+                        connection.close()
+                        connection = None
+            if connection is not None:
+                connection.close()
+            with lock:
+                results[kind][0] += done
+                results[kind][1] += failed
+
+        threads = [
+            threading.Thread(target=worker, args=('read', read))
+            for _ in range(options['readers'])
+        ] + [
+            threading.Thread(target=worker, args=('write', write))
+            for _ in range(options['writers'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def report(self, profile, results, seconds):
+        parts = []
+        for kind, (done, failed) in results.items():
+            attempts = done + failed
+            rate = failed / attempts * 100 if attempts else 0
+            parts.append(f'{done / seconds:.0f} {kind}s/s, '
+                         f'{rate:.1f}% locked')
+        self.stdout.write(f'{profile.name}: {"; ".join(parts)}')
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from blog.views import BlogpostListApi
+from config.throttling import ScopedTokenBucketThrottle
+
+
+class Command(BaseCommand):
+    help = ('Measures the time the post feed throttle adds to a request, '
+            'against the configured throttle cache.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=10000,
+            help='Throttle checks to time.')
+        parser.add_argument(
+            '--clients', type=int, default=100,
+            help='Distinct client IP addresses to spread the checks over.')
+        parser.add_argument(
+            '--budget-us', type=float, default=100,
+            help='Acceptable time per check, in microseconds.')
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        view = BlogpostListApi()
+        # anonymous requests, so buckets are keyed by IP address
+        requests = [
+            Request(factory.get('/', REMOTE_ADDR=f'10.0.{i // 256}.{i % 256}'))
+            for i in range(options['clients'])
+        ]
+
+        total = options['requests']
+        throttled = 0
+        start = time.perf_counter()
+        for i in range(total):
+            if not ScopedTokenBucketThrottle().allow_request(
+                    requests[i % len(requests)], view):
+                throttled += 1
+        per_request = (time.perf_counter() - start) / total * 1_000_000
+
+        summary = (f'{total} checks over {len(requests)} clients: '
+                   f'{per_request:.1f}us per request, {throttled} throttled.')
+        if per_request <= options['budget_us']:
+            self.stdout.write(self.style.SUCCESS(summary))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f'{summary} Over the {options["budget_us"]:g}us budget.'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = ('Recreates the post search index and its sync triggers, then '
+            'repopulates it from the posts table.')
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        with transaction.atomic():
+            backend.install()
+            backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt the search index with {type(backend).__name__}.'))
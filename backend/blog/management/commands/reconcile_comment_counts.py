@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from blog.counters import reconcile_comment_counts
+
+
+class Command(BaseCommand):
+    help = 'Repairs drifted comment and reply counters in bulk.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of rows checked per query.')
+
+    def handle(self, *args, **options):
+        posts, comments = reconcile_comment_counts(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Repaired counters on {posts} posts and {comments} comments.'))
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.4 on 2026-10-18 18:46
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_counters(apps, schema_editor):
+    BlogPost = apps.get_model('blog', 'BlogPost')
+    Comment = apps.get_model('blog', 'Comment')
+
+    def visible(**lookup):
+        counts = Comment.objects.filter(is_moderated=False, **lookup).order_by(
+        ).values(*lookup).annotate(total=Count('id')).values('total')
+        return Coalesce(Subquery(counts), Value(0))
+
+    BlogPost.objects.update(comment_count=visible(blog_post=OuterRef('pk')))
+    Comment.objects.update(reply_count=visible(parent=OuterRef('pk')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_comment_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
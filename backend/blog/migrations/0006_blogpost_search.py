@@ -0,0 +1,30 @@
+from django.db import migrations
+
+from blog.search import FTS5_CREATE_SQL, FTS5_DROP_SQL, FTS5_REBUILD_SQL
+
+# Full-text index for blog.search.SQLiteFTS5Backend. Other databases get
+# their index from their own search backend, so this is a no-op there.
+
+CREATE_SQL = FTS5_CREATE_SQL + [FTS5_REBUILD_SQL]
+
+DROP_SQL = FTS5_DROP_SQL
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_blog_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(CREATE_SQL), run(DROP_SQL)),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:01
+
+from importlib import import_module
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+# SQLite adds the column by rebuilding the table, which drops the
+# full-text triggers of 0006; they are created again afterwards
+search = import_module('blog.migrations.0006_blogpost_search')
+
+
+def populate_changed_at(apps, schema_editor):
+    BlogPost = apps.get_model('blog', 'BlogPost')
+    BlogPost.objects.update(changed_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_blogpost_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='blogpost',
+            name='blogpost_updated_idx',
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='changed_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(
+            search.run(search.CREATE_SQL), migrations.RunPython.noop),
+        migrations.RunPython(populate_changed_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['changed_at'], name='blogpost_changed_idx'),
+        ),
+    ]
@@ -8,27 +8,162 @@ class BlogPost(models.Model):
     """Model for blog post"""
     title = models.CharField(max_length=200)
     content = models.TextField()
+    # indexed by `blogpost_author_idx`
     author = models.ForeignKey(
-        User, on_delete=models.CASCADE, related_name='blog_posts')
+        User, on_delete=models.CASCADE, related_name='blog_posts',
+        db_index=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     allow_comments = models.BooleanField(default=True)
+    # number of visible (not moderated) comments, kept by blog.counters
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    # last change of anything the post is rendered with: edits, and
+    # counter updates, which leave `updated_at` alone
+    changed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # the feed, newest first, and its keyset cursor
+            models.Index(fields=['-created_at', '-id'],
+                         name='blogpost_feed_idx'),
+            # feed validators (max changed_at) and incremental exports
+            models.Index(fields=['changed_at'], name='blogpost_changed_idx'),
+            # a user's posts, newest first
+            models.Index(fields=['author', '-created_at'],
+                         name='blogpost_author_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
 
+# Width of one zero-padded comment id in `Comment.path`
+PATH_SEGMENT_WIDTH = 12
+
+
+class CommentQuerySet(models.QuerySet):
+    """QuerySet for comments that understands the thread path index"""
+
+    def subtree(self, comment):
+        """
+        All replies below `comment`, at any depth, as a single
+        range scan over the `path` index.
+        """
+        return self.subtrees([comment])
+
+    def subtrees(self, comments):
+        """
+        All replies below any of `comments`, one range of the `path`
+        index per comment.
+        """
+        ranges = models.Q()
+        for comment in comments:
+            lower = comment.subtree_path
+            # '0' sorts right after '/', so this bound only admits
+            # paths that start with `lower`
+            upper = lower[:-1] + '0'
+            ranges |= models.Q(path__gte=lower, path__lt=upper)
+        return self.filter(ranges) if ranges else self.none()
+
+    def ancestors(self, comment, include_self=False):
+        """
+        The chain of comments above `comment`, root first, ending with
+        `comment` itself when `include_self` is set.
+        """
+        ids = comment.ancestor_ids
+        if include_self:
+            ids.append(comment.pk)
+        return self.filter(pk__in=ids).order_by('path')
+
+
 class Comment(models.Model):
-    """Model for a comment"""
+    """
+    Model for a comment
+
+    `path` is a materialized path index holding the zero-padded ids
+    of every ancestor, root first, each followed by a `/`. It is set
+    once when the comment is created; `parent` can't change after
+    that and replies are deleted together with their parent, so it
+    never goes stale.
+    """
+    # foreign keys are covered by the composite indexes in Meta
     blog_post = models.ForeignKey(
-        BlogPost, on_delete=models.CASCADE, related_name='comments')
+        BlogPost, on_delete=models.CASCADE, related_name='comments',
+        db_index=False)
     author = models.ForeignKey(
-        User, on_delete=models.CASCADE, related_name='comments')
+        User, on_delete=models.CASCADE, related_name='comments',
+        db_index=False)
     content = models.TextField()
     parent = models.ForeignKey(
-        'self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
+        'self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies',
+        db_index=False)
     created_at = models.DateTimeField(auto_now_add=True)
     is_moderated = models.BooleanField(default=False)
+    path = models.CharField(
+        max_length=1024, default='', blank=True, editable=False, db_index=True)
+    # number of visible (not moderated) direct replies, kept by blog.counters
+    reply_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = CommentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # comments for a post ordered by time, counters per post
+            models.Index(fields=['blog_post', 'created_at'],
+                         name='comment_post_time_idx'),
+            # first level of a post's thread
+            models.Index(fields=['blog_post', 'created_at', 'id'],
+                         condition=models.Q(parent__isnull=True),
+                         name='comment_thread_root_idx'),
+            # replies of a comment, oldest first
+            models.Index(fields=['parent', 'created_at', 'id'],
+                         name='comment_replies_idx'),
+            # moderation queue: only the comments still visible
+            models.Index(fields=['created_at'],
+                         condition=models.Q(is_moderated=False),
+                         name='comment_unmoderated_idx'),
+            # a user's comments, newest first
+            models.Index(fields=['author', '-created_at'],
+                         name='comment_author_idx'),
+            # incremental exports, moderated comments included
+            models.Index(fields=['created_at', 'id'],
+                         name='comment_created_idx'),
+        ]
 
     def __str__(self):
         return f'Comment by {self.author} on {self.blog_post}'
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remembered so moderation changes can be counted on save
+        if 'is_moderated' in field_names:
+            instance._loaded_is_moderated = instance.is_moderated
+        # remembered so a comment can't be moved under another parent,
+        # which would leave the paths of its subtree stale
+        if 'parent_id' in field_names:
+            instance._loaded_parent_id = instance.parent_id
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.path = self.parent.subtree_path if self.parent_id else ''
+        elif self.parent_id != getattr(
+                self, '_loaded_parent_id', self.parent_id):
+            raise ValueError('The parent of a comment cannot be changed.')
+        super().save(*args, **kwargs)
+        self._loaded_parent_id = self.parent_id
+
+    @property
+    def subtree_path(self):
+        """Path prefix shared by this comment's replies"""
+        return f'{self.path}{self.pk:0{PATH_SEGMENT_WIDTH}d}/'
+
+    @property
+    def ancestor_ids(self):
+        return [int(segment) for segment in self.path.split('/') if segment]
+
+    @property
+    def depth(self):
+        """Number of ancestors; top level comments have depth 0"""
+        return len(self.path) // (PATH_SEGMENT_WIDTH + 1)
@@ -0,0 +1,179 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over a fixed, unique ordering.
+
+    The cursor is an opaque token holding the ordering values of the
+    last row of the previous page, so each page is a single indexed
+    range query with no `OFFSET` and no `COUNT(*)`, no matter how deep
+    the client pages.
+    """
+
+    # fields the rows are ordered by; the last one must be unique
+    ordering = ('-id',)
+
+    # number of objects per page
+    page_size = 10
+
+    # query parameter for retrieving the next page
+    cursor_query_param = 'cursor'
+
+    # query parameter for overriding the page size
+    page_size_query_param = 'page_size'
+
+    # Maximum number of objects that can be retrieved per page
+    max_page_size = 100
+
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        value = request.GET.get(self.page_size_query_param)
+        if value is None:
+            return self.page_size
+        try:
+            page_size = int(value)
+        except ValueError:
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def encode_cursor(self, obj):
+        values = [
+            self._field_value(obj, name.lstrip('-')) for name in self.ordering
+        ]
+        raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request, model):
+        token = request.GET.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded))
+            # every ordering column is NOT NULL, so a null can only come
+            # from a forged cursor and would not make a valid seek
+            if (not isinstance(values, list)
+                    or len(values) != len(self.ordering)
+                    or any(value is None for value in values)):
+                raise ValueError
+            return [
+                model._meta.get_field(name.lstrip('-')).to_python(value)
+                for name, value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_page_queryset(self, queryset, request):
+        """
+        Returns the (unevaluated) queryset for the requested page.
+
+        One extra row is fetched so the presence of a next page can be
+        detected without counting.
+        """
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        position = self.decode_cursor(request, queryset.model)
+
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self._seek_filter(position))
+        return queryset[:self.page_size_value + 1]
+
+    def paginate_rows(self, rows):
+        """
+        Trims the look-ahead row and records the cursor for the next page.
+        """
+        rows = list(rows)
+        self.has_next = len(rows) > self.page_size_value
+        rows = rows[:self.page_size_value]
+        self.next_cursor = (
+            self.encode_cursor(rows[-1]) if self.has_next and rows else None
+        )
+        return rows
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.paginate_rows(self.get_page_queryset(queryset, request))
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_first_link(self):
+        url = self.request.build_absolute_uri()
+        return remove_query_param(url, self.cursor_query_param)
+
+    def get_paginated_data(self, data):
+        return OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ])
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                },
+                'results': schema,
+            },
+        }
+
+    def _seek_filter(self, position):
+        # (a, b) > (x, y)  ==  a > x OR (a = x AND b > y)
+        condition = Q()
+        equal = Q()
+        for name, value in zip(self.ordering, position):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        return condition
+
+    @staticmethod
+    def _field_value(obj, name):
+        value = getattr(obj, name)
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return value
+
+
+class BlogPostCursorPagination(KeysetPagination):
+    """
+    Pagination class for the public post feed, newest posts first
+    """
+
+    ordering = ('-created_at', '-id')
+    page_size = 10
+    max_page_size = 50
+
+
+class CommentThreadPagination(KeysetPagination):
+    """
+    Pagination class for one level of a comment thread, oldest first
+    """
+
+    ordering = ('created_at', 'id')
+    page_size = 20
+    max_page_size = 100
@@ -0,0 +1,105 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def plan_queryset(queryset, serializer):
+    """
+    Adds the `select_related` / `Prefetch` calls a serializer needs so that
+    rendering any number of objects costs a fixed number of queries.
+
+    The plan is derived from the serializer's declared fields:
+
+    * dotted sources such as `author.username` follow forward relations
+      with `select_related`
+    * nested `many=True` serializers become a `Prefetch` whose queryset
+      is itself planned from the nested serializer
+    * `PrimaryKeyRelatedField(many=True)` becomes a `Prefetch` that only
+      loads the primary key and the column joining it back
+
+    `serializer` may be a serializer class or instance.
+    """
+    if isinstance(serializer, type):
+        serializer = serializer()
+    select, prefetch = _plan(queryset.model, serializer, prefix='')
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+def _plan(model, serializer, prefix):
+    select = []
+    prefetch = []
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        # a nested `many=True` serializer is wrapped in a ListSerializer
+        child = getattr(field, 'child', None) or getattr(
+            field, 'child_relation', None)
+        path = field.source.split('.')
+        relations = _relation_chain(model, path)
+        if not relations:
+            continue
+
+        last = relations[-1]
+        lookup = prefix + '__'.join(path[:len(relations)])
+
+        if last.one_to_many or last.many_to_many:
+            # everything before the multi-valued hop can be joined
+            if len(relations) > 1:
+                select.append(prefix + '__'.join(path[:len(relations) - 1]))
+            prefetch.append(Prefetch(
+                lookup, queryset=_related_queryset(last, child)))
+        elif isinstance(field, serializers.BaseSerializer):
+            # nested single object: join it and plan its own fields
+            select.append(lookup)
+            nested_select, nested_prefetch = _plan(
+                last.related_model, field, prefix=lookup + '__')
+            select.extend(nested_select)
+            prefetch.extend(nested_prefetch)
+        elif len(relations) < len(path):
+            # a dotted source reads an attribute on the related object
+            select.append(lookup)
+        # a bare foreign key renders from its `<name>_id` column
+
+    return select, prefetch
+
+
+def _relation_chain(model, path):
+    """
+    Returns the relation fields walked by a dotted source, stopping at
+    the first attribute that is not a relation.
+    """
+    relations = []
+    for name in path:
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            break
+        if not field.is_relation:
+            break
+        relations.append(field)
+        if field.one_to_many or field.many_to_many:
+            break
+        model = field.related_model
+    return relations
+
+
+def _related_queryset(relation, child):
+    related_model = relation.related_model
+    queryset = related_model._default_manager.all()
+
+    if isinstance(child, serializers.BaseSerializer):
+        return plan_queryset(queryset, child)
+
+    if isinstance(child, serializers.PrimaryKeyRelatedField):
+        columns = [related_model._meta.pk.attname]
+        if relation.one_to_many:
+            # the reverse foreign key is needed to attach rows to parents
+            columns.append(relation.field.attname)
+        return queryset.only(*columns)
+
+    return queryset
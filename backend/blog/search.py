@@ -0,0 +1,171 @@
+import html
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+# markers placed around matches by the database; they are swapped for
+# <mark> tags after the rest of the snippet has been HTML escaped
+_MATCH_START = '\ue000'
+_MATCH_END = '\ue001'
+
+# full-text index of `SQLiteFTS5Backend`, also created by migration 0006;
+# plain names rather than model lookups so the migration can import them
+FTS5_TABLE = 'blog_blogpost_fts'
+_POSTS_TABLE = 'blog_blogpost'
+
+FTS5_CREATE_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS5_TABLE} USING fts5(
+        title, content,
+        content='{_POSTS_TABLE}', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS5_TABLE}_insert
+    AFTER INSERT ON {_POSTS_TABLE}
+    BEGIN
+        INSERT INTO {FTS5_TABLE}(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS5_TABLE}_delete
+    AFTER DELETE ON {_POSTS_TABLE}
+    BEGIN
+        INSERT INTO {FTS5_TABLE}({FTS5_TABLE}, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS5_TABLE}_update
+    AFTER UPDATE OF title, content ON {_POSTS_TABLE}
+    BEGIN
+        INSERT INTO {FTS5_TABLE}({FTS5_TABLE}, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO {FTS5_TABLE}(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+]
+
+FTS5_REBUILD_SQL = (
+    f"INSERT INTO {FTS5_TABLE}({FTS5_TABLE}) VALUES ('rebuild')")
+
+FTS5_DROP_SQL = [
+    f'DROP TRIGGER IF EXISTS {FTS5_TABLE}_insert',
+    f'DROP TRIGGER IF EXISTS {FTS5_TABLE}_delete',
+    f'DROP TRIGGER IF EXISTS {FTS5_TABLE}_update',
+    f'DROP TABLE IF EXISTS {FTS5_TABLE}',
+]
+
+
+@dataclass
+class SearchHit:
+    post_id: int
+    rank: float
+    snippet: str
+
+
+class SearchBackend:
+    """
+    Base class for full-text search over blog posts.
+
+    A backend mirrors `BlogPost.title` and `BlogPost.content` into an
+    index the database can search, keeps it in sync and returns ranked
+    hits with a highlighted snippet of the content.
+    """
+
+    def install(self):
+        """Creates the index and whatever keeps it in sync."""
+        raise NotImplementedError
+
+    def rebuild(self):
+        """Repopulates the index from the posts table."""
+        raise NotImplementedError
+
+    def search(self, query, limit):
+        """Returns up to `limit` `SearchHit`s, best first."""
+        raise NotImplementedError
+
+    @staticmethod
+    def highlight(snippet):
+        escaped = html.escape(snippet)
+        return escaped.replace(_MATCH_START, '<mark>').replace(
+            _MATCH_END, '</mark>')
+
+
+class SQLiteFTS5Backend(SearchBackend):
+    """
+    Search backend using an SQLite FTS5 external content table.
+
+    The table stores only the index; the text itself stays in
+    `blog_blogpost`, and triggers on that table keep the index in
+    sync, including for `bulk_create` and raw SQL writes that send no
+    signals. Migrations that rebuild `blog_blogpost` on SQLite drop
+    its triggers, so run `rebuild_search_index` after them.
+    """
+
+    table = FTS5_TABLE
+
+    # relative weight of a match in the title vs the content
+    title_weight = 10.0
+    content_weight = 1.0
+
+    # number of tokens in a snippet
+    snippet_tokens = 24
+
+    def install(self):
+        with connection.cursor() as cursor:
+            for statement in self.install_statements():
+                cursor.execute(statement)
+
+    def install_statements(self):
+        return FTS5_CREATE_SQL
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(FTS5_REBUILD_SQL)
+
+    def search(self, query, limit):
+        match = self.to_match_expression(query)
+        if not match:
+            return []
+
+        sql = f"""
+            SELECT rowid,
+                   bm25({self.table}, %s, %s) AS rank,
+                   snippet({self.table}, 1, %s, %s, '…', %s)
+            FROM {self.table}
+            WHERE {self.table} MATCH %s
+            ORDER BY rank
+            LIMIT %s
+        """
+        params = [self.title_weight, self.content_weight,
+                  _MATCH_START, _MATCH_END, self.snippet_tokens,
+                  match, limit]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        return [
+            SearchHit(post_id=post_id, rank=rank,
+                      snippet=self.highlight(snippet))
+            for post_id, rank, snippet in rows
+        ]
+
+    @staticmethod
+    def to_match_expression(query):
+        """
+        Turns free text into an FTS5 query matching every word, so user
+        input can never be parsed as FTS5 syntax.
+        """
+        terms = query.split()
+        return ' '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+def get_search_backend():
+    path = getattr(settings, 'BLOG_SEARCH_BACKEND',
+                   'blog.search.SQLiteFTS5Backend')
+    return import_string(path)()
@@ -12,7 +12,7 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ['id', 'author', 'content', 'parent',
-                  'created_at', 'is_moderated']
+                  'created_at', 'is_moderated', 'reply_count']
 
 
 class BlogPostSerializer(serializers.ModelSerializer):
@@ -23,5 +23,43 @@ class BlogPostSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = BlogPost
-        fields = ['id', 'title', 'content', 'author',
-                  'allow_comments', 'created_at', 'updated_at', 'comments']
+        fields = ['id', 'title', 'content', 'author', 'allow_comments',
+                  'created_at', 'updated_at', 'comment_count', 'comments']
+
+
+class CommentThreadSerializer(CommentSerializer):
+    """Serializer for a Comment and its nested replies"""
+
+    replies = serializers.SerializerMethodField()
+    has_more_replies = serializers.BooleanField(read_only=True)
+
+    class Meta(CommentSerializer.Meta):
+        fields = CommentSerializer.Meta.fields + ['replies', 'has_more_replies']
+
+    def get_replies(self, obj):
+        return CommentThreadSerializer(
+            obj.thread_replies, many=True, context=self.context).data
+
+
+class PrefetchedAuthorField(serializers.PrimaryKeyRelatedField):
+    """
+    Author field resolved from a `{pk: user}` map passed in the
+    serializer context as `authors`, so validating many rows does not
+    cost one query per row.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('queryset', User.objects.all())
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        user = self.context['authors'].get(pk)
+        if user is None:
+            self.fail('does_not_exist', pk_value=data)
+        return user
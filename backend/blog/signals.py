@@ -0,0 +1,66 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import feed_cache
+from .counters import adjust_comment_counters
+from .models import BlogPost, Comment
+
+
+def invalidate_feed(*post_ids, created=False):
+    """
+    Drops the cached feed pages showing `post_ids`, and the first pages
+    if posts were `created`, once the current transaction commits; with
+    neither, drops every page (for bulk writes).
+    """
+    tags = [feed_cache.post_tag(pk) for pk in post_ids]
+    if created:
+        tags.append(feed_cache.first_page_tag)
+    if tags:
+        transaction.on_commit(lambda: feed_cache.invalidate_tags(tags))
+    else:
+        transaction.on_commit(feed_cache.invalidate)
+
+
+@receiver(post_save, sender=BlogPost)
+def invalidate_feed_for_saved_post(sender, instance, created, **kwargs):
+    invalidate_feed(instance.pk, created=created)
+
+
+@receiver(post_delete, sender=BlogPost)
+def invalidate_feed_for_deleted_post(sender, instance, **kwargs):
+    invalidate_feed(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, raw, **kwargs):
+    """
+    Counts new visible comments and moderation changes
+    """
+    if raw:
+        return
+    previous = None if created else getattr(
+        instance, '_loaded_is_moderated', instance.is_moderated)
+    instance._loaded_is_moderated = instance.is_moderated
+
+    if created:
+        delta = 0 if instance.is_moderated else 1
+    elif previous != instance.is_moderated:
+        delta = -1 if instance.is_moderated else 1
+    else:
+        return
+    if delta:
+        adjust_comment_counters(instance, delta)
+        # the feed only shows comments through `comment_count`
+        invalidate_feed(instance.blog_post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_deleted_comment(sender, instance, **kwargs):
+    """
+    Uncounts deleted visible comments, including the ones removed
+    by cascades from posts, parent comments and users
+    """
+    if not instance.is_moderated:
+        adjust_comment_counters(instance, -1)
+        invalidate_feed(instance.blog_post_id)
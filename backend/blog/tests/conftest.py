@@ -0,0 +1,61 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from blog.models import BlogPost, Comment
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    Fixture to start every test with an empty cache, since
+    cached responses outlive the test database transaction.
+    """
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def api_client() -> APIClient:
+    """
+    Fixture to provide an instance of
+    Django Rest Framework's `APIClient`.
+    """
+    return APIClient()
+
+
+@pytest.fixture
+def author(db) -> User:
+    """
+    Fixture to provide a user that owns posts and comments.
+    Uses a pre-hashed password to keep test setup fast.
+    """
+    return User.objects.create(
+        username='author', email='author@example.com', password='!')
+
+
+@pytest.fixture
+def create_post(author):
+    """
+    Fixture to create a blog post
+    """
+    def make_post(**kwargs):
+        kwargs.setdefault('title', 'A post')
+        kwargs.setdefault('content', 'Some content')
+        kwargs.setdefault('author', author)
+        return BlogPost.objects.create(**kwargs)
+    return make_post
+
+
+@pytest.fixture
+def create_comment(author):
+    """
+    Fixture to create a comment on a blog post
+    """
+    def make_comment(blog_post, **kwargs):
+        kwargs.setdefault('content', 'A comment')
+        kwargs.setdefault('author', author)
+        return Comment.objects.create(blog_post=blog_post, **kwargs)
+    return make_comment
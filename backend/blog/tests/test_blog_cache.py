@@ -0,0 +1,160 @@
+import time
+
+import pytest
+from django.contrib.auth.models import User
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+
+from blog.cache import feed_cache
+from blog.checks import check_caches_are_shared
+
+
+@pytest.mark.django_db
+class TestFeedCache:
+    """
+    Tests for the response cache in front of the post feed
+    """
+
+    def test_second_request_is_served_from_cache(self, api_client,
+                                                 create_post,
+                                                 django_assert_num_queries):
+        create_post()
+        url = reverse('post-list')
+
+        first = api_client.get(url)
+        with django_assert_num_queries(0):
+            second = api_client.get(url)
+
+        assert first['X-Cache'] == 'MISS'
+        assert second['X-Cache'] == 'HIT'
+        assert second.data == first.data
+
+    def test_pages_are_cached_separately(self, api_client, create_post):
+        for i in range(3):
+            create_post(title=f'post {i}')
+        url = reverse('post-list')
+
+        first_page = api_client.get(url, {'page_size': 2})
+        second_page = api_client.get(first_page.data['next'])
+
+        assert second_page['X-Cache'] == 'MISS'
+        assert len(second_page.data['results']) == 1
+
+    def test_new_post_invalidates_feed(self, api_client, create_post,
+                                       django_capture_on_commit_callbacks):
+        url = reverse('post-list')
+        api_client.get(url)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            create_post(title='fresh')
+        response = api_client.get(url)
+
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['results'][0]['title'] == 'fresh'
+
+    def test_visible_comment_invalidates_feed(self, api_client, create_post,
+                                              create_comment,
+                                              django_capture_on_commit_callbacks):
+        post = create_post()
+        url = reverse('post-list')
+        api_client.get(url)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            create_comment(post)
+        response = api_client.get(url)
+
+        assert response.data['results'][0]['comment_count'] == 1
+
+    def test_moderated_comment_keeps_feed_cached(self, api_client, create_post,
+                                                 create_comment,
+                                                 django_capture_on_commit_callbacks):
+        post = create_post()
+        url = reverse('post-list')
+        api_client.get(url)
+
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            create_comment(post, is_moderated=True)
+
+        assert callbacks == []
+        assert api_client.get(url)['X-Cache'] == 'HIT'
+
+    def test_changes_only_invalidate_the_pages_showing_them(
+            self, api_client, create_post, create_comment,
+            django_capture_on_commit_callbacks):
+        posts = [create_post(title=f'post {i}') for i in range(5)]
+        url = reverse('post-list')
+        first_page = api_client.get(url, {'page_size': 2})
+        last_page_url = api_client.get(first_page.data['next']).data['next']
+        api_client.get(last_page_url)
+
+        # the oldest post is only on the last page
+        with django_capture_on_commit_callbacks(execute=True):
+            create_comment(posts[0])
+
+        assert api_client.get(url, {'page_size': 2})['X-Cache'] == 'HIT'
+        last_page = api_client.get(last_page_url)
+        assert last_page['X-Cache'] == 'MISS'
+        assert last_page.data['results'][0]['comment_count'] == 1
+
+        # new posts only show up on first pages
+        with django_capture_on_commit_callbacks(execute=True):
+            create_post(title='fresh')
+
+        assert api_client.get(last_page_url)['X-Cache'] == 'HIT'
+        assert api_client.get(url, {'page_size': 2})['X-Cache'] == 'MISS'
+
+    def test_unused_query_params_share_an_entry(self, api_client, create_post):
+        create_post()
+        url = reverse('post-list')
+        api_client.get(url, {'x': 1})
+
+        assert api_client.get(url, {'x': 2})['X-Cache'] == 'HIT'
+        assert api_client.get(url, {'page_size': 10})['X-Cache'] == 'HIT'
+        assert api_client.get(url, {'page_size': 3})['X-Cache'] == 'MISS'
+
+    def test_entries_rendered_before_a_change_are_misses(self):
+        request = RequestFactory().get('/api/posts/')
+        since = time.time()
+        feed_cache.invalidate_tags(['post:1'])
+        # rendered from rows read before the change committed
+        feed_cache.compute(request, lambda: {'tags': ['post:1']}, since=since)
+
+        assert feed_cache.get(request) is None
+
+    @override_settings(WEB_CONCURRENCY=4)
+    def test_per_process_cache_fails_with_several_workers(self):
+        errors = check_caches_are_shared(None)
+
+        assert [error.id for error in errors] == ['blog.E001', 'blog.E001']
+        assert 'TOKEN_VERSION_CACHE' in errors[1].msg
+
+    @override_settings(WEB_CONCURRENCY=4,
+                       BLOG_FEED_CACHE={'CACHE': 'shared'},
+                       TOKEN_VERSION_CACHE={'CACHE': 'shared'})
+    def test_shared_caches_pass_with_several_workers(self):
+        assert check_caches_are_shared(None) == []
+
+    @override_settings(BLOG_FEED_CACHE={'WAIT_TIMEOUT': 0.2})
+    def test_concurrent_miss_waits_for_single_flight(self):
+        request = RequestFactory().get('/api/posts/')
+        key = feed_cache.get_key(request)
+        feed_cache.cache.add(f'{key}:lock', 1)
+        calls = []
+
+        # another request holds the lock and never finishes
+        data = feed_cache.compute(
+            request, lambda: calls.append(1) or {'results': []})
+
+        assert data == {'results': []}
+        assert calls == [1]
+
+    def test_stats_are_exposed_to_admins(self, api_client, create_post):
+        admin = User.objects.create(
+            username='admin', password='!', is_staff=True)
+        api_client.get(reverse('post-list'))
+        api_client.get(reverse('post-list'))
+        api_client.force_authenticate(user=admin)
+
+        response = api_client.get(reverse('post-cache-stats'))
+
+        assert response.data == {'hits': 1, 'misses': 1, 'hit_ratio': 0.5}
@@ -0,0 +1,96 @@
+import pytest
+from django.db import router
+from django.urls import reverse
+from rest_framework import status
+
+from auth_app.tokens import issue_token
+from blog.models import BlogPost
+from config.db_routers import use_primary
+
+
+@pytest.fixture
+def replicas(settings):
+    """
+    Fixture to read from the `replica` test database, which stays
+    empty while every write lands on `default`, so each response
+    shows which database served it.
+    """
+    settings.DATABASE_REPLICAS = ['replica']
+
+
+@pytest.mark.django_db(databases=['default', 'replica'])
+class TestPrimaryReplicaRouting:
+    """
+    Tests for replica reads with read-your-writes pinning
+    """
+
+    def test_safe_requests_read_from_replica(self, api_client, replicas,
+                                             create_post):
+        post = create_post()
+
+        response = api_client.get(reverse('post-detail', args=[post.pk]))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert 'db_pin' not in response.cookies
+
+    def test_writes_pin_the_client_to_the_primary(self, api_client, replicas,
+                                                  author):
+        response = api_client.post(reverse('post-create'), {
+            'title': 'New', 'content': 'Fresh', 'author': author.pk,
+        }, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.cookies['db_pin']['max-age'] == 5
+        post = BlogPost.objects.using('default').get(title='New')
+        # the cookie is sent back, so the new post is read from the primary
+        assert api_client.get(reverse(
+            'post-detail', args=[post.pk])).status_code == status.HTTP_200_OK
+
+    def test_unsafe_requests_read_from_primary(self, api_client, replicas,
+                                               author):
+        api_client.force_authenticate(user=author)
+
+        response = api_client.patch(
+            reverse('user-update', kwargs={'pk': author.pk}),
+            {'username': 'renamed'}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_api_clients_are_pinned_through_the_cache(
+            self, api_client, replicas, author):
+        url = reverse('user-detail', kwargs={'pk': author.pk})
+        api_client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {issue_token(author).access_token}')
+
+        # tokens are checked against the primary, the user read isn't
+        assert api_client.get(url).status_code == status.HTTP_404_NOT_FOUND
+
+        api_client.patch(reverse('user-update', kwargs={'pk': author.pk}),
+                         {'username': 'renamed'}, format='json')
+        api_client.cookies.clear()
+        response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['username'] == 'renamed'
+
+    def test_cached_feed_pages_are_read_from_primary(
+            self, api_client, replicas, create_post):
+        post = create_post()
+        url = reverse('post-list')
+
+        response = api_client.get(url)
+
+        # rows from a lagging replica would stay cached as fresh
+        assert response['X-Cache'] == 'MISS'
+        assert [p['id'] for p in response.data['results']] == [post.pk]
+
+    def test_use_primary_pins_reads(self, replicas, create_post):
+        post = create_post()
+
+        with use_primary():
+            assert BlogPost.objects.filter(pk=post.pk).exists()
+        assert not BlogPost.objects.filter(pk=post.pk).exists()
+
+    def test_without_replicas_everything_uses_default(self):
+        assert router.db_for_read(BlogPost) == 'default'
+        assert router.db_for_write(BlogPost) == 'default'
@@ -0,0 +1,114 @@
+import gzip
+import json
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from blog.export import parse_since
+from blog.models import BlogPost
+
+
+def read_ndjson(data):
+    return [json.loads(line) for line in data.decode('utf-8').splitlines()]
+
+
+@pytest.mark.django_db
+class TestBlogExport:
+    """
+    Tests for the streaming NDJSON export endpoint and command
+    """
+
+    @pytest.fixture
+    def admin_client(self, api_client):
+        admin = User.objects.create(
+            username='admin', password='!', is_staff=True)
+        api_client.force_authenticate(user=admin)
+        return api_client
+
+    def test_export_streams_posts_then_comments(self, admin_client,
+                                                create_post, create_comment):
+        post = create_post()
+        comment = create_comment(post)
+        url = reverse('post-export')
+
+        response = admin_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        records = read_ndjson(b''.join(response.streaming_content))
+        assert [(r['type'], r['id']) for r in records] == [
+            ('post', post.id), ('comment', comment.id)]
+
+    def test_export_stays_within_query_budget(self, admin_client,
+                                              create_post, create_comment,
+                                              assert_query_budget):
+        for _ in range(5):
+            post = create_post()
+            for _ in range(3):
+                create_comment(post)
+
+        with assert_query_budget('post-export'):
+            response = admin_client.get(reverse('post-export'))
+            records = read_ndjson(b''.join(response.streaming_content))
+
+        assert len(records) == 20
+
+    def test_export_since_is_incremental(self, admin_client, create_post):
+        old = create_post(title='old')
+        BlogPost.objects.filter(pk=old.pk).update(
+            changed_at=timezone.now() - timezone.timedelta(days=2))
+        new = create_post(title='new')
+        since = (timezone.now() - timezone.timedelta(days=1)).isoformat()
+
+        response = admin_client.get(reverse('post-export'), {'since': since})
+
+        records = read_ndjson(b''.join(response.streaming_content))
+        assert [r['id'] for r in records] == [new.id]
+
+    def test_export_can_be_gzipped(self, admin_client, create_post):
+        create_post()
+
+        response = admin_client.get(
+            reverse('post-export'), {'compress': 'gzip'})
+
+        assert response['Content-Type'] == 'application/gzip'
+        data = gzip.decompress(b''.join(response.streaming_content))
+        assert read_ndjson(data)[0]['type'] == 'post'
+
+    @pytest.mark.parametrize('since', ['soon', '2024-13-45T00:00:00'])
+    def test_invalid_since_is_rejected(self, admin_client, since):
+        response = admin_client.get(reverse('post-export'), {'since': since})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_naive_since_is_in_the_current_time_zone(self, settings):
+        settings.TIME_ZONE = 'America/New_York'
+
+        since = parse_since('2024-01-01T12:00:00')
+
+        assert since.utcoffset() == timezone.timedelta(hours=-5)
+
+    def test_export_command_rejects_invalid_since(self, db):
+        with pytest.raises(CommandError):
+            call_command('export_blog', since='2024-02-30')
+
+    def test_export_is_admin_only(self, api_client, db):
+        response = api_client.get(reverse('post-export'))
+
+        assert response.status_code in (
+            status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN)
+
+    def test_export_command_writes_file(self, create_post, create_comment,
+                                        tmp_path):
+        post = create_post()
+        create_comment(post)
+        output = tmp_path / 'export.ndjson.gz'
+
+        call_command('export_blog', output=str(output), gzip=True)
+
+        records = read_ndjson(gzip.decompress(output.read_bytes()))
+        assert [r['type'] for r in records] == ['post', 'comment']
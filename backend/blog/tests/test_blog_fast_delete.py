@@ -0,0 +1,145 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import transaction
+
+from blog import fast_delete
+from blog.cache import feed_cache
+from blog.fast_delete import (
+    can_fast_delete,
+    fast_delete_comments,
+    fast_delete_posts,
+    fast_delete_user_content,
+)
+from blog.models import BlogPost, Comment
+from blog.search import get_search_backend
+
+
+class Rollback(Exception):
+    pass
+
+
+def snapshot():
+    """
+    Rows and counters left in the blog tables.
+    """
+    return (
+        list(BlogPost.objects.order_by('pk').values_list(
+            'pk', 'comment_count')),
+        list(Comment.objects.order_by('pk').values_list(
+            'pk', 'reply_count')),
+    )
+
+
+def orm_result(delete):
+    """
+    Runs `delete` in a transaction that is rolled back and returns the
+    snapshot it produced.
+    """
+    try:
+        with transaction.atomic():
+            delete()
+            result = snapshot()
+            raise Rollback
+    except Rollback:
+        return result
+
+
+@pytest.fixture
+def threads(author, create_post, create_comment):
+    """
+    Fixture to provide two posts with nested threads, including
+    moderated comments and replies from another user.
+    """
+    other = User.objects.create(
+        username='other', email='other@example.com', password='!')
+    first, second = create_post(title='first'), create_post(
+        title='second', author=other)
+    for post in (first, second):
+        parent = None
+        for i in range(4):
+            parent = create_comment(
+                post, parent=parent, author=other if i % 2 else author,
+                is_moderated=(i == 2))
+        create_comment(post, author=other)
+    return first, second, other
+
+
+@pytest.mark.django_db
+class TestFastDelete:
+    """
+    Tests for the set-based delete path, checked against the ORM
+    collector on the same data
+    """
+
+    def test_relations_are_all_handled(self):
+        assert can_fast_delete() is True
+
+    def test_posts_match_orm_delete(self, threads,
+                                    django_assert_num_queries):
+        first, *_ = threads
+        expected = orm_result(
+            lambda: BlogPost.objects.filter(pk=first.pk).delete())
+
+        # two DELETEs, in a savepoint
+        with django_assert_num_queries(4):
+            deleted = fast_delete_posts(BlogPost.objects.filter(pk=first.pk))
+
+        assert deleted == (1, 5)
+        assert snapshot() == expected
+
+    def test_comment_subtree_matches_orm_delete(self, threads):
+        _, second, _ = threads
+        reply = Comment.objects.get(blog_post=second, path__regex=r'^\d+/$')
+        expected = orm_result(
+            lambda: Comment.objects.filter(pk=reply.pk).delete())
+
+        deleted = fast_delete_comments(Comment.objects.filter(pk=reply.pk))
+
+        assert deleted == 3
+        assert snapshot() == expected
+        second.refresh_from_db()
+        # two of the three deleted comments were visible
+        assert second.comment_count == 2
+
+    def test_user_content_matches_orm_delete(self, threads, author):
+        def orm_delete():
+            BlogPost.objects.filter(author=author).delete()
+            Comment.objects.filter(author=author).delete()
+        expected = orm_result(orm_delete)
+
+        posts, comments = fast_delete_user_content(author)
+
+        assert (posts, comments) == (1, 9)
+        assert snapshot() == expected
+        assert User.objects.filter(pk=author.pk).exists()
+
+    def test_invalidates_feed_and_search_index(
+            self, threads, django_capture_on_commit_callbacks):
+        first, *_ = threads
+        version = feed_cache.get_version()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            fast_delete_posts(BlogPost.objects.filter(pk=first.pk))
+
+        assert feed_cache.get_version() > version
+        hits = get_search_backend().search('first', limit=10)
+        assert first.pk not in [hit.post_id for hit in hits]
+
+    def test_falls_back_to_orm_for_unknown_relations(
+            self, threads, monkeypatch):
+        first, *_ = threads
+        monkeypatch.setitem(fast_delete.HANDLED_RELATIONS, BlogPost, set())
+
+        assert can_fast_delete() is False
+        assert fast_delete_posts(
+            BlogPost.objects.filter(pk=first.pk)) == (1, 5)
+
+
+@pytest.mark.django_db
+def test_profile_fast_delete_command(capsys):
+    call_command('profile_fast_delete', comments=50, depth=5)
+
+    out = capsys.readouterr().out
+    assert 'ORM collector' in out and 'fast path' in out
+    assert not BlogPost.objects.exists()
@@ -1,3 +1,153 @@
-from django.test import TestCase
+import pytest
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
 
-# Create your tests here.
+from blog.models import BlogPost, Comment
+
+
+@pytest.mark.django_db
+class TestCommentPathIndex:
+    """
+    Tests for the materialized thread path kept on comments
+    """
+
+    @pytest.fixture
+    def thread(self, create_post, create_comment):
+        post = create_post()
+        root = create_comment(post)
+        reply = create_comment(post, parent=root)
+        nested = create_comment(post, parent=reply)
+        sibling = create_comment(post)
+        return root, reply, nested, sibling
+
+    def test_path_is_set_on_create(self, thread):
+        root, reply, nested, _ = thread
+
+        assert root.path == ''
+        assert reply.path == root.subtree_path
+        assert nested.ancestor_ids == [root.id, reply.id]
+        assert nested.depth == 2
+
+    def test_subtree_is_a_single_range_query(self, thread,
+                                             django_assert_num_queries):
+        root, reply, nested, _ = thread
+
+        with django_assert_num_queries(1):
+            ids = set(Comment.objects.subtree(root).values_list('id', flat=True))
+
+        assert ids == {reply.id, nested.id}
+
+    def test_ancestors_are_ordered_root_first(self, thread):
+        root, reply, nested, _ = thread
+
+        assert list(Comment.objects.ancestors(nested)) == [root, reply]
+        assert list(Comment.objects.ancestors(nested, include_self=True)) == [
+            root, reply, nested]
+
+    @pytest.mark.parametrize('reload', [False, True])
+    def test_parent_cannot_change(self, thread, reload):
+        root, reply, nested, sibling = thread
+        if reload:
+            nested = Comment.objects.get(pk=nested.pk)
+
+        nested.parent = sibling
+        with pytest.raises(ValueError):
+            nested.save()
+
+        assert Comment.objects.get(pk=nested.pk).parent_id == reply.id
+
+    def test_parent_is_read_only_in_admin(self, thread, rf):
+        root, *_ = thread
+        comment_admin = admin.site._registry[Comment]
+        request = rf.get('/')
+
+        assert comment_admin.get_readonly_fields(request) == ()
+        assert 'parent' in comment_admin.get_readonly_fields(request, root)
+
+    def test_backfill_rebuilds_paths(self, thread):
+        root, reply, nested, _ = thread
+        Comment.objects.update(path='')
+
+        call_command('backfill_comment_paths', batch_size=2)
+
+        nested.refresh_from_db()
+        assert nested.ancestor_ids == [root.id, reply.id]
+
+
+@pytest.mark.django_db
+class TestCommentCounters:
+    """
+    Tests for the denormalized comment and reply counters
+    """
+
+    def test_counters_follow_create_moderate_and_delete(self, create_post,
+                                                        create_comment):
+        post = create_post()
+        root = create_comment(post)
+        reply = create_comment(post, parent=root)
+        create_comment(post, parent=root, is_moderated=True)
+
+        post.refresh_from_db()
+        root.refresh_from_db()
+        assert post.comment_count == 2
+        assert root.reply_count == 1
+
+        reply.is_moderated = True
+        reply.save()
+        root.refresh_from_db()
+        assert root.reply_count == 0
+
+        reply.is_moderated = False
+        reply.save()
+        root.delete()
+        post.refresh_from_db()
+        assert post.comment_count == 0
+
+    def test_user_deletion_cascade_updates_counters(self, create_post,
+                                                    create_comment):
+        post = create_post()
+        commenter = User.objects.create(username='commenter', password='!')
+        root = create_comment(post)
+        create_comment(post, parent=root, author=commenter)
+
+        commenter.delete()
+
+        post.refresh_from_db()
+        root.refresh_from_db()
+        assert post.comment_count == 1
+        assert root.reply_count == 0
+
+    def test_reconcile_repairs_drift(self, create_post, create_comment):
+        post = create_post()
+        root = create_comment(post)
+        create_comment(post, parent=root)
+        BlogPost.objects.update(comment_count=7)
+        Comment.objects.update(reply_count=3)
+        changed_at = BlogPost.objects.get().changed_at
+
+        call_command('reconcile_comment_counts', batch_size=1)
+
+        post.refresh_from_db()
+        root.refresh_from_db()
+        assert post.comment_count == 2
+        assert root.reply_count == 1
+        assert post.changed_at > changed_at
+
+    def test_reconcile_invalidates_repaired_feed_pages(
+            self, api_client, create_post, create_comment,
+            django_capture_on_commit_callbacks):
+        post = create_post()
+        create_comment(post)
+        url = reverse('post-list')
+        etag = api_client.get(url)['ETag']
+        BlogPost.objects.update(comment_count=7)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            call_command('reconcile_comment_counts')
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 200
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['results'][0]['comment_count'] == 1
@@ -0,0 +1,155 @@
+import re
+from urllib.parse import quote
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+# a `SCAN`, with or without an index, reads every row of the table (or
+# of the index) unless it carries a `(column>?)` range term
+SCAN = re.compile(r'\bSCAN (\w+)')
+
+# `FROM "table" alias` / `JOIN table alias`; plans name tables by alias
+ALIAS = re.compile(r'\b(?:FROM|JOIN) "?(\w+)"? (?:AS )?"?(\w+)"?')
+
+# tables that are never expected to be read in full
+TABLES = {'blog_blogpost', 'blog_comment', 'auth_user'}
+
+# the first page of a keyset walk: when no sort is needed the scan reads
+# rows in index order and stops at the LIMIT
+KEYSET_PAGE = re.compile(
+    r'ORDER BY "(\w+)"\.\S+ (?:ASC|DESC)(?:, "\1"\.\S+ (?:ASC|DESC))* '
+    r'LIMIT \d+$')
+
+
+def full_table_scans(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        details = [row[-1] for row in cursor.fetchall()]
+    tables = {name: name for name in TABLES}
+    tables.update(
+        (alias, table) for table, alias in ALIAS.findall(sql)
+        if table in TABLES)
+    keyset = KEYSET_PAGE.search(sql)
+    if keyset and not any('TEMP B-TREE' in detail for detail in details):
+        bounded = keyset.group(1)
+    else:
+        bounded = None
+    return [
+        detail for detail in details
+        if (match := SCAN.search(detail)) and '(' not in detail
+        and tables.get(match.group(1)) not in (None, bounded)
+    ]
+
+
+@pytest.mark.skipif(connection.vendor != 'sqlite',
+                    reason='EXPLAIN QUERY PLAN output is SQLite specific')
+@pytest.mark.django_db
+class TestQueryPlans:
+    """
+    Runs every read endpoint, explains each query it issued and
+    fails when one of them falls back to a full table scan.
+    """
+
+    @pytest.fixture
+    def thread(self, create_post, create_comment):
+        posts = [create_post(title=f'post {i}') for i in range(15)]
+        post = posts[0]
+        root = create_comment(post)
+        reply = create_comment(post, parent=root)
+        create_comment(post, parent=reply)
+        create_comment(posts[1])
+        return post, root, reply
+
+    @pytest.fixture
+    def admin_client(self, api_client):
+        admin = User.objects.create(
+            username='admin', password='!', is_staff=True)
+        api_client.force_authenticate(user=admin)
+        return api_client
+
+    def urls(self, client, thread):
+        post, root, reply = thread
+        since = quote(timezone.now().isoformat())
+        feed = reverse('post-list')
+        comments = reverse('post-comments', kwargs={'pk': post.id})
+        users = reverse('user-list')
+        return [
+            feed,
+            # second page of the feed, through its keyset cursor
+            client.get(feed, {'page_size': 5}).data['next'],
+            reverse('post-detail', kwargs={'pk': post.id}),
+            comments,
+            f'{comments}?parent={reply.id}',
+            reverse('user-detail', kwargs={'pk': post.author_id}),
+            users,
+            client.get(users, {'page_size': 1}).data['next'],
+            # post and comment counts, as correlated subqueries on the
+            # author indexes
+            f'{users}?counts=true',
+            f'{reverse("post-search")}?q=post',
+            # a full export walks every row by design; an incremental one
+            # must go through the change indexes
+            f'{reverse("post-export")}?since={since}',
+        ]
+
+    def test_detector_flags_full_scans(self, db):
+        sql = "SELECT id FROM blog_comment WHERE content = 'x'"
+
+        assert full_table_scans(sql) == ['SCAN blog_comment']
+
+    def test_detector_flags_index_scans(self, db):
+        sql = 'SELECT COUNT(id), MAX(changed_at) FROM blog_blogpost'
+
+        assert full_table_scans(sql) == [
+            'SCAN blog_blogpost USING COVERING INDEX blogpost_changed_idx']
+
+    def test_detector_resolves_aliases(self, db):
+        sql = "SELECT U0.id FROM blog_comment U0 WHERE U0.content = 'x'"
+
+        assert full_table_scans(sql) == ['SCAN U0']
+
+    def test_detector_allows_first_keyset_page(self, db):
+        page = 'SELECT "id" FROM "auth_user" ORDER BY "auth_user"."id" ASC'
+
+        assert full_table_scans(f'{page} LIMIT 11') == []
+        assert full_table_scans(page) == ['SCAN auth_user']
+
+    def test_replies_page_uses_replies_index(self, api_client, thread):
+        post, root, reply = thread
+        url = reverse('post-comments', kwargs={'pk': post.id})
+
+        with CaptureQueriesContext(connection) as context:
+            api_client.get(url, {'parent': root.id})
+
+        [page] = [query['sql'] for query in context.captured_queries
+                  if '"parent_id" = ' in query['sql']]
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {page}')
+            details = [row[-1] for row in cursor.fetchall()]
+        assert any('comment_replies_idx (parent_id=?)' in detail
+                   for detail in details), details
+
+    def test_endpoints_do_not_scan_tables(self, admin_client, thread):
+        scans = {}
+        for url in self.urls(admin_client, thread):
+            cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                response = admin_client.get(url)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            assert response.status_code == 200, url
+
+            for query in context.captured_queries:
+                sql = query['sql']
+                if not sql.startswith(('SELECT', 'WITH')):
+                    continue
+                found = full_table_scans(sql)
+                if found:
+                    scans[sql] = found
+
+        assert scans == {}
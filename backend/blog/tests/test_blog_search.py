@@ -0,0 +1,122 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from rest_framework import status
+
+from blog.models import BlogPost
+from blog.search import SQLiteFTS5Backend
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='FTS5 search requires SQLite')
+
+
+@pytest.mark.django_db
+class TestBlogSearch:
+    """
+    Tests for the full-text post search endpoint
+    """
+
+    def search(self, api_client, query, **params):
+        return api_client.get(reverse('post-search'), {'q': query, **params})
+
+    def test_title_matches_rank_first(self, api_client, create_post):
+        in_content = create_post(title='Notes', content='all about django')
+        in_title = create_post(title='Django tips', content='nothing else')
+        create_post(title='Other', content='unrelated')
+
+        response = self.search(api_client, 'django')
+
+        assert response.status_code == status.HTTP_200_OK
+        ids = [result['id'] for result in response.data['results']]
+        assert ids == [in_title.id, in_content.id]
+
+    def test_every_word_must_match(self, api_client, create_post):
+        both = create_post(content='fast django queries')
+        create_post(content='fast cars')
+
+        response = self.search(api_client, 'django fast')
+
+        assert [r['id'] for r in response.data['results']] == [both.id]
+
+    def test_snippet_highlights_and_escapes(self, api_client, create_post):
+        create_post(content='<b>bold</b> claims about sqlite')
+
+        response = self.search(api_client, 'sqlite')
+
+        snippet = response.data['results'][0]['snippet']
+        assert '<mark>sqlite</mark>' in snippet
+        assert '&lt;b&gt;bold&lt;/b&gt;' in snippet
+
+    def test_stemming(self, api_client, create_post):
+        post = create_post(content='indexing posts')
+
+        response = self.search(api_client, 'indexes')
+
+        assert [r['id'] for r in response.data['results']] == [post.id]
+
+    def test_query_syntax_is_not_interpreted(self, api_client, create_post):
+        post = create_post(content='a NEAR miss (really) "quoted"')
+
+        response = self.search(api_client, 'NEAR( "quoted* OR')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['results'] == []
+        response = self.search(api_client, '"quoted" (really)')
+        assert [r['id'] for r in response.data['results']] == [post.id]
+
+    def test_index_follows_updates_and_deletes(self, api_client, create_post):
+        post = create_post(content='original words')
+        BlogPost.objects.filter(pk=post.pk).update(content='replaced words')
+
+        assert self.search(api_client, 'original').data['results'] == []
+        assert len(self.search(api_client, 'replaced').data['results']) == 1
+
+        post.delete()
+        assert self.search(api_client, 'replaced').data['results'] == []
+
+    def test_bulk_created_posts_are_indexed(self, api_client, author):
+        BlogPost.objects.bulk_create([
+            BlogPost(title=f'bulk {i}', content='needle', author=author)
+            for i in range(3)
+        ])
+
+        response = self.search(api_client, 'needle')
+
+        assert len(response.data['results']) == 3
+
+    def test_limit_is_bounded(self, api_client, create_post):
+        for _ in range(3):
+            create_post(content='repeated')
+
+        response = self.search(api_client, 'repeated', limit=2)
+
+        assert len(response.data['results']) == 2
+
+    def test_missing_query_is_rejected(self, api_client):
+        response = self.search(api_client, '   ')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_search_stays_within_query_budget(self, api_client, create_post,
+                                              assert_query_budget):
+        for _ in range(5):
+            create_post(content='budget')
+
+        with assert_query_budget('post-search'):
+            response = self.search(api_client, 'budget')
+
+        assert len(response.data['results']) == 5
+
+    def test_rebuild_command_restores_index(self, api_client, create_post):
+        post = create_post(content='restored')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {SQLiteFTS5Backend.table}"
+                f"({SQLiteFTS5Backend.table}) VALUES ('delete-all')")
+        assert self.search(api_client, 'restored').data['results'] == []
+
+        call_command('rebuild_search_index')
+
+        results = self.search(api_client, 'restored').data['results']
+        assert [r['id'] for r in results] == [post.id]
@@ -0,0 +1,58 @@
+import pytest
+from django.contrib.auth.models import User
+from rest_framework import serializers
+
+from blog.models import BlogPost, Comment
+from blog.query_planning import plan_queryset
+from blog.serializers import BlogPostSerializer, CommentSerializer
+
+
+@pytest.mark.django_db
+class TestPlannedSerialization:
+    """
+    Serializing through `plan_queryset` costs a fixed number of
+    queries no matter how many related rows exist.
+    """
+
+    @pytest.fixture
+    def posts_with_comments(self, create_post):
+        for i in range(3):
+            post = create_post(title=f'post {i}')
+            for j in range(4):
+                commenter = User.objects.create(
+                    username=f'commenter_{i}_{j}', password='!')
+                Comment.objects.create(
+                    blog_post=post, author=commenter, content='hi')
+
+    def test_blog_post_serializer(self, posts_with_comments,
+                                  django_assert_num_queries):
+        queryset = plan_queryset(BlogPost.objects.all(), BlogPostSerializer)
+
+        # posts + authors joined, then comments + authors joined
+        with django_assert_num_queries(2):
+            data = BlogPostSerializer(queryset, many=True).data
+
+        assert len(data) == 3
+        assert data[0]['author'] == 'author'
+        assert data[0]['comments'][0]['author'].startswith('commenter_')
+
+    def test_comment_serializer(self, posts_with_comments,
+                                django_assert_num_queries):
+        queryset = plan_queryset(Comment.objects.all(), CommentSerializer)
+
+        with django_assert_num_queries(1):
+            data = CommentSerializer(queryset, many=True).data
+
+        assert len(data) == 12
+
+    def test_pk_lists_only_load_ids(self, posts_with_comments):
+        class PostIdsSerializer(serializers.ModelSerializer):
+            class Meta:
+                model = BlogPost
+                fields = ['id', 'comments']
+
+        queryset = plan_queryset(BlogPost.objects.all(), PostIdsSerializer)
+        post = queryset.first()
+
+        comment = post.comments.all()[0]
+        assert comment.get_deferred_fields() >= {'content', 'author_id'}
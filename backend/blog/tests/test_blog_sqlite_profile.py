@@ -0,0 +1,62 @@
+import pytest
+from django.core.management import call_command
+from django.db.utils import ConnectionHandler
+
+from config.sqlite import production_options, use_production_profile
+
+
+@pytest.fixture
+def production_db(tmp_path, django_db_blocker):
+    """
+    Fixture to provide a connection to a scratch SQLite database set up
+    with the production profile.
+    """
+    databases = use_production_profile({
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': str(tmp_path / 'production.sqlite3'),
+        },
+    })
+    connection = ConnectionHandler(databases)['default']
+    with django_db_blocker.unblock():
+        connection.ensure_connection()
+        yield connection
+        connection.close()
+
+
+class TestProductionProfile:
+    """
+    Tests for the production SQLite profile
+    """
+
+    def test_connections_run_the_pragmas(self, production_db):
+        with production_db.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            assert cursor.fetchone()[0] == 'wal'
+            cursor.execute('PRAGMA synchronous')
+            # NORMAL
+            assert cursor.fetchone()[0] == 1
+            cursor.execute('PRAGMA busy_timeout')
+            assert cursor.fetchone()[0] == 20000
+
+    def test_connections_are_persistent_and_immediate(self, production_db):
+        assert production_db.settings_dict['CONN_MAX_AGE'] == 600
+        assert production_db.transaction_mode == 'IMMEDIATE'
+
+    def test_other_engines_are_left_alone(self):
+        databases = {'default': {'ENGINE': 'django.db.backends.postgresql'}}
+
+        use_production_profile(databases)
+
+        assert databases == {
+            'default': {'ENGINE': 'django.db.backends.postgresql'}}
+
+    def test_timeout_is_configurable(self):
+        assert production_options(timeout=5)['timeout'] == 5
+
+
+def test_profile_sqlite_command(capsys):
+    call_command('profile_sqlite', seconds=0.2, readers=2, writers=2)
+
+    out = capsys.readouterr().out
+    assert 'development:' in out and 'production:' in out
@@ -0,0 +1,189 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import AsyncRequestFactory
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from auth_app.tokens import issue_token
+from blog.views import BlogpostListApi, BlogpostListAsyncApi
+from config.throttling import ScopedTokenBucketThrottle
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Fixture to freeze the throttle's clock; advance it by
+    assigning to `clock.now`.
+    """
+    class Clock:
+        now = 1_000_000.0
+
+    monkeypatch.setattr(ScopedTokenBucketThrottle, 'timer',
+                        staticmethod(lambda: Clock.now))
+    return Clock
+
+
+@pytest.fixture
+def rates(settings):
+    """
+    Fixture to override `DEFAULT_THROTTLE_RATES`.
+    """
+    def set_rates(**scopes):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {
+                scope.replace('_', '.'): rate
+                for scope, rate in scopes.items()
+            },
+        }
+    return set_rates
+
+
+@pytest.mark.django_db
+class TestScopedTokenBucketThrottle:
+    """
+    Tests for the token bucket throttle on the public post endpoints
+    """
+
+    def test_reports_rate_limit_headers(self, api_client, clock):
+        response = api_client.get(reverse('post-list'))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['RateLimit-Limit'] == '120'
+        assert response['RateLimit-Remaining'] == '119'
+        assert response['RateLimit-Reset'] == '1'
+
+    def test_burst_then_429(self, api_client, clock, rates):
+        rates(posts_list='3/min')
+        url = reverse('post-list')
+
+        remaining = [api_client.get(url)['RateLimit-Remaining']
+                     for _ in range(3)]
+        response = api_client.get(url)
+
+        assert remaining == ['2', '1', '0']
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response['RateLimit-Remaining'] == '0'
+        assert response['RateLimit-Reset'] == '60'
+        # one token comes back every 20 seconds
+        assert response['Retry-After'] == '20'
+
+    def test_bucket_refills_at_the_sustained_rate(
+            self, api_client, clock, rates):
+        rates(posts_list='3/min')
+        url = reverse('post-list')
+        for _ in range(3):
+            api_client.get(url)
+
+        clock.now += 20
+        assert api_client.get(url).status_code == status.HTTP_200_OK
+        assert api_client.get(url).status_code == (
+            status.HTTP_429_TOO_MANY_REQUESTS)
+
+        clock.now += 60
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['RateLimit-Remaining'] == '2'
+
+    def test_rejected_requests_do_not_use_tokens(
+            self, api_client, clock, rates):
+        rates(posts_list='1/min')
+        url = reverse('post-list')
+        api_client.get(url)
+        for _ in range(5):
+            assert api_client.get(url).status_code == (
+                status.HTTP_429_TOO_MANY_REQUESTS)
+
+        clock.now += 60
+
+        assert api_client.get(url).status_code == status.HTTP_200_OK
+
+    def test_buckets_are_per_ip_address(self, api_client, clock, rates):
+        rates(posts_list='1/min')
+        url = reverse('post-list')
+
+        first = api_client.get(url, REMOTE_ADDR='10.0.0.1')
+        second = api_client.get(url, REMOTE_ADDR='10.0.0.2')
+
+        assert first.status_code == status.HTTP_200_OK
+        assert second.status_code == status.HTTP_200_OK
+        assert api_client.get(url, REMOTE_ADDR='10.0.0.1').status_code == (
+            status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_buckets_are_per_user_and_per_scope(
+            self, api_client, author, clock, rates):
+        rates(posts_list='1/min', posts_create='1/min')
+        api_client.force_authenticate(user=author)
+        data = {'title': 'A post', 'content': 'Some content',
+                'author': author.pk}
+
+        assert api_client.post(reverse('post-create'), data,
+                               format='json').status_code == 201
+        # same IP address, but the user's own bucket for another scope
+        assert api_client.get(reverse('post-list')).status_code == 200
+        api_client.force_authenticate(user=None)
+        assert api_client.get(reverse('post-list')).status_code == 200
+        api_client.force_authenticate(user=author)
+        assert api_client.post(reverse('post-create'), data,
+                               format='json').status_code == 429
+
+    def test_views_without_scope_are_not_throttled(
+            self, api_client, create_post, clock, rates):
+        rates(posts_list='1/min')
+        post = create_post()
+
+        for _ in range(3):
+            response = api_client.get(
+                reverse('post-detail', args=[post.pk]))
+            assert response.status_code == status.HTTP_200_OK
+            assert 'RateLimit-Limit' not in response
+
+    def test_check_does_not_query_the_database(
+            self, django_assert_num_queries):
+        request = Request(APIRequestFactory().get('/'))
+        request.user
+
+        with django_assert_num_queries(0):
+            assert ScopedTokenBucketThrottle().allow_request(
+                request, BlogpostListApi())
+
+    def test_async_feed_is_throttled(self, clock, rates):
+        rates(posts_list='1/min')
+        view = BlogpostListAsyncApi.as_view()
+
+        def get():
+            request = AsyncRequestFactory().get(reverse('post-list'))
+            return async_to_sync(view)(request)
+
+        assert get().status_code == status.HTTP_200_OK
+        response = get()
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response['Retry-After'] == '60'
+
+    def test_async_feed_is_throttled_per_user(self, author, clock, rates):
+        rates(posts_list='1/min')
+        view = BlogpostListAsyncApi.as_view()
+        reader = User.objects.create(username='reader', password='!')
+
+        def get(user):
+            token = issue_token(user).access_token
+            request = AsyncRequestFactory().get(
+                reverse('post-list'), headers={
+                    'Authorization': f'Bearer {token}'})
+            return async_to_sync(view)(request)
+
+        # both requests share an IP address but not a bucket
+        assert get(author).status_code == status.HTTP_200_OK
+        assert get(reader).status_code == status.HTTP_200_OK
+        assert get(author).status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+
+@pytest.mark.django_db
+def test_profile_throttle_command(capsys):
+    call_command('profile_throttle', requests=200, clients=10)
+
+    assert '200 checks over 10 clients' in capsys.readouterr().out
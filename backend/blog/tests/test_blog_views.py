@@ -0,0 +1,484 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import AsyncRequestFactory
+from django.urls import reverse
+from rest_framework import serializers, status
+
+from blog.models import BlogPost
+from blog.views import BlogpostCommentThreadApi, BlogpostListAsyncApi
+
+
+@pytest.mark.django_db
+class TestBlogpostListApi:
+    """
+    Tests for the public, keyset-paginated post feed
+    """
+
+    def test_feed_is_paginated_newest_first(self, api_client, create_post):
+        posts = [create_post(title=f'post {i}') for i in range(5)]
+        url = reverse('post-list')
+
+        response = api_client.get(url, {'page_size': 2})
+
+        assert response.status_code == status.HTTP_200_OK
+        ids = [post['id'] for post in response.data['results']]
+        assert ids == [posts[4].id, posts[3].id]
+        assert response.data['next'] is not None
+
+    def test_feed_walks_every_post_once(self, api_client, create_post):
+        posts = [create_post(title=f'post {i}') for i in range(7)]
+        url = reverse('post-list') + '?page_size=3'
+
+        seen = []
+        while url:
+            response = api_client.get(url)
+            seen.extend(post['id'] for post in response.data['results'])
+            url = response.data['next']
+
+        assert seen == [post.id for post in reversed(posts)]
+
+    def test_feed_breaks_created_at_ties_by_id(self, api_client, create_post):
+        posts = [create_post(title=f'post {i}') for i in range(5)]
+        BlogPost.objects.update(created_at=posts[0].created_at)
+        url = reverse('post-list') + '?page_size=2'
+
+        seen = []
+        while url:
+            response = api_client.get(url)
+            seen.extend(post['id'] for post in response.data['results'])
+            url = response.data['next']
+
+        assert seen == [post.id for post in reversed(posts)]
+
+    def test_feed_stays_within_query_budget(self, api_client, create_post,
+                                            create_comment,
+                                            assert_query_budget):
+        for i in range(12):
+            post = create_post(title=f'post {i}')
+            for _ in range(3):
+                create_comment(post)
+        url = reverse('post-list')
+
+        with assert_query_budget('post-list'):
+            response = api_client.get(url, {'page_size': 10})
+
+        assert len(response.data['results']) == 10
+        assert response.data['results'][0]['comment_count'] == 3
+
+    def test_page_size_is_bounded(self, api_client, create_post):
+        for i in range(3):
+            create_post(title=f'post {i}')
+        url = reverse('post-list')
+
+        response = api_client.get(url, {'page_size': 10000})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['next'] is None
+
+    @pytest.mark.parametrize('cursor', [
+        'not-a-cursor',
+        'W251bGwsbnVsbF0',  # [null,null]
+        'eyJhIjoxLCJiIjoyfQ',  # {"a":1,"b":2}
+    ])
+    def test_invalid_cursor_returns_404(self, api_client, cursor):
+        url = reverse('post-list')
+        response = api_client.get(url, {'cursor': cursor})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestBlogpostCommentThreadApi:
+    """
+    Tests for the nested comment thread of a post
+    """
+
+    def test_thread_nests_replies(self, api_client, create_post,
+                                  create_comment):
+        post = create_post()
+        root = create_comment(post, content='root')
+        reply = create_comment(post, parent=root, content='reply')
+        create_comment(post, parent=reply, content='nested')
+        url = reverse('post-comments', kwargs={'pk': post.id})
+
+        response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        [node] = response.data['results']
+        assert node['content'] == 'root'
+        assert node['replies'][0]['content'] == 'reply'
+        assert node['replies'][0]['replies'][0]['content'] == 'nested'
+
+    def test_thread_respects_depth_and_sibling_limits(self, api_client,
+                                                      create_post,
+                                                      create_comment):
+        post = create_post()
+        root = create_comment(post)
+        replies = [create_comment(post, parent=root) for _ in range(4)]
+        create_comment(post, parent=replies[0])
+        url = reverse('post-comments', kwargs={'pk': post.id})
+
+        response = api_client.get(url, {'depth': 1, 'replies': 2})
+
+        [node] = response.data['results']
+        assert [r['id'] for r in node['replies']] == [
+            replies[0].id, replies[1].id]
+        assert node['has_more_replies'] is True
+        assert node['replies'][0]['replies'] == []
+
+    def test_thread_cut_at_max_nodes_flags_parents(self, api_client,
+                                                   create_post,
+                                                   create_comment,
+                                                   monkeypatch):
+        monkeypatch.setattr(BlogpostCommentThreadApi, 'max_nodes', 3)
+        post = create_post()
+        root = create_comment(post)
+        first = create_comment(post, parent=root)
+        nested = [create_comment(post, parent=first) for _ in range(3)]
+        create_comment(post, parent=root)
+        url = reverse('post-comments', kwargs={'pk': post.id})
+
+        response = api_client.get(url)
+
+        # depth first: the tail of the thread is what gets cut
+        [node] = response.data['results']
+        assert [r['id'] for r in node['replies']] == [first.id]
+        assert node['has_more_replies'] is True
+        [reply] = node['replies']
+        assert [r['id'] for r in reply['replies']] == [
+            nested[0].id, nested[1].id]
+        assert reply['has_more_replies'] is True
+        assert reply['replies'][0]['has_more_replies'] is False
+
+    def test_thread_pages_through_replies_of_a_comment(self, api_client,
+                                                       create_post,
+                                                       create_comment):
+        post = create_post()
+        root = create_comment(post)
+        replies = [create_comment(post, parent=root) for _ in range(3)]
+        url = reverse('post-comments', kwargs={'pk': post.id})
+
+        response = api_client.get(
+            url, {'parent': root.id, 'page_size': 2})
+
+        assert [r['id'] for r in response.data['results']] == [
+            replies[0].id, replies[1].id]
+        assert response.data['next'] is not None
+
+    def test_thread_stays_within_query_budget(self, api_client, create_post,
+                                              create_comment,
+                                              assert_query_budget):
+        post = create_post()
+        for _ in range(5):
+            parent = create_comment(post)
+            for _ in range(10):
+                parent = create_comment(post, parent=parent)
+        url = reverse('post-comments', kwargs={'pk': post.id})
+
+        with assert_query_budget('post-comments'):
+            response = api_client.get(url, {'depth': 50})
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_thread_of_a_reply_stays_within_query_budget(
+            self, api_client, create_post, create_comment,
+            assert_query_budget):
+        post = create_post()
+        parent = create_comment(post)
+        for _ in range(10):
+            parent = create_comment(post, parent=parent)
+        for _ in range(3):
+            create_comment(post, parent=parent)
+        url = reverse('post-comments', kwargs={'pk': post.id})
+
+        with assert_query_budget('post-comments-parent'):
+            response = api_client.get(url, {'parent': parent.id})
+
+        assert len(response.data['ancestors']) == 11
+        assert len(response.data['results']) == 3
+
+    def test_thread_of_missing_post_returns_404(self, api_client, db):
+        url = reverse('post-comments', kwargs={'pk': 999})
+        response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_thread_includes_ancestors_of_parent(self, api_client,
+                                                 create_post, create_comment):
+        post = create_post()
+        root = create_comment(post)
+        reply = create_comment(post, parent=root)
+        create_comment(post, parent=reply)
+        url = reverse('post-comments', kwargs={'pk': post.id})
+
+        response = api_client.get(url, {'parent': reply.id})
+
+        assert [c['id'] for c in response.data['ancestors']] == [
+            root.id, reply.id]
+        assert len(response.data['results']) == 1
+
+
+@pytest.mark.django_db
+class TestBlogpostListApiConditionalRequests:
+    """
+    Tests for ETag / Last-Modified revalidation of the feed
+    """
+
+    def test_matching_etag_returns_304_without_rendering(
+            self, api_client, create_post, django_assert_num_queries):
+        create_post()
+        url = reverse('post-list')
+        etag = api_client.get(url)['ETag']
+        cache.clear()
+
+        # only the validator query runs, the page is never rendered
+        with django_assert_num_queries(1):
+            response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_cached_page_answers_conditional_request(self, api_client,
+                                                     create_post):
+        create_post()
+        url = reverse('post-list')
+        etag = api_client.get(url)['ETag']
+
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_new_comment_changes_etag(self, api_client, create_post,
+                                      create_comment,
+                                      django_capture_on_commit_callbacks):
+        post = create_post()
+        url = reverse('post-list')
+        etag = api_client.get(url)['ETag']
+
+        with django_capture_on_commit_callbacks(execute=True):
+            create_comment(post)
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+        # a comment isn't an edit of the post
+        assert response.data['results'][0]['updated_at'] == \
+            serializers.DateTimeField().to_representation(post.updated_at)
+
+    def test_etag_only_covers_the_page(self, api_client, create_post):
+        posts = [create_post(title=f'post {i}') for i in range(5)]
+        url = reverse('post-list')
+        etag = api_client.get(url, {'page_size': 2})['ETag']
+        cache.clear()
+
+        # far below the first page and its look-ahead row
+        posts[0].title = 'edited'
+        posts[0].save()
+        unchanged = api_client.get(
+            url, {'page_size': 2}, HTTP_IF_NONE_MATCH=etag)
+        cache.clear()
+        posts[3].delete()
+        changed = api_client.get(
+            url, {'page_size': 2}, HTTP_IF_NONE_MATCH=etag)
+
+        assert unchanged.status_code == status.HTTP_304_NOT_MODIFIED
+        assert changed.status_code == status.HTTP_200_OK
+
+    def test_if_modified_since(self, api_client, create_post):
+        create_post()
+        url = reverse('post-list')
+        last_modified = api_client.get(url)['Last-Modified']
+
+        response = api_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.django_db
+class TestBlogpostListAsyncApi:
+    """
+    Tests for the async variant of the post feed. Any synchronous
+    database access inside the view raises `SynchronousOnlyOperation`.
+    """
+
+    view = staticmethod(BlogpostListAsyncApi.as_view())
+
+    def get(self, data=None, headers=None):
+        request = AsyncRequestFactory().get(
+            reverse('post-list'), data, headers=headers)
+        return async_to_sync(self.view)(request)
+
+    def test_matches_sync_feed(self, api_client, create_post):
+        for i in range(3):
+            create_post(title=f'post {i}')
+        expected = api_client.get(reverse('post-list'), {'page_size': 2})
+        cache.clear()
+
+        response = self.get({'page_size': 2})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['X-Cache'] == 'MISS'
+        assert response['ETag'] == expected['ETag']
+        assert json.loads(response.content) == expected.json()
+
+    def test_shares_cache_with_sync_feed(self, api_client, create_post):
+        create_post()
+        api_client.get(reverse('post-list'))
+
+        response = self.get()
+
+        assert response['X-Cache'] == 'HIT'
+
+    def test_matching_etag_returns_304(self, create_post):
+        create_post()
+        etag = self.get()['ETag']
+
+        response = self.get(headers={'If-None-Match': etag})
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_invalid_cursor_returns_404(self, db):
+        response = self.get({'cursor': 'not-a-cursor'})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert json.loads(response.content) == {'detail': 'Invalid cursor'}
+
+    def test_invalid_token_is_unauthorized(self, api_client, db):
+        headers = {'Authorization': 'Bearer not-a-token'}
+        api_client.credentials(HTTP_AUTHORIZATION=headers['Authorization'])
+        expected = api_client.get(reverse('post-list'))
+
+        response = self.get(headers=headers)
+
+        assert response.status_code == expected.status_code
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+class TestBlogpostDetailApi:
+    """
+    Tests for the single post view and the lean feed representation
+    """
+
+    def test_detail_returns_full_content_and_comments(self, api_client,
+                                                      create_post,
+                                                      create_comment):
+        post = create_post(content='x' * 1000)
+        create_comment(post, content='first!')
+        url = reverse('post-detail', kwargs={'pk': post.id})
+
+        response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['content'] == 'x' * 1000
+        assert response.data['comments'][0]['content'] == 'first!'
+
+    def test_detail_stays_within_query_budget(self, api_client, create_post,
+                                              create_comment,
+                                              assert_query_budget):
+        post = create_post()
+        for i in range(5):
+            commenter = User.objects.create(
+                username=f'commenter_{i}', password='!')
+            create_comment(post, author=commenter)
+        url = reverse('post-detail', kwargs={'pk': post.id})
+
+        with assert_query_budget('post-detail'):
+            api_client.get(url)
+
+    def test_missing_post_returns_404(self, api_client, db):
+        url = reverse('post-detail', kwargs={'pk': 999})
+        response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_feed_serves_excerpt_instead_of_content(self, api_client,
+                                                    create_post):
+        create_post(content='y' * 1000)
+        url = reverse('post-list')
+
+        response = api_client.get(url)
+
+        [post] = response.data['results']
+        assert 'content' not in post
+        assert post['excerpt'] == 'y' * 200
+
+
+@pytest.mark.django_db
+class TestBlogpostCreateApi:
+    """
+    Tests for single and bulk post creation
+    """
+
+    def test_create_single_post(self, api_client, author):
+        url = reverse('post-create')
+        data = {'title': 'Hello', 'content': 'World', 'author': author.id}
+
+        response = api_client.post(url, data, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert BlogPost.objects.filter(title='Hello').exists()
+
+    def test_bulk_create_from_json_array(self, api_client, author,
+                                         django_assert_num_queries):
+        url = reverse('post-create')
+        rows = [{'title': f'post {i}', 'content': 'bulk', 'author': author.id}
+                for i in range(20)]
+
+        # authors lookup, savepoint, one INSERT, savepoint release
+        with django_assert_num_queries(4):
+            response = api_client.post(url, rows, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert len(response.data['created']) == 20
+        assert set(response.data['created']) == set(
+            BlogPost.objects.values_list('id', flat=True))
+
+    def test_bulk_create_reports_row_errors(self, api_client, author):
+        url = reverse('post-create')
+        rows = [
+            {'title': 'ok', 'content': 'bulk', 'author': author.id},
+            {'title': 'no author', 'content': 'bulk', 'author': 999},
+            {'content': 'no title', 'author': author.id},
+            'not an object',
+        ]
+
+        response = api_client.post(url, rows, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert len(response.data['created']) == 1
+        assert [e['index'] for e in response.data['errors']] == [1, 2, 3]
+        assert 'author' in response.data['errors'][0]['errors']
+        assert 'title' in response.data['errors'][1]['errors']
+
+    def test_bulk_create_with_only_invalid_rows(self, api_client, db):
+        url = reverse('post-create')
+        response = api_client.post(url, [{'title': 'x'}], format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not BlogPost.objects.exists()
+
+    def test_bulk_create_from_ndjson(self, api_client, author):
+        url = reverse('post-create')
+        body = '\n'.join([
+            json.dumps({'title': 'one', 'content': 'a', 'author': author.id}),
+            '',
+            json.dumps({'title': 'two', 'content': 'b', 'author': author.id}),
+        ])
+
+        response = api_client.post(
+            url, body, content_type='application/x-ndjson')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert BlogPost.objects.count() == 2
+
+    def test_malformed_ndjson_is_rejected(self, api_client, db):
+        url = reverse('post-create')
+        response = api_client.post(
+            url, '{"title": "one"}\n{oops', content_type='application/x-ndjson')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'line 2' in response.data['detail']
@@ -0,0 +1,91 @@
+from collections import defaultdict
+
+from django.db.models.expressions import RawSQL
+
+from .models import PATH_SEGMENT_WIDTH, Comment
+
+
+def thread_descendants(roots, max_depth, replies_limit, max_nodes):
+    """
+    Returns a queryset of the replies below `roots`, at most `max_depth`
+    levels deep.
+
+    The thread is walked with a single recursive CTE that only follows
+    the first `replies_limit + 1` replies of every comment (the extra one
+    tells the caller that more replies exist). The walk queue is ordered
+    by each comment's subtree path, which makes it depth first, and stops
+    after `max_nodes + 1` replies; the work done is bounded by the page
+    being rendered rather than by the size of the thread, and a cut only
+    ever drops the tail of the thread. The extra reply tells
+    `build_thread` where that happened.
+    """
+    root_ids = [root.pk for root in roots]
+    if not root_ids or max_depth < 1:
+        return Comment.objects.none()
+
+    table = Comment._meta.db_table
+    placeholders = ', '.join(['%s'] * len(root_ids))
+    # same value as `Comment.subtree_path`
+    segment = f"printf('%%0{PATH_SEGMENT_WIDTH}d/', {{}}.id)"
+    sql = f"""
+        WITH RECURSIVE thread(id, depth, key) AS (
+            SELECT id, 0, path || {segment.format(table)}
+            FROM {table} WHERE id IN ({placeholders})
+            UNION ALL
+            SELECT reply.id, thread.depth + 1,
+                   thread.key || {segment.format('reply')}
+            FROM thread
+            JOIN {table} reply ON reply.id IN (
+                SELECT sibling.id FROM {table} sibling
+                WHERE sibling.parent_id = thread.id
+                ORDER BY sibling.created_at, sibling.id
+                LIMIT %s
+            )
+            WHERE thread.depth < %s
+            ORDER BY 3
+            LIMIT %s
+        )
+        SELECT id FROM thread WHERE depth > 0
+    """
+    params = (*root_ids, replies_limit + 1, max_depth,
+              len(root_ids) + max_nodes + 1)
+
+    return Comment.objects.filter(id__in=RawSQL(sql, params))
+
+
+def build_thread(roots, descendants, replies_limit, max_nodes):
+    """
+    Assembles the flat `descendants` rows into a reply tree under
+    `roots`, in memory.
+
+    Every comment gets a `thread_replies` list holding at most
+    `replies_limit` replies and a `has_more_replies` flag for the ones
+    that were left out, either because of the sibling limit or because
+    the walk stopped at `max_depth` (detected through the comment's
+    `reply_count`) or at `max_nodes`. Past `max_nodes`, only whole
+    subtrees at the end of the thread are missing, all of them below
+    ancestors of the first reply that was cut.
+    """
+    descendants = sorted(descendants, key=lambda comment: comment.subtree_path)
+    truncated = set()
+    if len(descendants) > max_nodes:
+        truncated.update(descendants[max_nodes].ancestor_ids)
+        descendants = descendants[:max_nodes]
+
+    children = defaultdict(list)
+    for comment in descendants:
+        children[comment.parent_id].append(comment)
+    for replies in children.values():
+        replies.sort(key=lambda comment: (comment.created_at, comment.pk))
+
+    pending = list(roots)
+    while pending:
+        comment = pending.pop()
+        replies = children.get(comment.pk, [])
+        comment.thread_replies = replies[:replies_limit]
+        comment.has_more_replies = (
+            len(replies) > replies_limit or comment.pk in truncated
+            or (not replies and comment.reply_count > 0))
+        pending.extend(comment.thread_replies)
+
+    return roots
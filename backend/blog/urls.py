@@ -1,10 +1,28 @@
 from django.urls import path
+
+from config.async_views import select_view
+
 from .views import (
     BlogpostListApi,
-    BlogpostCreateApi
+    BlogpostListAsyncApi,
+    BlogpostCreateApi,
+    BlogpostDetailApi,
+    BlogpostSearchApi,
+    BlogpostExportApi,
+    BlogpostCommentThreadApi,
+    BlogpostCacheStatsApi,
 )
 
 urlpatterns = [
-    path('posts/', BlogpostListApi.as_view(), name='post-list'),
+    path('posts/', select_view(
+        'post-list', BlogpostListApi.as_view(), BlogpostListAsyncApi.as_view()),
+        name='post-list'),
     path('posts/create/', BlogpostCreateApi.as_view(), name='post-create'),
+    path('posts/<int:pk>/', BlogpostDetailApi.as_view(), name='post-detail'),
+    path('posts/search/', BlogpostSearchApi.as_view(), name='post-search'),
+    path('posts/export/', BlogpostExportApi.as_view(), name='post-export'),
+    path('posts/cache-stats/', BlogpostCacheStatsApi.as_view(),
+         name='post-cache-stats'),
+    path('posts/<int:pk>/comments/', BlogpostCommentThreadApi.as_view(),
+         name='post-comments'),
 ]
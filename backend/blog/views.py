@@ -1,44 +1,397 @@
 # from rest_framework import viewsets, permissions
+import hashlib
+import time
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, serializers
 # TODO remove and add real auth / permissions
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.exceptions import NotFound
+from rest_framework.settings import api_settings
+
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, router, transaction
+from django.db.models.functions import Substr
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from config.async_views import AsyncAPIView
+
+from .cache import feed_cache
+from .export import export_records, gzip_stream, ndjson_stream, parse_since
+from .models import BlogPost, Comment
+from .parsers import NDJSONParser
+from .pagination import BlogPostCursorPagination, CommentThreadPagination
+from .query_planning import plan_queryset
+from .search import get_search_backend
+from .serializers import (
+    BlogPostSerializer,
+    CommentSerializer,
+    CommentThreadSerializer,
+    PrefetchedAuthorField,
+)
+from .signals import invalidate_feed
+from .threads import build_thread, thread_descendants
+
+
+class BlogpostFeedMixin:
+    """
+    Shared parts of the sync and async post feed views
+    """
+
+    permission_classes = [AllowAny]
+    throttle_scope = 'posts.list'
+    pagination_class = BlogPostCursorPagination
+
+    # set to None to always render from the database
+    response_cache = feed_cache
+
+    # number of characters of `content` shown in the feed
+    excerpt_length = 200
+
+    class OutputSerializer(serializers.ModelSerializer):
+        """
+        Serializer class for outgoing data to avoid data issues.
+        The full `content` is only served by the detail view.
+        """
+
+        excerpt = serializers.CharField(read_only=True)
+
+        class Meta:
+            model = BlogPost
+            fields = ['id', 'title', 'excerpt', 'author', 'created_at',
+                      'updated_at', 'allow_comments', 'comment_count']
+
+    def get_queryset(self):
+        # comments are only counted, so a page is a single query, and
+        # only the excerpt of `content` leaves the database
+        queryset = BlogPost.objects.defer('content').annotate(
+            excerpt=Substr('content', 1, self.excerpt_length))
+        return plan_queryset(queryset, self.OutputSerializer)
+
+    def get_validator_rows(self, request):
+        """
+        Returns the `(id, changed_at)` of the rows the requested page is
+        rendered from, look-ahead row included, as the same keyset slice
+        the page reads, so checking validators costs one bounded range
+        query whatever the size of the table.
+        """
+        paginator = self.pagination_class()
+        queryset = BlogPost.objects.using(self.get_validator_db())
+        return paginator.get_page_queryset(queryset, request).values_list(
+            'id', 'changed_at')
+
+    def validators_for(self, request, rows):
+        """
+        Returns the `(etag, last_modified)` validators of the requested
+        page from its `get_validator_rows()`.
+
+        Edits and counter updates touch `BlogPost.changed_at`, and posts
+        created or deleted around the page change which ids it holds,
+        so the ids plus the newest `changed_at` change whenever the page
+        does.
+        """
+        last_modified = max((changed for _, changed in rows), default=None)
+        source = '|'.join([
+            request.get_full_path(),
+            ','.join(str(pk) for pk, _ in rows),
+            last_modified.isoformat() if last_modified else '',
+        ])
+        etag = quote_etag(hashlib.sha256(source.encode('utf-8')).hexdigest())
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        return etag, timestamp
+
+    def get_validator_db(self):
+        """
+        Returns the database the validators are read from: the primary
+        when they are cached with the page (see `ResponseCache`).
+        """
+        if self.response_cache is not None:
+            return DEFAULT_DB_ALIAS
+        return router.db_for_read(BlogPost)
+
+    def get_cache_tags(self, request, rows):
+        """
+        Returns the `response_cache` tags of a page rendered from
+        `rows`, the look-ahead row included since it decides whether
+        there is a next page. Only pages without a cursor can gain
+        new posts.
+        """
+        tags = [self.response_cache.post_tag(post.pk) for post in rows]
+        paginator = self.pagination_class
+        if not request.GET.get(paginator.cursor_query_param):
+            tags.append(self.response_cache.first_page_tag)
+        return tags
+
+    def set_entry_headers(self, response, entry, cache_status):
+        response['ETag'] = entry['etag']
+        if entry['last_modified'] is not None:
+            response['Last-Modified'] = http_date(entry['last_modified'])
+        if self.response_cache is not None:
+            response['X-Cache'] = cache_status
+        return response
+
+
+class BlogpostListApi(BlogpostFeedMixin, APIView):
+    """
+    View class to view all availble blog posts, one
+    keyset-paginated page at a time.
+    Rendered pages are served from `response_cache` until a
+    post or a comment count changes, and conditional requests
+    are answered with 304 without rendering the page.
+    """
+
+    def get(self, request):
+        entry = None
+        if self.response_cache is not None:
+            entry = self.response_cache.get(request)
+
+        if entry is None:
+            since = time.time()
+            etag, last_modified = self.get_validators(request)
+            not_modified = get_conditional_response(
+                request, etag=etag, last_modified=last_modified)
+            if not_modified is not None:
+                return not_modified
+
+            def render():
+                data, rows = self.render_page(request)
+                return {
+                    'etag': etag,
+                    'last_modified': last_modified,
+                    'data': data,
+                    'tags': self.get_cache_tags(request, rows),
+                }
+
+            if self.response_cache is None:
+                entry = render()
+            else:
+                entry = self.response_cache.compute(
+                    request, render, since=since)
+            cache_status = 'MISS'
+        else:
+            not_modified = get_conditional_response(
+                request, etag=entry['etag'],
+                last_modified=entry['last_modified'])
+            if not_modified is not None:
+                return not_modified
+            cache_status = 'HIT'
+
+        response = Response(entry['data'], status=status.HTTP_200_OK)
+        return self.set_entry_headers(response, entry, cache_status)
+
+    def get_validators(self, request):
+        rows = list(self.get_validator_rows(request))
+        return self.validators_for(request, rows)
+
+    def render_page(self, request):
+        """
+        Returns the page's data and the rows it was rendered from.
+        """
+        paginator = self.pagination_class()
+        rows = list(paginator.get_page_queryset(self.get_queryset(), request))
+        serializer = self.OutputSerializer(
+            paginator.paginate_rows(rows), many=True)
+
+        return paginator.get_paginated_data(serializer.data), rows
+
+
+class BlogpostListAsyncApi(BlogpostFeedMixin, AsyncAPIView):
+    """
+    Async variant of `BlogpostListApi` for ASGI deployments,
+    sharing its cache entries and validators.
+    """
+
+    async def get(self, request):
+        entry = None
+        if self.response_cache is not None:
+            entry = await self.response_cache.aget(request)
+
+        if entry is None:
+            since = time.time()
+            rows = [row async for row in self.get_validator_rows(request)]
+            etag, last_modified = self.validators_for(request, rows)
+            not_modified = get_conditional_response(
+                request, etag=etag, last_modified=last_modified)
+            if not_modified is not None:
+                return not_modified
+
+            async def render():
+                data, rows = await self.render_page(request)
+                return {
+                    'etag': etag,
+                    'last_modified': last_modified,
+                    'data': data,
+                    'tags': self.get_cache_tags(request, rows),
+                }
+
+            if self.response_cache is None:
+                entry = await render()
+            else:
+                entry = await self.response_cache.acompute(
+                    request, render, since=since)
+            cache_status = 'MISS'
+        else:
+            not_modified = get_conditional_response(
+                request, etag=entry['etag'],
+                last_modified=entry['last_modified'])
+            if not_modified is not None:
+                return not_modified
+            cache_status = 'HIT'
 
-from .models import BlogPost
-from .serializers import BlogPostSerializer
+        response = JsonResponse(entry['data'])
+        return self.set_entry_headers(response, entry, cache_status)
 
+    async def render_page(self, request):
+        paginator = self.pagination_class()
+        queryset = paginator.get_page_queryset(self.get_queryset(), request)
+        rows = [post async for post in queryset]
+        serializer = self.OutputSerializer(
+            paginator.paginate_rows(rows), many=True)
 
-class BlogpostListApi(APIView):
+        return paginator.get_paginated_data(serializer.data), rows
+
+
+class BlogpostSearchApi(APIView):
     """
-    View class to view all availble blog posts
+    View class to search blog posts by title and content.
+    Returns the best `?limit=` matches for `?q=`, ranked by
+    relevance, each with a snippet where matches are wrapped
+    in `<mark>` tags.
     """
 
     permission_classes = [AllowAny]
 
+    default_limit = 20
+    max_limit = 50
+
     class OutputSerializer(serializers.ModelSerializer):
         """
         Serializer class for outgoing data to avoid data issues
         """
 
+        snippet = serializers.CharField(read_only=True)
+        rank = serializers.FloatField(read_only=True)
+
         class Meta:
             model = BlogPost
-            fields = ['id', 'title', 'content', 'author',
-                      'created_at', 'updated_at', 'allow_comments', 'comments']
+            fields = ['id', 'title', 'author', 'created_at',
+                      'comment_count', 'snippet', 'rank']
 
     def get(self, request):
-        posts = BlogPost.objects.all()
-        serializer = self.OutputSerializer(posts, many=True)
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'q': 'This query parameter is required.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = max(1, min(limit, self.max_limit))
+
+        hits = get_search_backend().search(query, limit)
+        posts = BlogPost.objects.defer('content').in_bulk(
+            [hit.post_id for hit in hits])
+        results = []
+        for hit in hits:
+            post = posts.get(hit.post_id)
+            if post is None:
+                continue
+            post.snippet = hit.snippet
+            post.rank = hit.rank
+            results.append(post)
+
+        serializer = self.OutputSerializer(results, many=True)
+        return Response({'results': serializer.data}, status=status.HTTP_200_OK)
+
+
+class BlogpostDetailApi(APIView):
+    """
+    View class to view a single blog post with its full
+    content and comments
+    """
+
+    permission_classes = [AllowAny]
+
+    def get(self, request, pk):
+        queryset = plan_queryset(BlogPost.objects.all(), BlogPostSerializer)
+        post = get_object_or_404(queryset, pk=pk)
+        serializer = BlogPostSerializer(post)
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+class BlogpostExportApi(APIView):
+    """
+    View class to stream every post and comment as NDJSON with
+    constant memory.
+    Accepts `?since=<ISO datetime>` for incremental exports and
+    `?compress=gzip` to compress the stream on the fly.
+    Only accesible to `admin` users!
+    """
+
+    permission_classes = [IsAdminUser]
+
+    # rows fetched from the database at a time
+    chunk_size = 2000
+
+    def get(self, request):
+        since = request.query_params.get('since')
+        if since is not None:
+            try:
+                since = parse_since(since)
+            except ValueError:
+                return Response({'since': 'Enter a valid ISO 8601 datetime.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        stream = ndjson_stream(
+            export_records(since=since, chunk_size=self.chunk_size))
+        filename = 'blog-export.ndjson'
+        content_type = 'application/x-ndjson'
+        if request.query_params.get('compress') == 'gzip':
+            stream = gzip_stream(stream)
+            filename += '.gz'
+            content_type = 'application/gzip'
+
+        response = StreamingHttpResponse(stream, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class BlogpostCacheStatsApi(APIView):
+    """
+    View class to monitor the hit ratio of the feed cache.
+    Only accesible to `admin` users!
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(feed_cache.stats(), status=status.HTTP_200_OK)
+
+
 class BlogpostCreateApi(APIView):
     """
-    View class to create a new blog post
+    View class to create a new blog post.
+
+    A JSON array or an NDJSON body (`application/x-ndjson`) creates
+    posts in bulk: every row is validated on its own, the valid ones are
+    inserted in batches in a single transaction, and invalid rows are
+    reported by index without aborting the rest.
     """
 
     permission_classes = [AllowAny]
+    throttle_scope = 'posts.create'
+    parser_classes = [*api_settings.DEFAULT_PARSER_CLASSES, NDJSONParser]
+
+    # rows per INSERT statement in bulk mode
+    bulk_batch_size = 500
+
+    # largest number of posts accepted in one request
+    max_bulk_rows = 50000
 
     class InputSerializer(serializers.ModelSerializer):
         """
@@ -49,9 +402,136 @@ class BlogpostCreateApi(APIView):
             model = BlogPost
             fields = ['title', 'content', 'author', 'allow_comments']
 
+    class BulkInputSerializer(InputSerializer):
+        """
+        Serializer class for one row of a bulk request; authors are
+        looked up once for the whole request
+        """
+
+        author = PrefetchedAuthorField()
+
     def post(self, request):
+        if isinstance(request.data, list):
+            return self.bulk_create(request.data)
+
         serializer = self.InputSerializer(data=request.data)
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    def bulk_create(self, rows):
+        if len(rows) > self.max_bulk_rows:
+            return Response(
+                {'detail': f'At most {self.max_bulk_rows} posts can be created per request.'},
+                status=status.HTTP_400_BAD_REQUEST)
+
+        context = {'authors': self._authors_for(rows)}
+        posts = []
+        errors = []
+        for index, row in enumerate(rows):
+            serializer = self.BulkInputSerializer(data=row, context=context)
+            if serializer.is_valid():
+                posts.append(BlogPost(**serializer.validated_data))
+            else:
+                errors.append({'index': index, 'errors': serializer.errors})
+
+        if posts:
+            with transaction.atomic():
+                BlogPost.objects.bulk_create(
+                    posts, batch_size=self.bulk_batch_size)
+                # bulk_create sends no post_save signals
+                invalidate_feed(created=True)
+
+        response_data = {
+            'created': [post.id for post in posts],
+            'errors': errors,
+        }
+        response_status = (
+            status.HTTP_201_CREATED if posts else status.HTTP_400_BAD_REQUEST)
+        return Response(response_data, status=response_status)
+
+    @staticmethod
+    def _authors_for(rows):
+        ids = set()
+        for row in rows:
+            author = row.get('author') if isinstance(row, dict) else None
+            if isinstance(author, int) and not isinstance(author, bool):
+                ids.add(author)
+            elif isinstance(author, str) and author.isdigit():
+                ids.add(int(author))
+        return User.objects.in_bulk(ids) if ids else {}
+
+
+class BlogpostCommentThreadApi(APIView):
+    """
+    View class to view the comment thread of a blog post as
+    a nested reply tree.
+
+    Top level comments (or the replies of `?parent=<id>`) are
+    keyset-paginated; below them each comment includes at most
+    `replies` of its replies, down to `depth` levels. When paging
+    through replies, the chain of comments above them is included
+    as `ancestors`.
+    """
+
+    permission_classes = [AllowAny]
+    pagination_class = CommentThreadPagination
+
+    # defaults and upper bounds for the tree shape query parameters
+    default_depth = 5
+    max_depth = 50
+    default_replies = 5
+    max_replies = 50
+
+    # hard cap on the replies loaded below one page of comments
+    max_nodes = 1000
+
+    def get(self, request, pk):
+        post = get_object_or_404(
+            BlogPost.objects.only('id', 'comment_count'), pk=pk)
+        depth = self._bounded_param(
+            request, 'depth', self.default_depth, self.max_depth)
+        replies_limit = self._bounded_param(
+            request, 'replies', self.default_replies, self.max_replies)
+
+        parent = request.GET.get('parent')
+        ancestors = None
+        if parent is not None:
+            if not parent.isdigit():
+                raise NotFound('Invalid parent comment.')
+            parent = get_object_or_404(
+                Comment.objects.only('id', 'path'), blog_post=post, pk=parent)
+            # breadcrumb: one primary key lookup thanks to the path index
+            ancestors = Comment.objects.select_related('author').ancestors(
+                parent, include_self=True)
+
+        if parent is None:
+            level = Comment.objects.filter(blog_post=post, parent=None)
+        else:
+            # the parent belongs to the post, so filtering on it alone
+            # lets `comment_replies_idx` serve the page
+            level = Comment.objects.filter(parent=parent)
+        paginator = self.pagination_class()
+        roots = paginator.paginate_queryset(
+            level.select_related('author'), request, view=self)
+
+        descendants = thread_descendants(
+            roots, depth, replies_limit, self.max_nodes)
+        build_thread(roots, descendants.select_related('author'),
+                     replies_limit, self.max_nodes)
+
+        serializer = CommentThreadSerializer(roots, many=True)
+        data = paginator.get_paginated_data(serializer.data)
+        data['comment_count'] = post.comment_count
+        if ancestors is not None:
+            data['ancestors'] = CommentSerializer(ancestors, many=True).data
+        return Response(data, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def _bounded_param(request, name, default, maximum):
+        try:
+            value = int(request.GET.get(name, default))
+        except ValueError:
+            return default
+        return max(0, min(value, maximum))
@@ -0,0 +1,125 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404, JsonResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.settings import api_settings
+
+from auth_app.authentication import StatelessJWTAuthentication
+
+
+class AsyncAPIView(View):
+    """
+    Base class for read-only API views served natively under ASGI.
+
+    DRF views are synchronous, so under an ASGI server each request
+    occupies a worker thread for its whole duration. Subclasses
+    implement `async def get()` with the async ORM instead and rely on
+    this class for the parts of DRF they need: authentication,
+    permission checks and JSON error responses. DRF permission classes
+    are reused as-is.
+    """
+
+    authentication_classes = [StatelessJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+
+    def setup(self, request, *args, **kwargs):
+        super().setup(request, *args, **kwargs)
+        # lets DRF helpers (paginators, permissions) read the query string
+        request.query_params = request.GET
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            await self.perform_authentication(request)
+            self.check_permissions(request)
+            if self.throttle_classes:
+                # throttles use the sync cache API
+                await sync_to_async(self.check_throttles)(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except Http404:
+            return self.handle_exception(exceptions.NotFound())
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc)
+
+    def get_authenticators(self):
+        return [auth() for auth in self.authentication_classes]
+
+    def get_permissions(self):
+        return [permission() for permission in self.permission_classes]
+
+    async def perform_authentication(self, request):
+        request.user = AnonymousUser()
+        request.auth = None
+        self.authenticators = self.get_authenticators()
+        for authenticator in self.authenticators:
+            result = await authenticator.aauthenticate(request)
+            if result is not None:
+                request.user, request.auth = result
+                return
+
+    def check_permissions(self, request):
+        for permission in self.get_permissions():
+            if not permission.has_permission(request, self):
+                self.permission_denied(request, permission)
+
+    def check_object_permissions(self, request, obj):
+        for permission in self.get_permissions():
+            if not permission.has_object_permission(request, self, obj):
+                self.permission_denied(request, permission)
+
+    def check_throttles(self, request):
+        waits = [throttle.wait() for throttle in self.get_throttles()
+                 if not throttle.allow_request(request, self)]
+        if waits:
+            raise exceptions.Throttled(max(waits))
+
+    def get_throttles(self):
+        return [throttle() for throttle in self.throttle_classes]
+
+    def permission_denied(self, request, permission):
+        if self.authenticators and not request.user.is_authenticated:
+            raise exceptions.NotAuthenticated()
+        raise exceptions.PermissionDenied(
+            detail=getattr(permission, 'message', None),
+            code=getattr(permission, 'code', None))
+
+    def handle_exception(self, exc):
+        """
+        Renders an `APIException` the way DRF's exception handler does.
+        """
+        if isinstance(exc, (exceptions.NotAuthenticated,
+                            exceptions.AuthenticationFailed)):
+            if self.authenticators:
+                header = self.authenticators[0].authenticate_header(
+                    self.request)
+            else:
+                header = None
+            if not header:
+                exc.status_code = 403
+
+        if isinstance(exc.detail, (list, dict)):
+            data = exc.detail
+        else:
+            data = {'detail': exc.detail}
+
+        response = JsonResponse(data, status=exc.status_code, safe=False)
+        if exc.status_code == 401:
+            response['WWW-Authenticate'] = header
+        wait = getattr(exc, 'wait', None)
+        if wait:
+            response['Retry-After'] = '%d' % wait
+        return response
+
+
+def select_view(name, sync_view, async_view):
+    """
+    Returns the async variant of a route when its URL name is listed in
+    `settings.ASYNC_API_ROUTES`, otherwise the sync one, so routes can
+    be moved to the async path one at a time.
+    """
+    if name in getattr(settings, 'ASYNC_API_ROUTES', ()):
+        return async_view
+    return sync_view
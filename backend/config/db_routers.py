@@ -0,0 +1,184 @@
+import hashlib
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# app label of the model behind `DatabaseCache` tables
+DATABASE_CACHE_APP_LABEL = 'django_cache'
+
+DEFAULTS = {
+    # seconds a client's reads stay on the primary after it wrote
+    'SECONDS': 5,
+    # cookie pinning browsers
+    'COOKIE': 'db_pin',
+    # cache pinning API clients, keyed by their Authorization header
+    'CACHE': 'default',
+}
+
+
+def get_setting(name):
+    options = getattr(settings, 'REPLICA_PINNING', {}) or {}
+    return options.get(name, DEFAULTS[name])
+
+
+def get_replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', []) or []
+
+
+class RoutingState:
+    """
+    Routing state of the current request (or `use_primary()` block).
+    """
+
+    def __init__(self, pinned=False):
+        # reads go to the primary
+        self.pinned = pinned
+        # something was written, so the client gets pinned
+        self.wrote = False
+
+
+_state = ContextVar('db_routing_state', default=None)
+
+
+@contextmanager
+def use_primary():
+    """
+    Sends every read in the block to the primary, for code that must
+    not see replication lag (revocation checks, background jobs
+    deleting what they just read).
+    """
+    state = _state.get()
+    if state is None:
+        token = _state.set(RoutingState(pinned=True))
+        try:
+            yield
+        finally:
+            _state.reset(token)
+        return
+
+    # inside a request: keep recording its writes
+    pinned, state.pinned = state.pinned, True
+    try:
+        yield
+    finally:
+        state.pinned = pinned
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends writes to the primary (`default`) and reads to a random alias
+    of `settings.DATABASE_REPLICAS`, if any.
+
+    Reads stay on the primary when they can't tolerate replication lag:
+    during unsafe (writing) requests, after the current request wrote,
+    inside `use_primary()`, and for a few seconds after a client wrote
+    (read-your-writes; see `replica_pinning_middleware`).
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == DATABASE_CACHE_APP_LABEL:
+            # cache reads must see the writes made a moment ago
+            return DEFAULT_DB_ALIAS
+        replicas = get_replicas()
+        state = _state.get()
+        if not replicas or (state and (state.pinned or state.wrote)):
+            return DEFAULT_DB_ALIAS
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # related objects come from where their parent was read
+            return instance._state.db
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as the primary
+        aliases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+
+def _cache_key(request):
+    header = request.META.get('HTTP_AUTHORIZATION')
+    if not header:
+        return None
+    digest = hashlib.sha256(header.encode('utf-8')).hexdigest()
+    return f'db:pin:{digest}'
+
+
+def _start(request, pinned_by_cache):
+    pinned = (request.method not in SAFE_METHODS
+              or get_setting('COOKIE') in request.COOKIES
+              or pinned_by_cache)
+    state = RoutingState(pinned=pinned)
+    return state, _state.set(state)
+
+
+def _pin_cookie(response):
+    response.set_cookie(
+        get_setting('COOKIE'), '1', max_age=get_setting('SECONDS'),
+        httponly=True, samesite='Lax')
+    return response
+
+
+def replica_pinning_middleware(get_response):
+    """
+    Tracks whether a request wrote to the primary and, if it did, pins
+    the client's reads to the primary for `REPLICA_PINNING['SECONDS']`:
+    through a cookie, and through a cache marker keyed by the
+    `Authorization` header for API clients that ignore cookies.
+
+    Does nothing unless replicas are configured.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            if not get_replicas():
+                return await get_response(request)
+            cache = caches[get_setting('CACHE')]
+            key = _cache_key(request)
+            state, token = _start(
+                request, key is not None and await cache.aget(key) is not None)
+            try:
+                response = await get_response(request)
+            finally:
+                _state.reset(token)
+            if state.wrote:
+                if key is not None:
+                    await cache.aset(key, 1, get_setting('SECONDS'))
+                _pin_cookie(response)
+            return response
+    else:
+        def middleware(request):
+            if not get_replicas():
+                return get_response(request)
+            cache = caches[get_setting('CACHE')]
+            key = _cache_key(request)
+            state, token = _start(
+                request, key is not None and cache.get(key) is not None)
+            try:
+                response = get_response(request)
+            finally:
+                _state.reset(token)
+            if state.wrote:
+                if key is not None:
+                    cache.set(key, 1, get_setting('SECONDS'))
+                _pin_cookie(response)
+            return response
+
+    return middleware
+
+
+replica_pinning_middleware.sync_capable = True
+replica_pinning_middleware.async_capable = True
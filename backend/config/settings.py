@@ -10,9 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
+from config.sqlite import use_production_profile
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -21,9 +24,10 @@ LOG_DIR.mkdir(exist_ok=True, parents=True)
 
 # JWT settings
 SIMPLE_JWT = {
-    'ACCESS_TOKEN_LIFETIME': timedelta(days=1),  # Token expires after 1 day
+    # short-lived; clients renew through /api/auth/token/refresh/
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
-    'ROTATE_REFRESH_TOKENS': False,
+    'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'ALGORITHM': 'HS256',
     'VERIFYING_KEY': None,
@@ -65,20 +69,46 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'auth_app.authentication.StatelessJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
-    ]
+    ],
+    # token buckets for views with a `throttle_scope`, per user or per
+    # IP address (see config.throttling); '120/min' allows bursts of 120
+    # refilled at 2 per second
+    'DEFAULT_THROTTLE_CLASSES': [
+        'config.throttling.ScopedTokenBucketThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'posts.list': '120/min',
+        'posts.create': '30/hour',
+    },
 }
 
+# Cache holding the throttle buckets; must be shared by all processes
+# in production for limits to hold across workers
+THROTTLE_CACHE = 'default'
+
 # Django Axes settings
+# Failed logins are counted in the cache rather than in AccessAttempt
+# rows, separately per IP address and per username. Every failure
+# restarts the cool-off, so counters expire AXES_COOLOFF_TIME after the
+# last failure (a sliding window).
+AXES_HANDLER = 'axes.handlers.cache.AxesCacheHandler'
+# must be shared by all processes, or each one counts only the failures
+# it sees (see auth_app.checks)
+AXES_CACHE = os.environ.get('DJANGO_AXES_CACHE', 'shared')
 AXES_FAILURE_LIMIT = 5
-AXES_LOCKOUT_CALLABLE = 'rest_framework.exceptions.PermissionDenied'
+AXES_COOLOFF_TIME = timedelta(minutes=15)
+AXES_LOCKOUT_PARAMETERS = ['ip_address', 'username']
+AXES_LOCKOUT_CALLABLE = 'auth_app.lockout.lockout_response'
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # outside the session middleware so session writes pin clients too
+    'config.db_routers.replica_pinning_middleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -86,10 +116,16 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'axes.middleware.AxesMiddleware',
+    'config.throttling.rate_limit_headers_middleware',
+    # 503 instead of a 500 when the admin login finds the hashing pool full
+    'auth_app.hashers.HashingUnavailableMiddleware',
 ]
 
 # Allow all origins for now (for development ONLY)
 CORS_ALLOW_ALL_ORIGINS = True
+# let browser clients read the throttle state
+CORS_EXPOSE_HEADERS = ['RateLimit-Limit', 'RateLimit-Remaining',
+                       'RateLimit-Reset', 'Retry-After']
 
 ROOT_URLCONF = 'config.urls'
 
@@ -119,9 +155,77 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # local stand-in for a read replica; only read from when listed in
+    # DATABASE_REPLICAS
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db-replica.sqlite3',
+    },
 }
 
+# `production` applies WAL mode, busy timeouts, immediate transactions
+# and persistent connections to the SQLite databases (see config.sqlite)
+DATABASE_PROFILE = os.environ.get('DJANGO_DATABASE_PROFILE', 'development')
+if DATABASE_PROFILE == 'production':
+    use_production_profile(DATABASES)
+
+# Writes go to `default`, reads of safe requests to one of these
+# aliases, except for clients that wrote in the last
+# REPLICA_PINNING['SECONDS'] (see config.db_routers)
+DATABASE_ROUTERS = ['config.db_routers.PrimaryReplicaRouter']
+DATABASE_REPLICAS = []
+REPLICA_PINNING = {
+    'SECONDS': 5,
+    'COOKIE': 'db_pin',
+    'CACHE': 'default',
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # state every process must see, such as login failure counters (see
+    # AXES_CACHE); the database cache works without extra services, point
+    # it at Redis or Memcached through the environment for more traffic
+    'shared': {
+        'BACKEND': os.environ.get(
+            'DJANGO_SHARED_CACHE_BACKEND',
+            'django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.environ.get(
+            'DJANGO_SHARED_CACHE_LOCATION', 'shared_cache'),
+    },
+}
+
+# Worker processes serving the site (the variable gunicorn reads); with
+# more than one, the feed cache must be shared (see blog.checks)
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 1))
+
+# Response cache for the public post feed (see blog.cache)
+BLOG_FEED_CACHE = {
+    'CACHE': 'default',
+    'TIMEOUT': 60,
+}
+
+# URL names served by their async view variant (see config.async_views);
+# only worth enabling when running under an ASGI server
+ASYNC_API_ROUTES = []
+
+# Cache of per-user token versions checked on every authenticated
+# request, and of refresh tokens blacklisted after rotation (see
+# auth_app.tokens); must be shared by all processes in production
+TOKEN_VERSION_CACHE = {
+    'CACHE': 'default',
+    'TIMEOUT': 3600,
+}
+
+# dotted path of the blog.search.SearchBackend used by the post search
+BLOG_SEARCH_BACKEND = 'blog.search.SQLiteFTS5Backend'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -145,15 +249,49 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 # Hashers
-# Mainly using Argon2 for password hashing due to its security features
+# Mainly using Argon2 for password hashing due to its security features;
+# hashes run on a bounded pool off the request threads (see auth_app.hashers)
 PASSWORD_HASHERS = [
-    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'auth_app.hashers.OffloadedArgon2PasswordHasher',
     'django.contrib.auth.hashers.PBKDF2PasswordHasher',
     'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
     'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
     'django.contrib.auth.hashers.BCryptPasswordHasher',
 ]
 
+# Argon2 cost and hashing pool limits; profile the cost against the login
+# latency target with `manage.py profile_password_hashing`
+PASSWORD_HASHING = {
+    'TIME_COST': 2,
+    'MEMORY_COST': 102400,
+    'PARALLELISM': 8,
+    'MAX_WORKERS': 4,
+    'MAX_PENDING': 32,
+    'RETRY_AFTER': 1,
+}
+
+# Logins verify outdated hashes as-is and queue the upgrade to the
+# preferred hasher (see auth_app.rehash)
+AUTHENTICATION_BACKENDS = [
+    # rejects locked out clients before their password is hashed
+    'axes.backends.AxesStandaloneBackend',
+    'auth_app.backends.DeferredRehashModelBackend',
+]
+
+PASSWORD_REHASH = {
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 2.0,
+}
+
+# Deleting a user disables the account and deletes their content in
+# batches on a background thread (see users.deletion); leftover jobs
+# are resumed by the run_user_deletions command
+USER_DELETION = {
+    'BATCH_SIZE': 500,
+    'RUN_IN_BACKGROUND': True,
+    'LEASE_SECONDS': 300,
+}
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
 
@@ -0,0 +1,160 @@
+import math
+from dataclasses import dataclass
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import ScopedRateThrottle
+
+# ticks per second of the bucket arithmetic; integer microseconds keep
+# every update a plain `cache.incr()`
+TICKS = 1_000_000
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """
+    State of a bucket after a request, as sent in `RateLimit-*` headers.
+    """
+    limit: int
+    remaining: int
+    # seconds until the bucket is full again
+    reset: int
+
+    def headers(self):
+        return {
+            'RateLimit-Limit': str(self.limit),
+            'RateLimit-Remaining': str(self.remaining),
+            'RateLimit-Reset': str(self.reset),
+        }
+
+
+class ScopedTokenBucketThrottle(ScopedRateThrottle):
+    """
+    Token bucket throttle for views with a `throttle_scope`, kept per
+    user for authenticated requests and per IP address otherwise.
+
+    A rate of `'60/min'` is a bucket of 60 requests refilled at one per
+    second, so clients may burst up to the limit and then continue at
+    the sustained rate. Rates come from `DEFAULT_THROTTLE_RATES`.
+
+    Each bucket is a single integer in the cache: the time at which it
+    will be full again, in microseconds (GCRA). A request adds one
+    token's worth of time with `cache.incr()`, so the common path is
+    one atomic round trip and the database is never touched. Only an
+    idle bucket is reset with `cache.set()`; racing resets can lose an
+    increment, which lets through a few extra requests but never
+    rejects one wrongly.
+
+    The resulting limit is recorded on the request and sent back as
+    `RateLimit-*` headers by `rate_limit_headers_middleware`.
+    """
+
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'THROTTLE_CACHE', 'default')]
+
+    @property
+    def THROTTLE_RATES(self):
+        # read on every request rather than at import, like other settings
+        return api_settings.DEFAULT_THROTTLE_RATES
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = int(self.timer() * TICKS)
+        self.interval = max(1, self.duration * TICKS // self.num_requests)
+        capacity = self.num_requests * self.interval
+
+        try:
+            self.full_at = self.cache.incr(self.key, self.interval)
+        except ValueError:
+            self.full_at = None
+
+        if self.full_at is None or self.full_at - self.interval < self.now:
+            # missing or idle bucket: full again one interval from now
+            self.full_at = self.now + self.interval
+            self.cache.set(self.key, self.full_at, self.duration)
+        elif self.full_at - self.now > capacity:
+            # rejected requests don't use up a token
+            self.full_at = self.cache.decr(self.key, self.interval)
+            self.cache.touch(self.key, self.duration)
+            self.record(request)
+            return self.throttle_failure()
+        elif self.full_at - self.now > capacity // 2:
+            # `incr()` keeps the expiry set on reset; extend it while the
+            # bucket is more than half empty so it can't expire (and
+            # refill) early
+            self.cache.touch(self.key, self.duration)
+
+        self.record(request)
+        return self.throttle_success()
+
+    def throttle_success(self):
+        return True
+
+    def record(self, request):
+        """
+        Keeps the most restrictive limit applied to the request.
+        """
+        waited = self.full_at - self.now
+        rate_limit = RateLimit(
+            limit=self.num_requests,
+            remaining=max(0, self.num_requests - math.ceil(
+                waited / self.interval)),
+            reset=max(0, math.ceil(waited / TICKS)),
+        )
+        request = getattr(request, '_request', request)
+        current = getattr(request, 'rate_limit', None)
+        if current is None or rate_limit.remaining < current.remaining:
+            request.rate_limit = rate_limit
+
+    def wait(self):
+        """
+        Returns the seconds until the bucket holds a token again.
+        """
+        capacity = self.num_requests * self.interval
+        return max(0, self.full_at + self.interval - capacity - self.now
+                   ) / TICKS
+
+
+def rate_limit_headers_middleware(get_response):
+    """
+    Adds the `RateLimit-*` headers of the limit recorded by
+    `ScopedTokenBucketThrottle` to the response, for sync and async
+    views alike.
+    """
+
+    def add_headers(request, response):
+        rate_limit = getattr(request, 'rate_limit', None)
+        if rate_limit is not None:
+            for header, value in rate_limit.headers().items():
+                response[header] = value
+        return response
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            return add_headers(request, await get_response(request))
+    else:
+        def middleware(request):
+            return add_headers(request, get_response(request))
+
+    return middleware
+
+
+rate_limit_headers_middleware.sync_capable = True
+rate_limit_headers_middleware.async_capable = True
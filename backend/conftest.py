@@ -0,0 +1,27 @@
+import pytest
+
+# Number of queries each endpoint may issue per request, regardless of
+# how many posts, comments or authors exist. Keyed by URL name, with a
+# suffix for the variants of an endpoint that query differently.
+QUERY_BUDGETS = {
+    'post-list': 2,  # validators + page, on a cache miss
+    'post-comments': 3,
+    'post-comments-parent': 5,  # + parent and its ancestors
+    'post-detail': 2,
+    'post-search': 2,  # ranked ids + posts
+    'post-export': 2,  # posts + comments, streamed
+    'user-list': 3,  # users + post ids + comment ids
+    'user-list-counts': 1,
+    'user-detail': 5,  # user + ETag validators + posts + comments
+}
+
+
+@pytest.fixture
+def assert_query_budget(django_assert_num_queries):
+    """
+    Fixture asserting that a request stays within the query
+    budget declared for its endpoint in `QUERY_BUDGETS`.
+    """
+    def check(name):
+        return django_assert_num_queries(QUERY_BUDGETS[name])
+    return check
@@ -1,3 +1,12 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import UserDeletionJob
+
+
+@admin.register(UserDeletionJob)
+class UserDeletionJobAdmin(admin.ModelAdmin):
+    list_display = ('username', 'status', 'replies_deleted',
+                    'comments_deleted', 'posts_deleted', 'created_at',
+                    'finished_at')
+    list_filter = ('status',)
+    readonly_fields = [field.name for field in UserDeletionJob._meta.fields]
@@ -0,0 +1,230 @@
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from blog.fast_delete import fast_delete_comments, fast_delete_posts
+from blog.models import BlogPost, Comment
+from config.db_routers import use_primary
+
+from .models import UserDeletionJob
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    # rows deleted per write transaction
+    'BATCH_SIZE': 500,
+    # run jobs on a background thread; when False they run inline once
+    # the scheduling transaction commits
+    'RUN_IN_BACKGROUND': True,
+    # seconds after which a running job that saved no progress is
+    # considered abandoned by a stopped process and may be taken over
+    'LEASE_SECONDS': 300,
+}
+
+# subtrees looked up per query; each adds a range to its WHERE clause
+SUBTREES_PER_QUERY = 100
+
+
+def get_setting(name):
+    options = getattr(settings, 'USER_DELETION', {}) or {}
+    return options.get(name, DEFAULTS[name])
+
+
+def schedule_deletion(user, requested_by=None):
+    """
+    Disables `user` right away and queues the deletion of their content
+    and account, returning the job.
+
+    Saving the user with `is_active=False` drops their cached token
+    version (see auth_app.signals), so every token they hold is
+    rejected from the next request on.
+    """
+    if user.is_active:
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+    job, _ = UserDeletionJob.objects.get_or_create(
+        user=user, defaults={
+            'username': user.username,
+            'requested_by_id': getattr(requested_by, 'pk', None),
+        })
+    transaction.on_commit(deletion_runner.submit)
+    return job
+
+
+def claimable():
+    """
+    Returns the filter matching jobs a runner may take: pending ones,
+    running ones whose runner hasn't saved progress (which every batch
+    does) within the lease, and failed ones once the lease has passed
+    since they failed, so a disabled user is never left half deleted.
+    """
+    expired = timezone.now() - timedelta(seconds=get_setting('LEASE_SECONDS'))
+    return (Q(status=UserDeletionJob.Status.PENDING)
+            | Q(status__in=[UserDeletionJob.Status.RUNNING,
+                            UserDeletionJob.Status.FAILED],
+                updated_at__lt=expired))
+
+
+def claim_job(job):
+    """
+    Marks `job` as running if it is still claimable, in one conditional
+    UPDATE, so two runners (the background thread of two processes, or
+    the `run_user_deletions` command next to them) never both run it.
+    Returns whether this runner got it.
+    """
+    claimed = UserDeletionJob.objects.filter(claimable(), pk=job.pk).update(
+        status=UserDeletionJob.Status.RUNNING, updated_at=timezone.now())
+    if claimed:
+        # resume from the progress the previous runner saved
+        job.refresh_from_db()
+    return claimed == 1
+
+
+def run_job(job):
+    """
+    Claims `job` and runs it, unless it is finished or another runner
+    holds it; returns the job.
+    """
+    if claim_job(job):
+        _run_claimed(job)
+    return job
+
+
+def _run_claimed(job):
+    """
+    Deletes everything owned by the job's user in batches, deepest
+    rows first, then the user. Each batch is its own short transaction
+    and records its progress on the job, so writers are only blocked
+    for one batch at a time and an interrupted job can simply be run
+    again.
+
+    Deleting replies before their parents and comments before their
+    posts leaves nothing to cascade into, so every batch is a bounded,
+    set-based delete (see `blog.fast_delete`) that adjusts comment
+    counters and the feed cache with a few statements, whatever the
+    number of rows.
+    """
+    try:
+        # batches are picked by reading what is left, which a lagging
+        # replica would keep returning
+        with use_primary():
+            if job.user_id is not None:
+                _delete_content(job, job.user_id)
+                User.objects.filter(pk=job.user_id).delete()
+    except Exception as exc:
+        job.status = UserDeletionJob.Status.FAILED
+        job.error = repr(exc)
+        job.save(update_fields=['status', 'error', 'updated_at'])
+        raise
+
+    job.status = UserDeletionJob.Status.DONE
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'finished_at', 'updated_at'])
+
+
+def _delete_content(job, user_id):
+    batch_size = get_setting('BATCH_SIZE')
+
+    # replies below the user's comments, for a page of comments at a
+    # time (each subtree is a range of the `path` index); a reply's path
+    # sorts after its parent's, so descending paths delete leaves first
+    last_id = 0
+    while True:
+        roots = list(Comment.objects.filter(
+            author_id=user_id, pk__gt=last_id,
+        ).order_by('pk').only('pk', 'path')[:SUBTREES_PER_QUERY])
+        if not roots:
+            break
+        _delete_batches(job, 'replies_deleted', Comment.objects.subtrees(
+            roots).order_by('-path'), batch_size)
+        last_id = roots[-1].pk
+
+    # the user's comments and every comment on their posts
+    _delete_batches(job, 'comments_deleted', Comment.objects.filter(
+        Q(author_id=user_id) | Q(blog_post__author_id=user_id),
+    ).order_by('-path'), batch_size)
+
+    _delete_batches(job, 'posts_deleted', BlogPost.objects.filter(
+        author_id=user_id).order_by('pk'), batch_size)
+
+
+def _delete_batches(job, progress_field, queryset, batch_size):
+    model = queryset.model
+    while True:
+        pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return
+        with transaction.atomic():
+            batch = model.objects.filter(pk__in=pks)
+            if model is Comment:
+                deleted = fast_delete_comments(batch)
+            else:
+                deleted, _ = fast_delete_posts(batch)
+            setattr(job, progress_field,
+                    getattr(job, progress_field) + deleted)
+            job.save(update_fields=[progress_field, 'updated_at'])
+
+
+def run_unfinished_jobs():
+    """
+    Runs every pending job, and resumes the ones left running by a
+    process that stopped; returns the number of jobs run.
+    """
+    jobs = UserDeletionJob.objects.filter(claimable()).order_by('created_at')
+    ran = 0
+    for job in jobs:
+        if claim_job(job):
+            _run_claimed(job)
+            ran += 1
+    return ran
+
+
+class DeletionRunner:
+    """
+    Runs deletion jobs on a daemon thread, woken whenever a job is
+    scheduled.
+
+    Jobs are rows, so none is lost if the process stops; the
+    `run_user_deletions` command picks up whatever is left.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.worker = None
+
+    def submit(self):
+        if not get_setting('RUN_IN_BACKGROUND'):
+            run_unfinished_jobs()
+            return
+        self._ensure_worker()
+        self.wakeup.set()
+
+    def _ensure_worker(self):
+        with self.lock:
+            if self.worker and self.worker.is_alive():
+                return
+            self.worker = threading.Thread(
+                target=self._run, name='user-deletion', daemon=True)
+            self.worker.start()
+
+    def _run(self):
+        while True:
+            self.wakeup.wait()
+            self.wakeup.clear()
+            try:
+                run_unfinished_jobs()
+            except Exception:
+                logger.exception('User deletion job failed')
+            finally:
+                # the worker outlives requests; don't keep a connection
+                connection.close()
+
+
+deletion_runner = DeletionRunner()
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from users.deletion import run_unfinished_jobs
+from users.models import UserDeletionJob
+
+
+class Command(BaseCommand):
+    help = ('Runs pending user deletion jobs and resumes the ones '
+            'interrupted by a stopped process.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retry-failed', action='store_true',
+            help='Run failed jobs again as well.')
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            UserDeletionJob.objects.filter(
+                status=UserDeletionJob.Status.FAILED,
+            ).update(status=UserDeletionJob.Status.PENDING, error='')
+        ran = run_unfinished_jobs()
+        self.stdout.write(self.style.SUCCESS(f'Ran {ran} deletion job(s).'))
@@ -1,3 +1,44 @@
+from django.contrib.auth.models import User
 from django.db import models
 
-# Create your models here.
+
+class UserDeletionJob(models.Model):
+    """
+    Model tracking the background deletion of a disabled user and
+    everything they own (see users.deletion)
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'pending'
+        RUNNING = 'running'
+        DONE = 'done'
+        FAILED = 'failed'
+
+    # cleared when the user row itself is finally deleted
+    user = models.OneToOneField(
+        User, on_delete=models.SET_NULL, null=True,
+        related_name='deletion_job')
+    username = models.CharField(max_length=150)
+    requested_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, related_name='+')
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING)
+    # progress, updated after every batch
+    replies_deleted = models.PositiveIntegerField(default=0)
+    comments_deleted = models.PositiveIntegerField(default=0)
+    posts_deleted = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # unfinished jobs, oldest first
+            models.Index(fields=['created_at'],
+                         condition=models.Q(status__in=['pending', 'running']),
+                         name='userdeletion_unfinished_idx'),
+        ]
+
+    def __str__(self):
+        return f'Deletion of {self.username} ({self.status})'
@@ -11,5 +11,7 @@ class IsOwnerOrAdmin(permissions.BasePermission):
         # Admin users have full access
         if request.user and request.user.is_staff:
             return True
-        # Non-admin users can only ascces their own data
-        return obj == request.user
+        # Non-admin users can only ascces their own data; compared by
+        # pk since `request.user` may be a token-backed `TokenUser`
+        return bool(request.user and request.user.is_authenticated
+                    and obj.pk == request.user.pk)
@@ -3,6 +3,8 @@ from rest_framework.validators import UniqueValidator
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 
+from auth_app.tokens import revoke_tokens
+
 
 class UserSerializer(serializers.ModelSerializer):
     blog_posts = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
@@ -13,6 +15,21 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email', 'blog_posts', 'comments']
 
 
+class UserCountsSerializer(serializers.ModelSerializer):
+    """
+    Serializer listing a user with the number of their posts and
+    comments instead of their ids.
+    Expects the `blog_post_count` and `comment_count` annotations.
+    """
+    blog_post_count = serializers.IntegerField(read_only=True)
+    comment_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'email',
+                  'blog_post_count', 'comment_count']
+
+
 class UserUpdateSerializer(serializers.ModelSerializer):
     """
     Serializer for updating user information.
@@ -89,4 +106,9 @@ class UserUpdateSerializer(serializers.ModelSerializer):
                 )
 
         instance.save()
+
+        # tokens must not outlive a password change, so make the user
+        # sign in again; admin flag changes are revoked on save
+        if password:
+            revoke_tokens(instance)
         return instance
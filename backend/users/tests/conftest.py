@@ -1,8 +1,20 @@
 import pytest
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from rest_framework.test import APIClient
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    Fixture to start every test with an empty cache, since cached
+    token versions outlive the test database transaction.
+    """
+    cache.clear()
+    yield
+    cache.clear()
+
+
 @pytest.fixture
 def api_client() -> APIClient:
     """
@@ -21,7 +33,8 @@ def create_user(db) -> User:
     """
     def make_user(**kwargs):
         username = kwargs.get('username', 'testuser')
-        email = kwargs.get('email', 'testuser@example.com')
+        # emails are unique, so derive the default from the username
+        email = kwargs.get('email', f'{username}@example.com')
         password = kwargs.get('password', 'testpassword1234!')
         user = User.objects.create_user(
             username=username, email=email, password=password)
@@ -36,7 +49,7 @@ def create_admin_user(db) -> User:
     """
     def make_admin_user(**kwargs):
         username = kwargs.get('username', 'admin')
-        email = kwargs.get('email', 'admin@example.com')
+        email = kwargs.get('email', f'{username}@example.com')
         password = kwargs.get('password', 'adminpassword1234!')
         admin_user = User.objects.create_superuser(
             username=username, email=email, password=password)
@@ -0,0 +1,204 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from auth_app.tokens import REVOKED, get_token_version
+from blog.models import BlogPost, Comment
+from users.deletion import claim_job, run_job, schedule_deletion
+from users.models import UserDeletionJob
+
+
+@pytest.fixture
+def inline_deletion(settings):
+    """
+    Fixture to run deletion jobs synchronously, in small batches.
+    """
+    settings.USER_DELETION = {'BATCH_SIZE': 2, 'RUN_IN_BACKGROUND': False}
+
+
+@pytest.fixture
+def doomed(create_user):
+    """
+    Fixture to provide a user owning a post with a reply chain from
+    other users, plus a comment with replies on someone else's post.
+    """
+    user = create_user(username='doomed')
+    other = create_user(username='other')
+
+    own_post = BlogPost.objects.create(title='t', content='c', author=user)
+    parent = None
+    for i in range(5):
+        parent = Comment.objects.create(
+            blog_post=own_post, author=other if i % 2 else user,
+            content=f'reply {i}', parent=parent)
+
+    other_post = BlogPost.objects.create(title='t', content='c', author=other)
+    kept = Comment.objects.create(
+        blog_post=other_post, author=other, content='kept')
+    comment = Comment.objects.create(
+        blog_post=other_post, author=user, content='doomed', parent=kept)
+    reply = Comment.objects.create(
+        blog_post=other_post, author=other, content='reply', parent=comment)
+    Comment.objects.create(
+        blog_post=other_post, author=other, content='nested', parent=reply)
+    return user, other, other_post, kept
+
+
+@pytest.mark.django_db
+class TestUserDeletion:
+    """
+    Tests for the soft-disable and batched background deletion of users
+    """
+
+    def test_schedule_disables_user_and_revokes_tokens(self, doomed):
+        user, *_ = doomed
+
+        job = schedule_deletion(user)
+
+        user.refresh_from_db()
+        assert user.is_active is False
+        assert job.status == UserDeletionJob.Status.PENDING
+        assert get_token_version(user.pk) == REVOKED
+        # nothing is deleted until the job runs
+        assert BlogPost.objects.filter(author=user).exists()
+
+    def test_job_deletes_content_in_dependency_order(
+            self, doomed, inline_deletion):
+        user, other, other_post, kept = doomed
+        job = schedule_deletion(user)
+
+        run_job(job)
+
+        job.refresh_from_db()
+        assert job.status == UserDeletionJob.Status.DONE
+        assert job.finished_at is not None
+        assert job.user is None
+        assert (job.replies_deleted, job.comments_deleted,
+                job.posts_deleted) == (6, 2, 1)
+        assert not User.objects.filter(username='doomed').exists()
+        assert list(Comment.objects.values_list('pk', flat=True)) == [kept.pk]
+        assert list(BlogPost.objects.all()) == [other_post]
+        other_post.refresh_from_db()
+        kept.refresh_from_db()
+        assert other_post.comment_count == 1
+        assert kept.reply_count == 0
+
+    def test_finished_job_is_not_run_again(self, doomed, inline_deletion):
+        user, *_ = doomed
+        job = run_job(schedule_deletion(user))
+
+        assert run_job(job).status == UserDeletionJob.Status.DONE
+
+    def test_running_job_is_not_claimed_twice(self, doomed, inline_deletion):
+        user, *_ = doomed
+        job = schedule_deletion(user)
+        # another runner holds the job and is still saving progress
+        assert claim_job(job) is True
+
+        assert claim_job(job) is False
+        assert run_job(job).status == UserDeletionJob.Status.RUNNING
+        assert User.objects.filter(pk=user.pk).exists()
+
+    def test_abandoned_job_is_taken_over(self, doomed, inline_deletion):
+        user, *_ = doomed
+        job = schedule_deletion(user)
+        UserDeletionJob.objects.filter(pk=job.pk).update(
+            status=UserDeletionJob.Status.RUNNING, replies_deleted=1,
+            updated_at=timezone.now() - timedelta(seconds=301))
+
+        run_job(job)
+
+        assert job.status == UserDeletionJob.Status.DONE
+        # resumed from the saved progress
+        assert job.replies_deleted == 7
+        assert not User.objects.filter(pk=user.pk).exists()
+
+    def test_failed_job_is_retried_after_the_lease(self, doomed,
+                                                   inline_deletion):
+        user, *_ = doomed
+        job = schedule_deletion(user)
+        UserDeletionJob.objects.filter(pk=job.pk).update(
+            status=UserDeletionJob.Status.FAILED, error='boom')
+        # too soon: the failure may not be transient
+        assert run_job(job).status == UserDeletionJob.Status.PENDING
+        UserDeletionJob.objects.filter(pk=job.pk).update(
+            updated_at=timezone.now() - timedelta(seconds=301))
+
+        run_job(job)
+
+        assert job.status == UserDeletionJob.Status.DONE
+        assert not User.objects.filter(pk=user.pk).exists()
+
+    def test_batch_cost_does_not_grow_with_rows(self, create_user,
+                                                settings):
+        settings.USER_DELETION = {'BATCH_SIZE': 100,
+                                  'RUN_IN_BACKGROUND': False}
+
+        def queries_to_delete(count):
+            user = create_user(username=f'doomed{count}')
+            post = BlogPost.objects.create(
+                title='t', content='c', author=user)
+            parent = Comment.objects.create(
+                blog_post=post, author=user, content='parent')
+            Comment.objects.bulk_create([
+                Comment(blog_post=post, author=user, content=f'c{i}',
+                        parent=parent, path=parent.subtree_path)
+                for i in range(count)])
+            job = schedule_deletion(user)
+            with CaptureQueriesContext(connection) as context:
+                run_job(job)
+            assert job.replies_deleted + job.comments_deleted == count + 1
+            return len(context.captured_queries)
+
+        # one batch either way
+        assert queries_to_delete(5) == queries_to_delete(50)
+
+    def test_delete_view_runs_job_after_commit(
+            self, admin_authenticated_client, doomed, inline_deletion,
+            django_capture_on_commit_callbacks):
+        user, *_ = doomed
+        url = reverse('user-delete', kwargs={'pk': user.id})
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = admin_authenticated_client.delete(url)
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert not User.objects.filter(pk=user.pk).exists()
+        job = UserDeletionJob.objects.get(pk=response.data['job'])
+        assert job.status == UserDeletionJob.Status.DONE
+        assert job.requested_by.username == 'admin'
+
+    def test_deleting_twice_reuses_the_job(self, admin_authenticated_client,
+                                           doomed):
+        user, *_ = doomed
+        url = reverse('user-delete', kwargs={'pk': user.id})
+
+        first = admin_authenticated_client.delete(url)
+        second = admin_authenticated_client.delete(url)
+
+        assert first.data['job'] == second.data['job']
+
+    def test_command_runs_unfinished_jobs(self, doomed, capsys):
+        user, *_ = doomed
+        schedule_deletion(user)
+
+        call_command('run_user_deletions')
+
+        assert not User.objects.filter(pk=user.pk).exists()
+        assert 'Ran 1 deletion job(s).' in capsys.readouterr().out
+
+    def test_command_skips_jobs_held_by_a_runner(self, doomed, capsys):
+        user, *_ = doomed
+        claim_job(schedule_deletion(user))
+
+        call_command('run_user_deletions')
+
+        assert User.objects.filter(pk=user.pk).exists()
+        assert 'Ran 0 deletion job(s).' in capsys.readouterr().out
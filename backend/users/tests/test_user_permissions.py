@@ -1,6 +1,7 @@
 import pytest
 from django.contrib.auth.models import AnonymousUser, User
 from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.models import TokenUser
 
 from backend.users.permissions import IsOwnerOrAdmin
 
@@ -78,3 +79,16 @@ class TestIsOwnerOrAdmin:
 
         assert self.permission.has_object_permission(
             request, None, dummy_user) is False
+
+    def test_token_user_owner_has_access(self, create_user):
+        """
+        Owners authenticated from token claims are matched by pk.
+        """
+        user = create_user(username='john_doe')
+        request = self.factory.get('/')
+        request.user = TokenUser({'user_id': user.pk})
+
+        assert self.permission.has_object_permission(
+            request, None, user) is True
+        assert self.permission.has_object_permission(
+            request, None, User(pk=user.pk + 1)) is False
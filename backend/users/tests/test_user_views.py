@@ -1,8 +1,16 @@
+import json
+
 import pytest
-from django.urls import reverse
+from asgiref.sync import async_to_sync
+from django.urls import reverse, reverse_lazy
 from django.contrib.auth.models import User
+from django.test import AsyncRequestFactory
 from rest_framework import status
 
+from auth_app.tokens import issue_token, revoke_tokens
+from blog.models import BlogPost, Comment
+from users.views import UserDetailAsyncApi, UserListAsyncApi
+
 from backend.users.tests.conftest import admin_authenticated_client
 
 
@@ -116,5 +124,254 @@ class TestUserViews:
         url = reverse('user-delete', kwargs={'pk': user.id})
 
         response = admin_authenticated_client.delete(url)
-        assert response.status_code == status.HTTP_204_NO_CONTENT
-        assert not User.objects.filter(username='remove_me').exists()
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data['status'] == 'pending'
+        # disabled now, deleted by the background job
+        user.refresh_from_db()
+        assert user.is_active is False
+        assert user.deletion_job.pk == response.data['job']
+
+    def test_user_detail_supports_etag_revalidation(self, authenticated_client,
+                                                    create_user):
+        """
+        A client can revalidate user details with `If-None-Match`.
+        """
+        user = create_user(username='etag_user')
+        url = reverse('user-detail', kwargs={'pk': user.id})
+        authenticated_client.force_authenticate(user=user)
+
+        etag = authenticated_client.get(url)['ETag']
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+        BlogPost.objects.create(title='new', content='post', author=user)
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data.get('blog_posts') == [
+            BlogPost.objects.get().id]
+
+    def test_user_detail_stays_within_query_budget(self, authenticated_client,
+                                                   create_user,
+                                                   assert_query_budget):
+        user = create_user(username='busy')
+        for i in range(5):
+            post = BlogPost.objects.create(
+                title=f't{i}', content='c', author=user)
+            Comment.objects.create(blog_post=post, author=user, content='c')
+        url = reverse('user-detail', kwargs={'pk': user.id})
+        authenticated_client.force_authenticate(user=user)
+
+        with assert_query_budget('user-detail'):
+            response = authenticated_client.get(url)
+
+        assert len(response.data['comments']) == 5
+
+    def test_etag_is_not_checked_before_permissions(self, authenticated_client,
+                                                    create_user):
+        """
+        A matching `If-None-Match` must not bypass object permissions.
+        """
+        owner = create_user(username='owner')
+        other = create_user(username='other')
+        url = reverse('user-detail', kwargs={'pk': owner.id})
+        authenticated_client.force_authenticate(user=owner)
+        etag = authenticated_client.get(url)['ETag']
+
+        authenticated_client.force_authenticate(user=other)
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+class TestUserListApi:
+    """
+    Tests for the keyset-paginated user list and its `?counts=` option
+    """
+
+    url = reverse_lazy('user-list')
+
+    def test_pages_follow_the_cursor(self, admin_authenticated_client,
+                                     create_user):
+        users = [create_user(username=f'user{i}') for i in range(4)]
+        ids = sorted([u.id for u in users] + [
+            User.objects.get(username='admin').id])
+
+        first = admin_authenticated_client.get(self.url, {'page_size': 3})
+        second = admin_authenticated_client.get(first.data['next'])
+
+        assert 'count' not in first.data
+        assert [u['id'] for u in first.data['results']] == ids[:3]
+        assert [u['id'] for u in second.data['results']] == ids[3:]
+        assert second.data['next'] is None
+
+    def test_lists_post_and_comment_ids(self, admin_authenticated_client,
+                                        create_user):
+        user = create_user()
+        post = BlogPost.objects.create(title='t', content='c', author=user)
+        comment = Comment.objects.create(
+            blog_post=post, author=user, content='c')
+
+        response = admin_authenticated_client.get(self.url)
+
+        listed = response.data['results'][-1]
+        assert listed['blog_posts'] == [post.id]
+        assert listed['comments'] == [comment.id]
+
+    def test_related_rows_are_fetched_as_bare_ids(
+            self, admin_authenticated_client, create_user,
+            assert_query_budget):
+        user = create_user()
+        for i in range(5):
+            BlogPost.objects.create(
+                title=f't{i}', content='long content', author=user)
+
+        with assert_query_budget('user-list') as captured:
+            admin_authenticated_client.get(self.url)
+
+        sql = ' '.join(q['sql'] for q in captured.captured_queries)
+        assert '"content"' not in sql and '"password"' not in sql
+        assert 'COUNT(' not in sql and 'OFFSET' not in sql
+
+    def test_counts_replace_id_lists(self, admin_authenticated_client,
+                                     create_user, assert_query_budget):
+        user = create_user()
+        post = BlogPost.objects.create(title='t', content='c', author=user)
+        for _ in range(2):
+            Comment.objects.create(blog_post=post, author=user, content='c')
+
+        with assert_query_budget('user-list-counts'):
+            response = admin_authenticated_client.get(
+                self.url, {'counts': 'true'})
+
+        listed = response.data['results'][-1]
+        assert listed == {
+            'id': user.id, 'username': user.username, 'email': user.email,
+            'blog_post_count': 1, 'comment_count': 2,
+        }
+        assert response.data['results'][0]['blog_post_count'] == 0
+
+    @pytest.mark.parametrize('cursor', [
+        'not-a-cursor',
+        'W251bGxd',  # [null]
+    ])
+    def test_invalid_cursor_returns_404(self, admin_authenticated_client,
+                                        cursor):
+        response = admin_authenticated_client.get(
+            self.url, {'cursor': cursor})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestUserAsyncViews:
+    """
+    Tests for the async variants of the user list and detail views,
+    authenticated with real JWTs
+    """
+
+    def get(self, view, user=None, headers=None, data=None, **kwargs):
+        headers = dict(headers or {})
+        if user is not None:
+            token = issue_token(user).access_token
+            headers['Authorization'] = f'Bearer {token}'
+        request = AsyncRequestFactory().get('/', data, headers=headers)
+        return async_to_sync(view.as_view())(request, **kwargs)
+
+    def test_admin_can_list_users(self, create_admin_user, create_user):
+        admin = create_admin_user()
+        create_user()
+
+        response = self.get(UserListAsyncApi, admin)
+
+        assert response.status_code == status.HTTP_200_OK
+        data = json.loads(response.content)
+        assert data['next'] is None
+        assert [user['id'] for user in data['results']] == sorted(
+            user.id for user in User.objects.all())
+
+    def test_admin_can_list_user_counts(self, create_admin_user, create_user):
+        admin = create_admin_user()
+        user = create_user()
+        BlogPost.objects.create(title='t', content='c', author=user)
+
+        response = self.get(UserListAsyncApi, admin, data={'counts': 'true'})
+
+        results = json.loads(response.content)['results']
+        assert [(u['id'], u['blog_post_count']) for u in results] == [
+            (admin.id, 0), (user.id, 1)]
+
+    def test_non_admin_cannot_list_users(self, create_user):
+        response = self.get(UserListAsyncApi, create_user())
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_missing_token_is_unauthorized(self, db):
+        response = self.get(UserListAsyncApi)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response['WWW-Authenticate'] == 'Bearer realm="api"'
+
+    def test_invalid_token_is_unauthorized(self, db):
+        response = self.get(UserListAsyncApi, headers={
+            'Authorization': 'Bearer not-a-token'})
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_revoked_token_is_unauthorized(
+            self, create_user, django_capture_on_commit_callbacks):
+        user = create_user()
+        token = issue_token(user).access_token
+        headers = {'Authorization': f'Bearer {token}'}
+        assert self.get(UserDetailAsyncApi, headers=headers,
+                        pk=user.id).status_code == status.HTTP_200_OK
+
+        with django_capture_on_commit_callbacks(execute=True):
+            revoke_tokens(user)
+        response = self.get(UserDetailAsyncApi, headers=headers, pk=user.id)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert json.loads(response.content)['code'] == 'token_revoked'
+
+    def test_user_detail_matches_sync_view(self, api_client, create_user):
+        user = create_user()
+        post = BlogPost.objects.create(title='t', content='c', author=user)
+        url = reverse('user-detail', kwargs={'pk': user.id})
+        api_client.force_authenticate(user=user)
+        expected = api_client.get(url)
+
+        response = self.get(UserDetailAsyncApi, user, pk=user.id)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] == expected['ETag']
+        assert json.loads(response.content)['blog_posts'] == [post.id]
+
+    def test_user_detail_stays_within_query_budget(self, create_user,
+                                                   assert_query_budget):
+        user = create_user(username='busy')
+        for i in range(5):
+            post = BlogPost.objects.create(
+                title=f't{i}', content='c', author=user)
+            Comment.objects.create(blog_post=post, author=user, content='c')
+        headers = {'Authorization': f'Bearer {issue_token(user).access_token}'}
+
+        with assert_query_budget('user-detail'):
+            response = self.get(UserDetailAsyncApi, headers=headers,
+                                pk=user.id)
+
+        assert len(json.loads(response.content)['comments']) == 5
+
+    def test_user_cannot_view_other_user_details(self, create_user):
+        owner = create_user(username='owner', email='owner@example.com')
+        other = create_user(username='other', email='other@example.com')
+
+        response = self.get(UserDetailAsyncApi, other, pk=owner.id)
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_missing_user_returns_404(self, create_admin_user):
+        admin = create_admin_user()
+
+        response = self.get(UserDetailAsyncApi, admin, pk=admin.id + 1)
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -1,9 +1,21 @@
 from django.urls import path
-from users.views import UserDetailApi, UserListApi, UserUpdateApi, UserDeleteApi
+from config.async_views import select_view
+from users.views import (
+    UserDetailApi,
+    UserDetailAsyncApi,
+    UserListApi,
+    UserListAsyncApi,
+    UserUpdateApi,
+    UserDeleteApi,
+)
 
 urlpatterns = [
-    path('users/', UserListApi.as_view(), name='user-list'),
-    path('users/<int:pk>/', UserDetailApi.as_view(), name='user-detail'),
+    path('users/', select_view(
+        'user-list', UserListApi.as_view(), UserListAsyncApi.as_view()),
+        name='user-list'),
+    path('users/<int:pk>/', select_view(
+        'user-detail', UserDetailApi.as_view(), UserDetailAsyncApi.as_view()),
+        name='user-detail'),
     path('users/<int:pk>/update/', UserUpdateApi.as_view(), name='user-update'),
     path('users/<int:pk>/delete/', UserDeleteApi.as_view(), name='user-delete'),
 ]
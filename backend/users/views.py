@@ -1,45 +1,81 @@
 from calendar import c
 from rest_framework import generics, permissions, status
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 from django.contrib.auth.models import User
 from django.db import transaction
+from django.db.models import Count, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+import hashlib
 import logging
 
-from .serializers import UserSerializer, UserUpdateSerializer
+from blog.models import BlogPost, Comment
+from blog.pagination import KeysetPagination
+from blog.query_planning import plan_queryset
+from config.async_views import AsyncAPIView
+
+from .deletion import schedule_deletion
+from .serializers import (
+    UserCountsSerializer, UserSerializer, UserUpdateSerializer)
 from .permissions import IsOwnerOrAdmin
 
 # Initialize logger for this file
 logger = logging.getLogger(__name__)
 
 
-class UserPagination(PageNumberPagination):
+# size, newest id and id sum of a set of rows: changes whenever a row
+# is added or removed, without loading the rows
+ID_STATS = {'total': Count('id'), 'newest': Max('id'), 'checksum': Sum('id')}
+
+
+def user_etag(user, post_stats, comment_stats):
+    """
+    Builds the validator of a user's detail from the user row plus the
+    `ID_STATS` of their posts and comments, i.e. from everything
+    `UserSerializer` renders.
+    """
+    source = repr((
+        user.pk, user.username, user.email,
+        sorted(post_stats.items()),
+        sorted(comment_stats.items()),
+    ))
+    return quote_etag(hashlib.sha256(source.encode('utf-8')).hexdigest())
+
+
+class UserPagination(KeysetPagination):
     """
-    Custom pagination class for user profiles
+    Keyset pagination class for user profiles, oldest accounts first
     """
 
+    ordering = ('id',)
+
     # number of user objects per page
     page_size = 10
 
-    # query parameter for retrieving the next set of user objects
-    page_size_query_param = 'page_size'
-
     # Maximum number of user objects that can be retrieved per page
     max_page_size = 100
 
 
-class UserListApi(generics.ListAPIView):
+def count_by_author(model):
     """
-    API view to retrieve a paginated list of all
-    users.
-    Only accesible to `admin` users!
+    Number of `model` rows written by the outer user, as a correlated
+    subquery on the model's author index.
     """
+    rows = model.objects.filter(author=OuterRef('pk')).order_by().values(
+        'author').annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(rows), 0)
 
-    # order users by id and prefetch related blog posts and comments
-    # to reduce the number of queries
-    queryset = User.objects.all().order_by(
-        'id').prefetch_related('blog_posts', 'comments')
-    serializer_class = UserSerializer
+
+class UserListMixin:
+    """
+    Shared parts of the sync and async user list views.
+
+    Users come with the ids of their posts and comments, prefetched as
+    bare ids, or with `?counts=true` just the number of each.
+    """
 
     # restrict access to admin users
     permission_classes = [permissions.IsAdminUser]
@@ -47,16 +83,128 @@ class UserListApi(generics.ListAPIView):
     # apply custom pagination
     pagination_class = UserPagination
 
+    # query parameter asking for counts instead of id lists
+    counts_query_param = 'counts'
 
-class UserDetailApi(generics.RetrieveAPIView):
+    def wants_counts(self):
+        value = self.request.query_params.get(self.counts_query_param, '')
+        return value.lower() in ('1', 'true')
+
+    def get_serializer_class(self):
+        if self.wants_counts():
+            return UserCountsSerializer
+        return UserSerializer
+
+    def get_queryset(self):
+        # the password hash and other columns are never rendered
+        queryset = User.objects.only('id', 'username', 'email')
+        if self.wants_counts():
+            return queryset.annotate(
+                blog_post_count=count_by_author(BlogPost),
+                comment_count=count_by_author(Comment),
+            )
+        return plan_queryset(queryset, UserSerializer)
+
+
+class UserListApi(UserListMixin, generics.ListAPIView):
     """
-    API view to retrieve details of a single user.
-    Accessible to the user themselves OR admin users.
+    API view to retrieve a keyset-paginated list of all
+    users.
+    Only accesible to `admin` users!
     """
-    queryset = User.objects.all()
+
+
+class UserListAsyncApi(UserListMixin, AsyncAPIView):
+    """
+    Async variant of `UserListApi` for ASGI deployments.
+    Only accesible to `admin` users!
+    """
+
+    async def get(self, request):
+        paginator = self.pagination_class()
+        queryset = paginator.get_page_queryset(self.get_queryset(), request)
+        page = paginator.paginate_rows([user async for user in queryset])
+        serializer = self.get_serializer_class()(page, many=True)
+        return JsonResponse(paginator.get_paginated_data(serializer.data))
+
+
+class UserDetailMixin:
+    """
+    Shared parts of the sync and async user detail views.
+
+    The user comes with the ids of their posts and comments, prefetched
+    as bare ids like in the user list.
+    """
+
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrAdmin]
 
+    def get_queryset(self):
+        # the password hash and other columns are never rendered
+        return plan_queryset(
+            User.objects.only('id', 'username', 'email'), UserSerializer)
+
+
+class UserDetailApi(UserDetailMixin, generics.RetrieveAPIView):
+    """
+    API view to retrieve details of a single user.
+    Accessible to the user themselves OR admin users.
+    Supports conditional requests through an `ETag`.
+    """
+
+    def retrieve(self, request, *args, **kwargs):
+        # permissions are checked before the validator is compared so
+        # a 304 never confirms anything to an unauthorized client
+        user = self.get_object()
+        etag = self.get_etag(user)
+
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+        serializer = self.get_serializer(user)
+        response = Response(serializer.data)
+        response['ETag'] = etag
+        return response
+
+    def get_etag(self, user):
+        return user_etag(
+            user,
+            BlogPost.objects.filter(author=user).order_by().aggregate(
+                **ID_STATS),
+            Comment.objects.filter(author=user).order_by().aggregate(
+                **ID_STATS),
+        )
+
+
+class UserDetailAsyncApi(UserDetailMixin, AsyncAPIView):
+    """
+    Async variant of `UserDetailApi` for ASGI deployments.
+    Accessible to the user themselves OR admin users.
+    """
+
+    async def get(self, request, pk):
+        try:
+            user = await self.get_queryset().aget(pk=pk)
+        except User.DoesNotExist:
+            raise NotFound()
+        self.check_object_permissions(request, user)
+
+        etag = user_etag(
+            user,
+            await BlogPost.objects.filter(author=user).order_by().aaggregate(
+                **ID_STATS),
+            await Comment.objects.filter(author=user).order_by().aaggregate(
+                **ID_STATS),
+        )
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+        response = JsonResponse(self.serializer_class(user).data)
+        response['ETag'] = etag
+        return response
+
 
 class UserUpdateApi(generics.UpdateAPIView):
     """
@@ -84,28 +232,29 @@ class UserDeleteApi(generics.DestroyAPIView):
     """
     API view to delete a specific user's profile.
     Accessible by the user themselves or admin users.
+
+    The account is disabled immediately and its posts, comments and
+    the user row are deleted by a background job (see users.deletion),
+    so the response is `202 Accepted`.
     """
     queryset = User.objects.all()
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrAdmin]
 
-    # Ensures the deletion is atomic (all or nothing)
-    # If anything fails, the transaction is rolled back! :)
+    # Disabling the user and queueing the job happen together or not
+    # at all; the job only starts once this transaction commits
     @transaction.atomic
     def delete(self, request, *args, **kwargs):
         """
-        Handles the DELETE request to delete a user and all associated
-        data.
+        Handles the DELETE request by disabling the user and scheduling
+        the deletion of all associated data.
         """
-        try:
-            user = self.get_object()  # retrieves the User object
-        except User.DoesNotExist:
-            return Response({'detail': 'User not found.'}, status=status.HTTP_404_NOT_FOUND)
-
-        self.perform_destroy(user)
-        response_data = {'message': 'deleted'}
+        user = self.get_object()  # retrieves the User object
+        job = schedule_deletion(user, requested_by=request.user)
 
         # Log deletion
         logger.info(
-            f"User deleted: {user.username} deleted by {request.user.username}.")
+            f"User deletion scheduled: {user.username} by {request.user.username}.")
 
-        return Response(response_data, status=status.HTTP_204_NO_CONTENT)
+        return Response({'message': 'deletion scheduled', 'job': job.pk,
+                         'status': job.status},
+                        status=status.HTTP_202_ACCEPTED)